@@ -0,0 +1,348 @@
+#######################################
+# BYTECODE
+# 字节码编译器：把 AST 编译为紧凑的字节码，交由 basic/vm.py 中的虚拟机执行
+# 每条指令占两个整数 [op, arg]；常量、变量名分别存放于常量池和名称表中
+#######################################
+
+# 操作码
+LOAD_NUMBER = 0  # 常量池[arg] 为编译期创建的 Number（unboxed 模式下也可以是 python 数值），各次执行共享
+LOAD_STRING = 1  # 常量池[arg] 为编译期创建的 String，各次执行共享
+LOAD_NULL = 2  # Number.null
+LOAD_NAME = 3  # 常量池[arg] 为变量访问结点的 LookupCache，按名称在符号表中查找
+LOAD_LOCAL = 4  # 读取局部变量槽位 arg
+STORE_NAME = 5  # 按名称表[arg] 写入符号表（值保留在栈顶，赋值本身也是表达式）
+STORE_LOCAL = 6  # 写入局部变量槽位 arg（值保留在栈顶）
+POP_TOP = 7
+BINARY_OP = 8  # 常量池[arg] 为运算函数
+UNARY_OP = 9  # 常量池[arg] 为运算函数
+BUILD_LIST = 10  # 弹出 arg 个值组成 List
+JUMP = 11  # 跳转到指令下标 arg
+POP_JUMP_IF_FALSE = 12
+SETUP_LOOP = 13  # 登记循环块：常量池[arg] 为 (BREAK 的跳转目标, 循环体起点)，CONTINUE 跳回紧随其后的指令
+POP_BLOCK = 14
+FOR_SETUP = 15  # 弹出 start, end, step，压入循环状态
+FOR_ITER = 16  # 循环结束则跳转到 arg，否则压入循环变量的值
+WHILE_SETUP = 17  # 压入循环状态
+LOOP_APPEND = 18  # 把循环体的值追加到循环状态中
+LOOP_END = 19  # 弹出循环状态，arg 为 1 时压入 Number.null，否则压入收集到的 List
+MAKE_FUNCTION = 20  # 常量池[arg] 为函数体的 Code
+CALL = 21  # 弹出 arg 个参数与被调用的值
+RETURN_VALUE = 22  # RETURN 关键字
+BREAK_LOOP = 23
+CONTINUE_LOOP = 24
+END = 25  # 代码执行完毕，栈顶为程序（或函数体）的值
+LOAD_GLOBAL = 26  # 常量池[arg] 为变量访问结点的 LookupCache，名称从未在全局符号表以外绑定时直接读取全局符号表（见 basic/resolver.py），否则同 LOAD_NAME
+TAIL_CALL = 27  # 尾部位置的 CALL（见 basic/tail_calls.py）：被调用的是 VMFunction 时以新帧替换当前帧
+# unboxed 模式（见 BytecodeCompiler.compile_unboxed）的指令，操作数可以是 python 数值
+BINARY_OP_UNBOXED = 28  # 常量池[arg] 为 (对 python 数值的运算, 运算函数)；两个操作数都是数字时压入 python 数值
+UNARY_OP_UNBOXED = 29  # 常量池[arg] 为 (对 python 数值的运算, 运算函数)
+POP_JUMP_IF_FALSE_UNBOXED = 30
+BOX = 31  # 栈顶为 python 数值时包装为 Number
+
+
+# 编译结果：一段程序或一个函数体
+class Code:
+    def __init__(self, name, arg_names=None, should_auto_return=False, memoize=False):
+        self.name = name
+        self.arg_names = arg_names or []
+        self.should_auto_return = should_auto_return
+        self.memoize = memoize  # MAKE_FUNCTION 是否把函数包装为 MemoFunction
+        self.instructions = []  # [op, arg, op, arg, ...]
+        self.consts = []  # 常量池
+        self.names = []  # 名称表
+        self.positions = []  # 位置表：第 i 条指令 -> (pos_start, pos_end)，用于报错定位
+        self.operands = {}  # BINARY_OP / UNARY_OP 的指令下标 -> 操作数的结点，运算出错时用于定位
+        # 局部变量布局，取自 basic/resolver.py 中的 FunctionScope；程序顶层的变量仍存放于符号表中
+        self.slot_map = {}  # 局部变量名 -> 槽位下标
+        self.slot_names = []  # 槽位下标 -> 局部变量名
+        self.arg_slots = []  # 形参依次对应的槽位
+
+    def add_const(self, value):
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def add_name(self, name):
+        if name not in self.names:
+            self.names.append(name)
+        return self.names.index(name)
+
+    def __repr__(self):
+        return f'<code {self.name}>'
+
+
+class BytecodeCompiler:
+    # unboxed 为真时，数字运算的中间结果以 python 数值而不是 Number 的形式留在栈上
+    def __init__(self, unboxed=False):
+        self.code = None
+        self.unboxed = unboxed
+
+    # 编译整个程序
+    def compile_program(self, node):
+        Resolver().resolve_program(node)
+        self.code = Code('<program>')
+        self.compile(node)
+        self.emit(END, 0, node)
+        return self.code
+
+    def compile(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f'No compile_{type(node).__name__} method defined')
+
+    # 追加一条指令，返回其在 instructions 中的下标，便于之后回填跳转目标
+    def emit(self, op, arg, node):
+        self.code.instructions.append(op)
+        self.code.instructions.append(arg)
+        self.code.positions.append((node.pos_start, node.pos_end))
+        return len(self.code.instructions) - 2
+
+    # 回填跳转目标为当前位置
+    def patch(self, index):
+        self.code.instructions[index + 1] = len(self.code.instructions)
+
+    # 回填循环块：BREAK 跳转到当前位置；循环体起点之前（WHILE 的条件）中的 BREAK / CONTINUE 作用于外层循环
+    def patch_loop(self, setup, body_start):
+        const_index = self.code.instructions[setup + 1]
+        self.code.consts[const_index] = (len(self.code.instructions), body_start)
+
+    # 依据 basic/resolver.py 的解析结果选择读写变量的指令
+    def emit_load(self, node):
+        if node.slot is not None:
+            self.emit(LOAD_LOCAL, node.slot, node)
+        elif node.is_global:
+            self.emit(LOAD_GLOBAL, self.code.add_const(node.cache), node)
+        else:
+            self.emit(LOAD_NAME, self.code.add_const(node.cache), node)
+
+    def emit_store(self, name, slot, node):
+        if slot is not None:
+            self.emit(STORE_LOCAL, slot, node)
+        else:
+            self.emit(STORE_NAME, self.code.add_name(name), node)
+
+    ###################################
+
+    def compile_NumberNode(self, node):
+        value = Number(node.tok.value).set_pos(node.pos_start, node.pos_end)
+        self.emit(LOAD_NUMBER, self.code.add_const(value), node)
+
+    def compile_StringNode(self, node):
+        value = String(node.tok.value).set_pos(node.pos_start, node.pos_end)
+        self.emit(LOAD_STRING, self.code.add_const(value), node)
+
+    def compile_ListNode(self, node):
+        for element_node in node.element_nodes:
+            self.compile(element_node)
+        self.emit(BUILD_LIST, len(node.element_nodes), node)
+
+    def compile_VarAccessNode(self, node):
+        self.emit_load(node)
+
+    def compile_VarAssignNode(self, node):
+        self.compile(node.value_node)
+        self.emit_store(node.var_name_tok.value, node.slot, node)
+
+    def compile_BinOpNode(self, node):
+        if self.unboxed:
+            self.compile_unboxed(node)
+            self.emit(BOX, 0, node)
+            return
+
+        self.compile(node.left_node)
+        self.compile(node.right_node)
+        index = self.emit(BINARY_OP, self.code.add_const(
+            binary_operation(node.op_tok)), node)
+        self.code.operands[index] = (node.left_node, node.right_node)
+
+    def compile_UnaryOpNode(self, node):
+        if self.unboxed:
+            self.compile_unboxed(node)
+            self.emit(BOX, 0, node)
+            return
+
+        self.compile(node.node)
+        index = self.emit(UNARY_OP, self.code.add_const(
+            unary_operation(node.op_tok)), node)
+        self.code.operands[index] = (node.node,)
+
+    #   <condition>
+    #   POP_JUMP_IF_FALSE next      ; 每个分支依次判断
+    #   <expr>
+    #   JUMP end
+    # next:
+    #   ...
+    #   <else expr> | LOAD_NULL
+    # end:
+    def compile_IfNode(self, node):
+        self.compile_if(node, self.compile)
+
+    # compile_expr 用于编译各分支的表达式
+    def compile_if(self, node, compile_expr):
+        end_jumps = []
+
+        for condition, expr, should_return_null in node.cases:
+            next_jump = self.compile_condition(condition)
+            self.compile_branch(expr, should_return_null, compile_expr)
+            end_jumps.append(self.emit(JUMP, 0, node))
+            self.patch(next_jump)
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            self.compile_branch(expr, should_return_null, compile_expr)
+        else:
+            self.emit(LOAD_NULL, 0, node)
+
+        for end_jump in end_jumps:
+            self.patch(end_jump)
+
+    def compile_branch(self, expr, should_return_null, compile_expr):
+        compile_expr(expr)
+        if should_return_null:
+            self.emit(POP_TOP, 0, expr)
+            self.emit(LOAD_NULL, 0, expr)
+
+    #   <start> <end> <step>
+    #   FOR_SETUP
+    #   SETUP_LOOP exit
+    # top:
+    #   FOR_ITER exit
+    #   STORE var; POP_TOP
+    #   <body>
+    #   LOOP_APPEND | POP_TOP
+    #   JUMP top
+    # exit:
+    #   POP_BLOCK
+    #   LOOP_END
+    def compile_ForNode(self, node):
+        self.compile(node.start_value_node)
+        self.compile(node.end_value_node)
+        if node.step_value_node:
+            self.compile(node.step_value_node)
+        else:
+            self.emit(LOAD_NUMBER, self.code.add_const(Number(1)), node)
+        self.emit(FOR_SETUP, 0, node)
+
+        setup = self.emit(SETUP_LOOP, self.code.add_const(None), node)
+        top = len(self.code.instructions)
+        for_iter = self.emit(FOR_ITER, 0, node)
+        self.emit_store(node.var_name_tok.value, node.slot, node)
+        self.emit(POP_TOP, 0, node)
+        self.compile_loop_body(node, top)
+        self.patch_loop(setup, top)
+        self.patch(for_iter)
+        self.emit(POP_BLOCK, 0, node)
+        self.emit(LOOP_END, int(node.should_return_null), node)
+
+    #   WHILE_SETUP
+    #   SETUP_LOOP exit
+    # top:
+    #   <condition>
+    #   POP_JUMP_IF_FALSE exit
+    #   <body>
+    #   LOOP_APPEND | POP_TOP
+    #   JUMP top
+    # exit:
+    #   POP_BLOCK
+    #   LOOP_END
+    def compile_WhileNode(self, node):
+        self.emit(WHILE_SETUP, 0, node)
+
+        setup = self.emit(SETUP_LOOP, self.code.add_const(None), node)
+        top = len(self.code.instructions)
+        exit_jump = self.compile_condition(node.condition_node)
+        body_start = len(self.code.instructions)
+        self.compile_loop_body(node, top)
+        self.patch_loop(setup, body_start)
+        self.patch(exit_jump)
+        self.emit(POP_BLOCK, 0, node)
+        self.emit(LOOP_END, int(node.should_return_null), node)
+
+    def compile_loop_body(self, node, top):
+        self.compile(node.body_node)
+        # 返回 Number.null 的循环无需收集每一轮的值
+        self.emit(POP_TOP if node.should_return_null else LOOP_APPEND, 0, node)
+        self.emit(JUMP, top, node)
+
+    def compile_FuncDefNode(self, node):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        code = Code(func_name, arg_names, node.should_auto_return, node.memoize)
+        code.slot_map = node.scope.slot_map
+        code.slot_names = node.scope.slot_names
+        code.arg_slots = node.scope.arg_slots
+
+        outer_code, self.code = self.code, code
+        self.compile(node.body_node)
+        self.emit(END, 0, node.body_node)
+        self.code = outer_code
+
+        self.emit(MAKE_FUNCTION, self.code.add_const(code), node)
+        if func_name:
+            self.emit_store(func_name, node.slot, node)
+
+    def compile_CallNode(self, node):
+        self.compile(node.node_to_call)
+        for arg_node in node.arg_nodes:
+            self.compile(arg_node)
+        self.emit(TAIL_CALL if node.is_tail else CALL, len(node.arg_nodes), node)
+
+    # 编译条件以及条件不成立时的跳转，返回跳转指令的下标
+    def compile_condition(self, condition):
+        if self.unboxed:
+            self.compile_unboxed(condition)
+            return self.emit(POP_JUMP_IF_FALSE_UNBOXED, 0, condition)
+        self.compile(condition)
+        return self.emit(POP_JUMP_IF_FALSE, 0, condition)
+
+    def compile_ReturnNode(self, node):
+        if node.node_to_return:
+            self.compile(node.node_to_return)
+        else:
+            self.emit(LOAD_NULL, 0, node)
+        self.emit(RETURN_VALUE, 0, node)
+
+    def compile_ContinueNode(self, node):
+        self.emit(CONTINUE_LOOP, 0, node)
+
+    def compile_BreakNode(self, node):
+        self.emit(BREAK_LOOP, 0, node)
+
+    ###################################
+    # unboxed 模式：值只交给运算、条件判断的表达式（其余结点与 compile 相同）在此编译，
+    # 数字字面量与运算结果以 python 数值的形式压栈，不再为每个中间结果创建 Number
+    # 在存入变量、传入函数、组成列表、作为返回值等离开运算的地方，由 compile_BinOpNode 等补上 BOX
+
+    def compile_unboxed(self, node):
+        method = getattr(self, f'compile_unboxed_{type(node).__name__}', self.compile)
+        method(node)
+
+    def compile_unboxed_NumberNode(self, node):
+        self.emit(LOAD_NUMBER, self.code.add_const(node.tok.value), node)
+
+    def compile_unboxed_BinOpNode(self, node):
+        self.compile_unboxed(node.left_node)
+        self.compile_unboxed(node.right_node)
+        index = self.emit(BINARY_OP_UNBOXED, self.code.add_const(
+            (number_operation(node.op_tok), binary_operation(node.op_tok))), node)
+        self.code.operands[index] = (node.left_node, node.right_node)
+
+    def compile_unboxed_UnaryOpNode(self, node):
+        self.compile_unboxed(node.node)
+        index = self.emit(UNARY_OP_UNBOXED, self.code.add_const(
+            (unary_number_operation(node.op_tok), unary_operation(node.op_tok))), node)
+        self.code.operands[index] = (node.node,)
+
+    def compile_unboxed_IfNode(self, node):
+        self.compile_if(node, self.compile_unboxed)
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.operations import binary_operation, unary_operation, number_operation, unary_number_operation
+from util.values import Number, String
+from basic.resolver import Resolver
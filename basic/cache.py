@@ -0,0 +1,261 @@
+#######################################
+# AST CACHE
+# 语法分析结果的磁盘缓存（类似 python 的 .pyc）：以源码的哈希值与缓存格式的版本为键，把 AST（包括位置）编码为
+# 只含 python 基本类型的嵌套元组，以 marshal 序列化、zlib 压缩后写入缓存目录；再次运行同一段源码时直接读取，跳过词法分析与语法分析
+# 缓存目录由环境变量 MENDAX_CACHE_DIR 指定，未指定时不缓存
+# 只缓存语法分析的结果：常量折叠、尾调用标记等依赖于运行时状态或会修改结点的处理仍在每次运行时进行
+#######################################
+
+import gc
+import hashlib
+import marshal
+import os
+import sys
+import zlib
+
+# AST 的结构或编码方式改变时递增，使旧的缓存失效；marshal 的格式随 python 的版本变化，一并作为键的一部分
+CACHE_VERSION = 1
+CACHE_TAG = f'mendax-ast-{CACHE_VERSION}-py{sys.version_info[0]}.{sys.version_info[1]}-marshal{marshal.version}'
+CACHE_SUFFIX = '.mxc'
+
+
+# 缓存目录；未设置时为 None，不缓存
+def cache_dir():
+    return os.environ.get('MENDAX_CACHE_DIR') or None
+
+
+# 源码 text 的缓存文件；文件名与源码的文件名无关，内容相同的脚本共用同一个缓存
+def cache_path(directory, text):
+    digest = hashlib.sha256(CACHE_TAG.encode() + b'\0' + text.encode('utf-8', 'surrogatepass')).hexdigest()
+    return os.path.join(directory, digest + CACHE_SUFFIX)
+
+
+# 从缓存中读取源码 text 的 AST，位置属于文件 fn；没有缓存、缓存无法读取或内容损坏时返回 None，由调用者重新分析
+def load_ast(fn, text):
+    directory = cache_dir()
+    if directory is None:
+        return None
+    try:
+        with open(cache_path(directory, text), 'rb') as f:
+            data = zlib.decompress(f.read())
+    except (OSError, zlib.error):
+        return None
+
+    # 读取时一次创建大量对象，会反复触发循环垃圾回收；AST 中没有循环引用，读取期间暂停垃圾回收
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        tag, data = marshal.loads(data)
+        if tag != CACHE_TAG:
+            return None
+        return ASTDecoder(Source(fn, text)).decode(data)
+    # 内容损坏时解码可能遇到未知的结点类名（KeyError）、元素个数不对的元组（ValueError、IndexError）等
+    except (EOFError, ValueError, TypeError, KeyError, IndexError, RecursionError):
+        return None
+    finally:
+        if enabled:
+            gc.enable()
+
+
+# 把源码 text 的 AST 写入缓存；嵌套过深、缓存目录无法写入时不缓存
+def store_ast(text, node):
+    directory = cache_dir()
+    if directory is None:
+        return
+    try:
+        data = zlib.compress(marshal.dumps((CACHE_TAG, ASTEncoder().encode(node))))
+    except (RecursionError, ValueError):
+        return
+
+    path = cache_path(directory, text)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # 先写入临时文件再替换，其他进程不会读到写了一半的缓存
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+# 把 AST 编码为嵌套元组：每个结点为 (结点类名, 各属性...)，token 为 (类型, 值, 开始处, 结束处)
+# 由 token、子结点可以得到的位置不再记录，解码时由结点的构造函数重新计算
+# 下标都记为与前一个记录的下标之差（按编码的顺序），数值小且多有重复，压缩后的缓存文件远小于直接记录下标
+class ASTEncoder:
+    def __init__(self):
+        self.last = 0  # 前一个记录的下标
+
+    def encode(self, node):
+        method = getattr(self, f'encode_{type(node).__name__}')
+        return method(node)
+
+    def encode_optional(self, node):
+        return self.encode(node) if node else None
+
+    def offset(self, idx):
+        delta = idx - self.last
+        self.last = idx
+        return delta
+
+    def token(self, tok):
+        return tok.type, tok.value, self.offset(tok.start), self.offset(tok.end)
+
+    # 最低位表示是否为换行 token 的结束位置（LineEndPosition）
+    def position(self, pos):
+        return self.offset(pos.idx) * 2 + isinstance(pos, LineEndPosition)
+
+    def encode_NumberNode(self, node):
+        return 'NumberNode', self.token(node.tok)
+
+    def encode_StringNode(self, node):
+        return 'StringNode', self.token(node.tok)
+
+    def encode_ListNode(self, node):
+        elements = tuple(self.encode(element) for element in node.element_nodes)
+        return 'ListNode', elements, self.position(node.pos_start), self.position(node.pos_end)
+
+    def encode_VarAccessNode(self, node):
+        return 'VarAccessNode', self.token(node.var_name_tok)
+
+    def encode_VarAssignNode(self, node):
+        return 'VarAssignNode', self.token(node.var_name_tok), self.encode(node.value_node)
+
+    def encode_BinOpNode(self, node):
+        return 'BinOpNode', self.encode(node.left_node), self.token(node.op_tok), self.encode(node.right_node)
+
+    def encode_UnaryOpNode(self, node):
+        return 'UnaryOpNode', self.token(node.op_tok), self.encode(node.node)
+
+    def encode_IfNode(self, node):
+        cases = tuple((self.encode(condition), self.encode(expr), should_return_null)
+                      for condition, expr, should_return_null in node.cases)
+        else_case = None
+        if node.else_case:
+            else_case = self.encode(node.else_case[0]), node.else_case[1]
+        return 'IfNode', cases, else_case
+
+    def encode_ForNode(self, node):
+        return ('ForNode', self.token(node.var_name_tok), self.encode(node.start_value_node),
+                self.encode(node.end_value_node), self.encode_optional(node.step_value_node),
+                self.encode(node.body_node), node.should_return_null)
+
+    def encode_WhileNode(self, node):
+        return 'WhileNode', self.encode(node.condition_node), self.encode(node.body_node), node.should_return_null
+
+    def encode_FuncDefNode(self, node):
+        var_name_tok = self.token(node.var_name_tok) if node.var_name_tok else None
+        arg_name_toks = tuple(self.token(tok) for tok in node.arg_name_toks)
+        return 'FuncDefNode', var_name_tok, arg_name_toks, self.encode(node.body_node), node.should_auto_return
+
+    def encode_CallNode(self, node):
+        return 'CallNode', self.encode(node.node_to_call), tuple(self.encode(arg) for arg in node.arg_nodes)
+
+    def encode_ReturnNode(self, node):
+        return ('ReturnNode', self.encode_optional(node.node_to_return),
+                self.position(node.pos_start), self.position(node.pos_end))
+
+    def encode_ContinueNode(self, node):
+        return 'ContinueNode', self.position(node.pos_start), self.position(node.pos_end)
+
+    def encode_BreakNode(self, node):
+        return 'BreakNode', self.position(node.pos_start), self.position(node.pos_end)
+
+
+# 由 ASTEncoder 的编码重新构建 AST，token 与位置都属于源码 source
+class ASTDecoder:
+    def __init__(self, source):
+        self.source = source
+        self.last = 0  # 前一个解码的下标
+        # 结点类名 -> 解码的方法
+        self.methods = {name[len('decode_'):]: getattr(self, name)
+                        for name in dir(self) if name.startswith('decode_')}
+
+    def decode(self, data):
+        return self.methods[data[0]](data)
+
+    def decode_optional(self, data):
+        return self.decode(data) if data else None
+
+    def token(self, data):
+        type_, value, start, end = data
+        start += self.last
+        self.last = start + end
+        return Token(type_, value, self.source, start, self.last)
+
+    def position(self, data):
+        delta, line_end = divmod(data, 2)
+        self.last += delta
+        if line_end:
+            return LineEndPosition(self.last, self.source)
+        return Position(self.last, self.source)
+
+    def decode_NumberNode(self, data):
+        return NumberNode(self.token(data[1]))
+
+    def decode_StringNode(self, data):
+        return StringNode(self.token(data[1]))
+
+    def decode_ListNode(self, data):
+        _, elements, pos_start, pos_end = data
+        return ListNode([self.decode(element) for element in elements],
+                        self.position(pos_start), self.position(pos_end))
+
+    def decode_VarAccessNode(self, data):
+        return VarAccessNode(self.token(data[1]))
+
+    def decode_VarAssignNode(self, data):
+        return VarAssignNode(self.token(data[1]), self.decode(data[2]))
+
+    def decode_BinOpNode(self, data):
+        _, left, op_tok, right = data
+        return BinOpNode(self.decode(left), self.token(op_tok), self.decode(right))
+
+    def decode_UnaryOpNode(self, data):
+        return UnaryOpNode(self.token(data[1]), self.decode(data[2]))
+
+    def decode_IfNode(self, data):
+        _, cases, else_case = data
+        cases = [(self.decode(condition), self.decode(expr), should_return_null)
+                 for condition, expr, should_return_null in cases]
+        if else_case:
+            else_case = self.decode(else_case[0]), else_case[1]
+        return IfNode(cases, else_case)
+
+    def decode_ForNode(self, data):
+        _, var_name_tok, start_value, end_value, step_value, body, should_return_null = data
+        return ForNode(self.token(var_name_tok), self.decode(start_value), self.decode(end_value),
+                       self.decode_optional(step_value), self.decode(body), should_return_null)
+
+    def decode_WhileNode(self, data):
+        _, condition, body, should_return_null = data
+        return WhileNode(self.decode(condition), self.decode(body), should_return_null)
+
+    def decode_FuncDefNode(self, data):
+        _, var_name_tok, arg_name_toks, body, should_auto_return = data
+        return FuncDefNode(self.token(var_name_tok) if var_name_tok else None,
+                           [self.token(tok) for tok in arg_name_toks], self.decode(body), should_auto_return)
+
+    def decode_CallNode(self, data):
+        _, node_to_call, args = data
+        return CallNode(self.decode(node_to_call), [self.decode(arg) for arg in args])
+
+    def decode_ReturnNode(self, data):
+        _, node_to_return, pos_start, pos_end = data
+        return ReturnNode(self.decode_optional(node_to_return), self.position(pos_start), self.position(pos_end))
+
+    def decode_ContinueNode(self, data):
+        return ContinueNode(self.position(data[1]), self.position(data[2]))
+
+    def decode_BreakNode(self, data):
+        return BreakNode(self.position(data[1]), self.position(data[2]))
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.position import Source, Position, LineEndPosition
+from data.tokens import Token
+from util.nodes import *
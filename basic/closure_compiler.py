@@ -0,0 +1,388 @@
+#######################################
+# CLOSURE COMPILER
+# 闭包编译器：把 AST 一次性编译为预先绑定好的 python 闭包树
+# 执行程序时只需调用闭包，不再经过 Interpreter.visit 的字符串拼接与 getattr 分派
+#######################################
+
+
+class ClosureCompiler:
+    # 编译整个程序：先由 basic/resolver.py 解析变量的存储位置
+    def compile_program(self, node):
+        Resolver().resolve_program(node)
+        return self.compile(node)
+
+    def compile(self, node):  # node : ASTNode；返回值为形如 fn(context) -> RTResult 的闭包
+        # 分派只在编译期发生一次，运行期直接调用闭包
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        return method(node)
+
+    # 若依据 method_name 没有取到值，则会调用该默认方法
+    def no_compile_method(self, node):
+        raise Exception(f'No compile_{type(node).__name__} method defined')
+
+    ###################################
+
+    # 字面量的值在编译期创建一次，每次执行都返回同一个值
+    def compile_NumberNode(self, node):
+        value = Number(node.tok.value).set_pos(node.pos_start, node.pos_end)
+
+        def number(context):
+            return RTResult().success(value)
+        return number
+
+    def compile_StringNode(self, node):
+        value = String(node.tok.value).set_pos(node.pos_start, node.pos_end)
+
+        def string(context):
+            return RTResult().success(value)
+        return string
+
+    def compile_ListNode(self, node):
+        element_fns = [self.compile(element_node)
+                       for element_node in node.element_nodes]
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def list_(context):
+            res = RTResult()
+            elements = []
+
+            for element_fn in element_fns:
+                elements.append(res.register(element_fn(context)))
+                if res.should_return():
+                    return res
+
+            return res.success(
+                List(elements).set_context(context).set_pos(pos_start, pos_end)
+            )
+        return list_
+
+    # 变量访问：局部变量按槽位读取，全局变量直接读取全局符号表，其余按名称沿符号表链查找
+    def compile_VarAccessNode(self, node):
+        var_name = node.var_name_tok.value
+        slot = node.slot
+        global_symbols = global_symbol_table.symbols if node.is_global else None
+        local_names = SymbolTable.local_names
+        cache = node.cache
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def var_access(context):
+            res = RTResult()
+            if slot is not None:
+                value = context.symbol_table.slots[slot]
+                if value is None:  # 局部变量尚未赋值，按名称向调用者的符号表查找
+                    value = context.symbol_table.get(var_name)
+            elif global_symbols is not None and var_name not in local_names:
+                value = global_symbols.get(var_name)
+            else:
+                value = cache.get(context.symbol_table)
+
+            if not value:
+                return res.failure(RTError(
+                    pos_start, pos_end,
+                    f"'{var_name}' is not defined",
+                    context
+                ))
+
+            return res.success(value)
+        return var_access
+
+    # 变量赋值
+    def compile_VarAssignNode(self, node):
+        var_name = node.var_name_tok.value
+        slot = node.slot
+        value_fn = self.compile(node.value_node)
+
+        def var_assign(context):
+            res = RTResult()
+            value = res.register(value_fn(context))
+            if res.should_return():
+                return res
+
+            if slot is not None:
+                context.symbol_table.slots[slot] = value
+            else:
+                context.symbol_table.set(var_name, value)
+            return res.success(value)
+        return var_assign
+
+    # 二元操作：运算符对应的方法在编译期就已经选定
+    def compile_BinOpNode(self, node):
+        left_fn = self.compile(node.left_node)
+        right_fn = self.compile(node.right_node)
+        operation = binary_operation(node.op_tok)
+        number_op = number_operation(node.op_tok)
+        left_node, right_node = node.left_node, node.right_node
+
+        def bin_op(context):
+            res = RTResult()
+            left = res.register(left_fn(context))
+            if res.should_return():
+                return res
+            right = res.register(right_fn(context))
+            if res.should_return():
+                return res
+
+            # 两个操作数都是 Number 时直接对 python 数值运算（见 Interpreter.visit_BinOpNode）
+            if type(left) is Number and type(right) is Number:
+                try:
+                    return res.success(Number(number_op(left.value, right.value)))
+                except ZeroDivisionError:
+                    pass
+
+            result, error = operation(left, right)
+            if error:
+                return res.failure(binary_error(operation, left, right, left_node, right_node, context))
+            return res.success(result)
+        return bin_op
+
+    # 一元操作
+    def compile_UnaryOpNode(self, node):
+        operand_fn = self.compile(node.node)
+        operation = unary_operation(node.op_tok)
+        operand_node = node.node
+
+        def unary_op(context):
+            res = RTResult()
+            number = res.register(operand_fn(context))
+            if res.should_return():
+                return res
+
+            result, error = operation(number)
+            if error:
+                return res.failure(unary_error(operation, number, operand_node, context))
+            return res.success(result)
+        return unary_op
+
+    # IF 条件表达式
+    def compile_IfNode(self, node):
+        cases = [
+            (self.compile(condition), self.compile(expr), should_return_null)
+            for condition, expr, should_return_null in node.cases
+        ]
+        if node.else_case:
+            expr, else_should_return_null = node.else_case
+            else_fn = self.compile(expr)
+        else:
+            else_fn, else_should_return_null = None, False
+
+        def if_(context):
+            res = RTResult()
+
+            for condition_fn, expr_fn, should_return_null in cases:
+                condition_value = res.register(condition_fn(context))
+                if res.should_return():
+                    return res
+
+                if condition_value.is_true():
+                    expr_value = res.register(expr_fn(context))
+                    if res.should_return():
+                        return res
+                    return res.success(Number.null if should_return_null else expr_value)
+
+            if else_fn:
+                expr_value = res.register(else_fn(context))
+                if res.should_return():
+                    return res
+                return res.success(Number.null if else_should_return_null else expr_value)
+
+            return res.success(Number.null)
+        return if_
+
+    # FOR 循环
+    def compile_ForNode(self, node):
+        var_name = node.var_name_tok.value
+        slot = node.slot
+        start_fn = self.compile(node.start_value_node)
+        end_fn = self.compile(node.end_value_node)
+        step_fn = self.compile(
+            node.step_value_node) if node.step_value_node else None
+        body_fn = self.compile(node.body_node)
+        should_return_null = node.should_return_null
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def for_(context):
+            res = RTResult()
+            elements = []
+
+            start_value = res.register(start_fn(context))
+            if res.should_return():
+                return res
+
+            end_value = res.register(end_fn(context))
+            if res.should_return():
+                return res
+
+            if step_fn:
+                step_value = res.register(step_fn(context))
+                if res.should_return():
+                    return res
+            else:
+                step_value = Number(1)
+
+            i = start_value.value
+            end = end_value.value
+            step = step_value.value
+            ascending = step >= 0
+            symbol_table = context.symbol_table
+
+            while (i < end) if ascending else (i > end):
+                if slot is not None:
+                    symbol_table.slots[slot] = Number(i)
+                else:
+                    symbol_table.set(var_name, Number(i))
+                i += step
+
+                value = res.register(body_fn(context))
+                if res.should_return() and res.loop_should_continue == False and res.loop_should_break == False:
+                    return res
+
+                if res.loop_should_continue:
+                    continue
+
+                if res.loop_should_break:
+                    break
+
+                if not should_return_null:
+                    elements.append(value)
+
+            return res.success(
+                Number.null if should_return_null else
+                List(elements).set_context(context).set_pos(pos_start, pos_end)
+            )
+        return for_
+
+    # WHILE 循环
+    def compile_WhileNode(self, node):
+        condition_fn = self.compile(node.condition_node)
+        body_fn = self.compile(node.body_node)
+        should_return_null = node.should_return_null
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def while_(context):
+            res = RTResult()
+            elements = []
+
+            while True:
+                condition = res.register(condition_fn(context))
+                if res.should_return():
+                    return res
+
+                if not condition.is_true():
+                    break
+
+                value = res.register(body_fn(context))
+                if res.should_return() and res.loop_should_continue == False and res.loop_should_break == False:
+                    return res
+
+                if res.loop_should_continue:
+                    continue
+
+                if res.loop_should_break:
+                    break
+
+                if not should_return_null:
+                    elements.append(value)
+
+            return res.success(
+                Number.null if should_return_null else
+                List(elements).set_context(context).set_pos(pos_start, pos_end)
+            )
+        return while_
+
+    # 函数定义：函数体只编译一次，每次执行 FUN 语句时只是把闭包包装为函数值
+    def compile_FuncDefNode(self, node):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        body_node = node.body_node
+        body_fn = self.compile(body_node)
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        should_auto_return = node.should_auto_return
+        scope = node.scope
+        slot = node.slot
+        memoize = node.memoize
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def func_def(context):
+            func_value = CompiledFunction(func_name, body_node, arg_names, should_auto_return, body_fn, scope).set_context(
+                context).set_pos(pos_start, pos_end)
+            if memoize:
+                func_value = MemoFunction(func_value)
+
+            if slot is not None:
+                context.symbol_table.slots[slot] = func_value
+            elif func_name:
+                context.symbol_table.set(func_name, func_value)
+
+            return RTResult().success(func_value)
+        return func_def
+
+    # 函数调用
+    def compile_CallNode(self, node):
+        callee_fn = self.compile(node.node_to_call)
+        arg_fns = [self.compile(arg_node) for arg_node in node.arg_nodes]
+        is_tail = node.is_tail
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def call(context):
+            res = RTResult()
+            args = []
+
+            value_to_call = res.register(callee_fn(context))
+            if res.should_return():
+                return res
+            value_to_call = value_to_call.copy().set_pos(pos_start, pos_end).set_context(context)
+
+            for arg_fn in arg_fns:
+                args.append(res.register(arg_fn(context)))
+                if res.should_return():
+                    return res
+
+            # 尾调用交由所在函数的 CompiledFunction.execute 在循环中执行
+            if is_tail and type(value_to_call) is CompiledFunction:
+                return res.success(TailCall(value_to_call, args))
+
+            return_value = res.register(value_to_call.execute(args))
+            if res.should_return():
+                return res
+            return res.success(return_value)
+        return call
+
+    def compile_ReturnNode(self, node):
+        value_fn = self.compile(
+            node.node_to_return) if node.node_to_return else None
+
+        def return_(context):
+            res = RTResult()
+
+            if value_fn:
+                value = res.register(value_fn(context))
+                if res.should_return():
+                    return res
+            else:
+                value = Number.null
+
+            return res.success_return(value)
+        return return_
+
+    def compile_ContinueNode(self, node):
+        def continue_(context):
+            return RTResult().success_continue()
+        return continue_
+
+    def compile_BreakNode(self, node):
+        def break_(context):
+            return RTResult().success_break()
+        return break_
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from basic.resolver import Resolver
+from basic.run import global_symbol_table
+from util.symbol_table import SymbolTable
+from util.rt_result import RTResult
+from util.values import Number, String, List, CompiledFunction, MemoFunction, TailCall
+from util.error import RTError
+from util.operations import binary_operation, number_operation, unary_operation, binary_error, unary_error
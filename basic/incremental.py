@@ -0,0 +1,182 @@
+#######################################
+# INCREMENTAL
+# 增量分析：编辑器、REPL 等长期持有一份源码，每次编辑之后都要重新分析以刷新诊断信息
+# 编辑之后只重新词法分析受影响的一段源码、只重新语法分析受影响的顶层语句，其余的 token 与顶层语句的结点直接复用
+# 复用的 token 与结点中的位置不必移动：旧的源码记录了编辑，位置在用到时才换算到最新的源码中（见 Source.edited）
+# 每隔若干次编辑把全部 token 与结点中的位置换算到最新的源码中，旧的编辑记录随之释放，换算的链条不会无限增长
+#######################################
+
+from operator import itemgetter
+
+# 每隔多少次编辑把 token 与位置换算到最新的源码中
+REBASE_EDITS = 128
+
+
+# 一份可编辑的源码及其分析结果
+class Document:
+    def __init__(self, fn, text):
+        self.fn = fn
+        self.source = Source(fn, text)
+        self.tokens = None  # 全部 token；词法分析出错时为 None，下一次编辑之后重新分析全部源码
+        # 从开头起分析成功的顶层语句：(结点, 开始处的下标, 结束处的下标, 读到过的最远的下标)
+        # 最远的下标取此前所有语句中的最大值，因而是递增的；读到过的 token 被编辑时，语句需要重新分析
+        self.statements = []
+        # 最近一次分析成功时的最后若干条语句，直至 EOF 都没有改变，可以复用；分析成功时即 statements
+        # 分析出错时仍然保留，撤销引起错误的编辑之后无需重新分析出错处之后的语句
+        self.tail = []
+        self.end = None  # tail 之后 EOF 的下标
+        self.result = None  # 分析的结果，与 Parser.parse 一致
+        self.edits = 0  # 上次换算到最新的源码（rebase）之后的编辑次数
+        self.reparse()
+
+    @property
+    def text(self):
+        return self.source.text
+
+    # 把从 offset 开始、长为 removed 的部分替换为 inserted，返回重新分析的结果
+    def edit(self, offset, removed, inserted):
+        if not 0 <= offset <= offset + removed <= len(self.text):
+            raise Exception(f"Edit ({offset}, {removed}) is out of range")
+
+        tokens = self.tokens
+        if tokens is None:
+            self.source = self.source.edited(offset, removed, inserted)
+            return self.reparse()
+
+        self.edits += 1
+        if self.edits >= REBASE_EDITS:
+            self.rebase()
+
+        # 在编辑之前找出受影响的 token：结束处不在 offset 之前的 token 都可能改变；
+        # 开始处不在被删除的部分之前的 token，之后的源码与编辑之前相同，可能不变
+        first = bisect_by(tokens, offset, lambda tok: tok.relocate().end)
+        boundary = bisect_by(tokens, offset + removed, lambda tok: tok.relocate().start)
+        restart = tokens[first - 1].end if first else 0
+        self.source = self.source.edited(offset, removed, inserted)
+
+        # 从受影响的第一个 token 之前的结束处重新词法分析，直至与 boundary 之后的某个旧 token 开始于同一处：
+        # 此后的源码与编辑之前相同，分析出的 token 也相同，不再继续
+        lexer = RegexLexer(self.fn, self.text, self.source)
+        relexed = []
+        reuse = boundary  # 可以复用的第一个旧 token
+        for tok in lexer.generate_tokens(restart):
+            if lexer.error:
+                return self.lex_failure(lexer.error)
+            while reuse < len(tokens) and tokens[reuse].relocate().start < tok.start:
+                reuse += 1
+            if reuse < len(tokens) and tokens[reuse].start == tok.start:
+                break
+            relexed.append(tok)
+        else:
+            reuse = len(tokens)
+
+        self.tokens = tokens[:first] + relexed + tokens[reuse:]
+        return self.reparse_statements(first, reuse, first + len(relexed) - reuse)
+
+    # 重新分析全部源码
+    def reparse(self):
+        tokens, error = RegexLexer(self.fn, self.text, self.source).make_tokens()
+        if error:
+            return self.lex_failure(error)
+        self.tokens = tokens
+        self.statements = []
+        self.tail = []
+        self.end = None
+        self.edits = 0
+        return self.reparse_statements(0, 0, 0)
+
+    # 把全部 token 以及保留的语句中结点的位置换算到最新的源码中，此后不再引用更早的源码
+    def rebase(self):
+        for tok in self.tokens:
+            tok.relocate()
+        # 分析成功时 tail 即 statements，同一条语句只需换算一次
+        nodes = list({id(statement[0]): statement[0] for statement in self.statements + self.tail}.values())
+        while nodes:
+            node = nodes.pop()
+            node.pos_start.relocate()
+            node.pos_end.relocate()
+            nodes.extend(child_nodes(node))
+        self.edits = 0
+
+    # 重新分析顶层语句：下标 first 之前的 token 没有改变，原来下标 reuse 及之后的 token 没有改变、下标增加了 shift
+    # 没有读到过改变的 token 的语句保留；重新分析的语句之后，若恰好从 tail 中某条在 reuse 之后的语句开始，其后的语句全部复用
+    def reparse_statements(self, first, reuse, shift):
+        old = self.statements
+        kept = bisect_by(old, first, itemgetter(3))
+        statements = old[:kept]
+        if statements:
+            _, _, start, furthest = statements[-1]
+        else:
+            start, furthest = 0, 0
+
+        tail = self.tail
+        tail_start = bisect_by(tail, reuse, itemgetter(1))  # tail 中没有改变的第一条语句
+        resume = []  # 复用的第一条语句
+
+        def reusable(idx):
+            m = bisect_by(tail, idx - shift, itemgetter(1), tail_start)
+            if m < len(tail) and tail[m][1] == idx - shift:
+                resume.append(m)
+                return True
+            return False
+
+        parser = TopLevelParser(self.tokens, start, furthest)
+        res = parser.parse_statements(statements, reusable)
+        if res.error:
+            tail = [(node, start + shift, stop + shift, reach + shift) for node, start, stop, reach in tail[tail_start:]]
+            self.tail = tail
+            self.end = self.end + shift if tail else None
+        else:
+            if resume:
+                # 最远的下标须不小于重新分析的语句读到过的
+                furthest = parser.furthest - shift
+                statements += [(node, start + shift, stop + shift, max(reach, furthest) + shift)
+                               for node, start, stop, reach in tail[resume[0]:]]
+                self.end += shift
+            else:
+                self.end = parser.tok_idx
+            self.tail = statements
+        self.statements = statements
+
+        self.result = ParseResult()
+        if res.error:
+            self.result.failure(res.error.as_error())
+        else:
+            self.result.success(ListNode(
+                [statement[0] for statement in statements],
+                self.tokens[0].pos_start,
+                self.tokens[self.end].pos_end
+            ))
+        return self.result
+
+    def lex_failure(self, error):
+        self.tokens = None
+        self.statements = []
+        self.tail = []
+        self.end = None
+        self.result = ParseResult().failure(error)
+        return self.result
+
+
+# items 中 key 不小于 x 的第一项的下标（items 按 key 升序），与 bisect_left 相同
+# bisect 模块的 key 参数需要 python 3.10；token 的下标在查找时才换算（见 Token.relocate），无法预先取出
+def bisect_by(items, x, key, lo=0):
+    hi = len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key(items[mid]) < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.position import Source
+from util.parser_result import ParseResult
+from util.nodes import ListNode, child_nodes
+from basic.parser import TopLevelParser
+from basic.regex_lexer import RegexLexer
@@ -49,7 +49,7 @@ class Interpreter:
     def visit_VarAccessNode(self, node, context):
         res = RTResult()
         var_name = node.var_name_tok.value
-        value = context.symbol_table.get(var_name)  # 从符号表中取值
+        value = node.cache.get(context.symbol_table)  # 从符号表中取值，全局变量经由结点上的内联缓存读取
 
         # 访问变量失败
         if not value:
@@ -59,8 +59,7 @@ class Interpreter:
                 context
             ))
 
-        # 从另一个角度来说，python 是一门引用性的语言，传递该变量后再被修改，就会影响到“母体”
-        value = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+        # 值创建后不再被修改，可直接共享，无需复制；出错时的位置由 binary_error 等依据结点补上
         return res.success(value)
 
     # 实现解释器的变量赋值的操作
@@ -87,40 +86,24 @@ class Interpreter:
         if res.should_return():
             return res
 
-        # 调用四则运算等所对应的函数来计算结果，比如 Number 类 和 String 类
-        if node.op_tok.type == TT_PLUS:
-            # return Number(self.value + other.value).set_context(self.context), None
-            result, error = left.added_to(right)
-        elif node.op_tok.type == TT_MINUS:
-            result, error = left.subbed_by(right)
-        elif node.op_tok.type == TT_MUL:
-            result, error = left.multed_by(right)
-        elif node.op_tok.type == TT_DIV:
-            result, error = left.dived_by(right)
-        elif node.op_tok.type == TT_POW:
-            result, error = left.powed_by(right)
-        elif node.op_tok.type == TT_EE:
-            result, error = left.get_comparison_eq(right)
-        elif node.op_tok.type == TT_NE:
-            result, error = left.get_comparison_ne(right)
-        elif node.op_tok.type == TT_LT:
-            result, error = left.get_comparison_lt(right)
-        elif node.op_tok.type == TT_GT:
-            result, error = left.get_comparison_gt(right)
-        elif node.op_tok.type == TT_LTE:
-            result, error = left.get_comparison_lte(right)
-        elif node.op_tok.type == TT_GTE:
-            result, error = left.get_comparison_gte(right)
-        elif node.op_tok.matches(TT_KEYWORD, 'AND'):
-            result, error = left.anded_by(right)
-        elif node.op_tok.matches(TT_KEYWORD, 'OR'):
-            result, error = left.ored_by(right)
+        # 查表选定运算方法，而不是逐个比较 op_tok
+        method_name = binary_method_name(node.op_tok)
+
+        # 两个操作数都是 Number 时直接对 python 数值运算，省去运算方法的分派、isinstance 检查与 (result, error) 元组
+        if type(left) is Number and type(right) is Number:
+            try:
+                return res.success(Number(NUMBER_OPERATIONS[method_name](left.value, right.value)))
+            except ZeroDivisionError:
+                pass  # 由 Number.dived_by 报错
+
+        # 其余情况调用运算符所对应的方法来计算结果，比如 String 类、List 类
+        operation = BINARY_OPERATIONS[method_name]
+        result, error = operation(left, right)
 
         if error:
-            return res.failure(error)
+            return res.failure(binary_error(operation, left, right, node.left_node, node.right_node, context))
         else:
-            # set_pos Value 类
-            return res.success(result.set_pos(node.pos_start, node.pos_end))
+            return res.success(result)
 
     # 实现解释器的一元操作部分
     def visit_UnaryOpNode(self, node, context):
@@ -131,27 +114,27 @@ class Interpreter:
 
         # python 中的变量不需要声明，每个变量在使用前都必须赋值，变量赋值以后该变量才会被创建
         # 在 python 中，变量就是变量，它没有类型，我们所说的”类型”是变量所指的内存中对象的类型
-        error = None
+        result, error = number, None
 
         if node.op_tok.type == TT_MINUS:
-            number, error = number.multed_by(Number(-1))
+            result, error = number.multed_by(Number(-1))
         elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
-            number, error = number.notted()
+            result, error = number.notted()
 
         if error:
-            return res.failure(error)
+            return res.failure(unary_error(unary_operation(node.op_tok), number, node.node, context))
         else:
-            return res.success(number.set_pos(node.pos_start, node.pos_end))
+            return res.success(result)
 
     # 实现解释器的 IF 条件表达式部分
     def visit_IfNode(self, node, context):
         res = RTResult()
 
         for condition, expr, should_return_null in node.cases:
+            # 条件本身也是一个表达式，放入 self.visit 函数中，取得具体的结果
+            condition_value = res.register(self.visit(condition, context))
             if res.should_return():
-                # 条件本身也是一个表达式，放入 self.visit 函数中，取得具体的结果
-                condition_value = res.register(self.visit(condition, context))
-            return res
+                return res
 
             # 条件为真，则可以执行 THEN 后面的 expr
             if condition_value.is_true():
@@ -219,7 +202,9 @@ class Interpreter:
             if res.loop_should_break:
                 break
 
-            elements.append(value)
+            # 循环的值不被使用时（见 basic/usage.py）不收集循环体的值
+            if not node.should_return_null:
+                elements.append(value)
 
         return res.success(
             Number.null if node.should_return_null else
@@ -250,7 +235,8 @@ class Interpreter:
             if res.loop_should_break:
                 break
 
-            elements.append(value)
+            if not node.should_return_null:
+                elements.append(value)
 
         return res.success(
             Number.null if node.should_return_null else
@@ -269,6 +255,8 @@ class Interpreter:
         arg_names = [arg_name.value for arg_name in node.arg_name_toks]
         func_value = Function(func_name, body_node, arg_names, node.should_auto_return).set_context(
             context).set_pos(node.pos_start, node.pos_end)  # pos 方便对报错位置的定位
+        if node.memoize:
+            func_value = MemoFunction(func_value)
 
         # 若不是匿名函数，则存入符号表（func_name -- func_value）；func_value 函数可调用对象
         if node.var_name_tok:
@@ -286,7 +274,8 @@ class Interpreter:
         value_to_call = res.register(self.visit(node.node_to_call, context))
         if res.should_return():
             return res
-        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end)
+        # 函数值在调用处的位置与上下文：被调用函数的上下文以调用者的上下文为父级（动态作用域）
+        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
 
         # 形参若为表达式（1+2），对其作求值处理
         for arg_node in node.arg_nodes:
@@ -294,11 +283,13 @@ class Interpreter:
             if res.should_return():
                 return res
 
+        # 尾调用交由所在函数的 Function.execute 在循环中执行，不再嵌套调用（见 basic/tail_calls.py）
+        if node.is_tail and type(value_to_call) is Function:
+            return res.success(TailCall(value_to_call, args))
+
         return_value = res.register(value_to_call.execute(args))
         if res.should_return():
             return res
-        return_value = return_value.copy().set_pos(
-            node.pos_start, node.pos_end).set_context(context)
         return res.success(return_value)
 
     # 实现解释器的 RETURN 关键字部分
@@ -328,6 +319,7 @@ class Interpreter:
 #######################################
 
 from util.rt_result import RTResult
-from util.values import Number, String, List, Function
+from util.values import Number, String, List, Function, MemoFunction, TailCall
 from util.error import RTError
+from util.operations import BINARY_OPERATIONS, NUMBER_OPERATIONS, binary_method_name, unary_operation, binary_error, unary_error
 from data.tokens import *
\ No newline at end of file
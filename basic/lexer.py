@@ -3,21 +3,37 @@
 # 词法分析，解析生成 token
 #######################################
 
+import sys
 
+
+# 读取过程中只记录当前字符的下标 idx，token 也只存放起止下标；行号、列号在报错时才由 Source 计算
 class Lexer:
     def __init__(self, fn, text):
         self.fn = fn
         self.text = text
-        self.pos = Position(-1, 0, -1, fn, text)  # Position 类实例化 -> pos 对象
+        self.source = Source(fn, text)
+        self.idx = -1  # 当前字符的下标
         self.current_char = None
         self.advance()  # 调用该对象的 advance 方法，往前读取
 
     def advance(self):
-        self.pos.advance(self.current_char)
+        self.idx += 1
         # 若 text 未被读完，则将 current_char 定位到当前索引
-        self.current_char = self.text[self.pos.idx] if self.pos.idx < len(
+        self.current_char = self.text[self.idx] if self.idx < len(
             self.text) else None
 
+    # 当前字符的位置，用于报错
+    def position(self):
+        return Position(self.idx, self.source)
+
+    # 从 start 到当前字符之前的 token
+    def token(self, type_, value, start):
+        return Token(type_, value, self.source, start, self.idx)
+
+    # 当前字符这一个字符的 token
+    def char_token(self, type_):
+        return Token(type_, None, self.source, self.idx)
+
     # 解析 token
     def make_tokens(self):
         tokens = []  # 把 token 对象（们）加入列表
@@ -31,7 +47,7 @@ class Lexer:
                 self.skip_comment()
             elif self.current_char in ';\n':
                 # 向列表 tokens 追加一个 TT_NEWLINE 对象
-                tokens.append(Token(TT_NEWLINE, pos_start=self.pos))
+                tokens.append(self.char_token(TT_NEWLINE))
                 self.advance()  # 此时，不要忘记应当继续往前读取
             elif self.current_char in DIGITS:  # 数字
                 tokens.append(self.make_number())
@@ -40,30 +56,30 @@ class Lexer:
             elif self.current_char == '"':
                 tokens.append(self.make_string())
             elif self.current_char == '+':
-                tokens.append(Token(TT_PLUS, pos_start=self.pos))
+                tokens.append(self.char_token(TT_PLUS))
                 self.advance()
             elif self.current_char == '-':  # ->
                 tokens.append(self.make_minus_or_arrow())
             elif self.current_char == '*':
-                tokens.append(Token(TT_MUL, pos_start=self.pos))
+                tokens.append(self.char_token(TT_MUL))
                 self.advance()
             elif self.current_char == '/':
-                tokens.append(Token(TT_DIV, pos_start=self.pos))
+                tokens.append(self.char_token(TT_DIV))
                 self.advance()
             elif self.current_char == '^':
-                tokens.append(Token(TT_POW, pos_start=self.pos))
+                tokens.append(self.char_token(TT_POW))
                 self.advance()
             elif self.current_char == '(':
-                tokens.append(Token(TT_LPAREN, pos_start=self.pos))
+                tokens.append(self.char_token(TT_LPAREN))
                 self.advance()
             elif self.current_char == ')':
-                tokens.append(Token(TT_RPAREN, pos_start=self.pos))
+                tokens.append(self.char_token(TT_RPAREN))
                 self.advance()
             elif self.current_char == '[':
-                tokens.append(Token(TT_LSQUARE, pos_start=self.pos))
+                tokens.append(self.char_token(TT_LSQUARE))
                 self.advance()
             elif self.current_char == ']':
-                tokens.append(Token(TT_RSQUARE, pos_start=self.pos))
+                tokens.append(self.char_token(TT_RSQUARE))
                 self.advance()
             elif self.current_char == '!':
                 token, error = self.make_not_equals()
@@ -77,24 +93,23 @@ class Lexer:
             elif self.current_char == '>':
                 tokens.append(self.make_greater_than())
             elif self.current_char == ',':
-                tokens.append(Token(TT_COMMA, pos_start=self.pos))
+                tokens.append(self.char_token(TT_COMMA))
                 self.advance()
             else:
                 # 若匹配失败，则报告非法字符错误
-                pos_start = self.pos.copy()
+                pos_start = self.position()
                 char = self.current_char
                 self.advance()
-                return [], IllegalCharError(pos_start, self.pos, "'" + char + "'")
+                return [], IllegalCharError(pos_start, self.position(), "'" + char + "'")
 
         # 表示匹配结束
-        tokens.append(Token(TT_EOF, pos_start=self.pos))
+        tokens.append(self.char_token(TT_EOF))
         return tokens, None
 
     # 解析数字
     def make_number(self):
-        num_str = ''  # 跟踪数字
         dot_count = 0  # 跟踪小数点
-        pos_start = self.pos.copy()
+        start = self.idx
 
         while self.current_char != None and self.current_char in DIGITS + '.':
             # 域：自然数 + 小数点
@@ -103,19 +118,19 @@ class Lexer:
                 if dot_count == 1:
                     break
                 dot_count += 1
-            num_str += self.current_char
             self.advance()
+        num_str = self.text[start:self.idx]  # 数字直接从源码中截取，不逐个字符拼接
 
         # 整数类型 ｜ 浮点数类型
         if dot_count == 0:
-            return Token(TT_INT, int(num_str), pos_start, self.pos)
+            return self.token(TT_INT, int(num_str), start)
         else:
-            return Token(TT_FLOAT, float(num_str), pos_start, self.pos)
+            return self.token(TT_FLOAT, float(num_str), start)
 
     # 解析字符串
     def make_string(self):
         string = ''
-        pos_start = self.pos.copy()
+        start = self.idx
         escape_character = False  # 判断是否为转义字符
         self.advance()
 
@@ -142,82 +157,81 @@ class Lexer:
             escape_character = False  # 不要忘记把它返回为 False
 
         self.advance()
-        return Token(TT_STRING, string, pos_start, self.pos)  # string 就是我们取得的值
+        return self.token(TT_STRING, string, start)  # string 就是我们取得的值
 
     # 解析变量
     def make_identifier(self):
-        id_str = ''
-        pos_start = self.pos.copy()
+        start = self.idx
 
         # VAR varible = 1024;id_str = 'varible' （变量就是一坨字符）
         while self.current_char != None and self.current_char in LETTERS_DIGITS + '_':
-            id_str += self.current_char
             self.advance()
+        id_str = sys.intern(self.text[start:self.idx])  # 同名标识符共享同一个字符串
 
         # 不是关键字就是变量
         # if id_str in KEYWORDS: { tok_type = TT_KEYWORD } else: { tok_type = TT_IDENTIFIER }
         tok_type = TT_KEYWORD if id_str in KEYWORDS else TT_IDENTIFIER
-        return Token(tok_type, id_str, pos_start, self.pos)
+        return self.token(tok_type, id_str, start)
 
     # 解析 ->
     def make_minus_or_arrow(self):
         tok_type = TT_MINUS
-        pos_start = self.pos.copy()
+        start = self.idx
         self.advance()
 
         if self.current_char == '>':
             self.advance()
             tok_type = TT_ARROW
 
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+        return self.token(tok_type, None, start)
 
     # 解析 !=
     def make_not_equals(self):
-        pos_start = self.pos.copy()
+        start = self.idx
         self.advance()
 
         if self.current_char == '=':
             self.advance()
-            return Token(TT_NE, pos_start=pos_start, pos_end=self.pos), None
+            return self.token(TT_NE, None, start), None
 
         self.advance()
-        return None, ExpectedCharError(pos_start, self.pos, "'=' (after '!')")
+        return None, ExpectedCharError(Position(start, self.source), self.position(), "'=' (after '!')")
 
     # 解析 = 和 ==
     def make_equals(self):
         tok_type = TT_EQ
-        pos_start = self.pos.copy()
+        start = self.idx
         self.advance()
 
         if self.current_char == '=':
             self.advance()
             tok_type = TT_EE
 
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+        return self.token(tok_type, None, start)
 
     # 解析 < 和 <=
     def make_less_than(self):
         tok_type = TT_LT
-        pos_start = self.pos.copy()
+        start = self.idx
         self.advance()
 
         if self.current_char == '=':
             self.advance()
             tok_type = TT_LTE
 
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+        return self.token(tok_type, None, start)
 
     # 解析 > 和 >=
     def make_greater_than(self):
         tok_type = TT_GT
-        pos_start = self.pos.copy()
+        start = self.idx
         self.advance()
 
         if self.current_char == '=':
             self.advance()
             tok_type = TT_GTE
 
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+        return self.token(tok_type, None, start)
 
     # 跳过注释部分
     def skip_comment(self):
@@ -234,6 +248,6 @@ class Lexer:
 #######################################
 
 from data.contants import *
-from util.position import Position
+from util.position import Source, Position
 from util.error import IllegalCharError, ExpectedCharError
 from data.tokens import *
\ No newline at end of file
@@ -0,0 +1,186 @@
+#######################################
+# OPTIMIZER
+# 常量折叠：在语法分析之后、执行之前，把只由字面量组成的二元、一元操作预先计算为字面量结点
+# 例如 2 ^ 10 * MATH_PI、"-" * 80，在循环中不必每一轮都重新计算、创建新的 Number / String
+#######################################
+
+MAX_FOLDED_STRING = 1024  # 折叠结果的大小上限，避免把巨大的字符串、整数写入 AST
+MAX_FOLDED_INT_BITS = 1024
+
+
+class ConstantFolder:
+    def __init__(self, constants=None):
+        # 可被折叠的内建常量：变量名 -> python 数值，例如 {'MATH_PI': 3.14...}
+        self.constants = constants or {}
+
+    # 折叠整个程序；返回折叠后的根结点
+    def fold_program(self, node):
+        # 程序中任何位置（包括函数形参）绑定过的名称，都可能在动态作用域下遮蔽内建常量，不予折叠
+        # RUN 执行的脚本可以在全局作用域中重新赋值，程序中出现 RUN 时不折叠内建常量
+        # 这些检查只涵盖本程序，因此内建常量只在函数体以外替换（见 fold_FuncDefNode）
+        bound, accessed = bound_and_accessed_names(node)
+        if 'RUN' in accessed:
+            self.constants = {}
+        else:
+            self.constants = {name: value for name, value in self.constants.items()
+                              if name not in bound}
+
+        # 嵌套过深的 AST 不再折叠；fold 只在子结点折叠完成后才替换子结点，已折叠的部分仍然有效
+        try:
+            return self.fold(node)
+        except RecursionError:
+            return node
+
+    def fold(self, node):
+        method_name = f'fold_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_fold_method)
+        return method(node)
+
+    # 没有子结点的结点原样返回
+    def no_fold_method(self, node):
+        return node
+
+    ###################################
+
+    def fold_ListNode(self, node):
+        node.element_nodes = [self.fold(element_node)
+                              for element_node in node.element_nodes]
+        return node
+
+    def fold_VarAccessNode(self, node):
+        var_name = node.var_name_tok.value
+        if var_name in self.constants:
+            return literal_node(Number(self.constants[var_name]), node) or node
+        return node
+
+    def fold_VarAssignNode(self, node):
+        node.value_node = self.fold(node.value_node)
+        return node
+
+    def fold_BinOpNode(self, node):
+        node.left_node = self.fold(node.left_node)
+        node.right_node = self.fold(node.right_node)
+
+        left = literal_value(node.left_node)
+        right = literal_value(node.right_node)
+        if left is None or right is None:
+            return node
+        return self.fold_operation(binary_operation(node.op_tok), (left, right), node)
+
+    def fold_UnaryOpNode(self, node):
+        node.node = self.fold(node.node)
+
+        number = literal_value(node.node)
+        if number is None:
+            return node
+        return self.fold_operation(unary_operation(node.op_tok), (number,), node)
+
+    # 在编译期执行运算；运算出错（例如除以 0、非法操作）时保留原结点，错误仍在运行期按原样报出
+    def fold_operation(self, operation, operands, node):
+        try:
+            result, error = operation(*operands)
+        except Exception:
+            return node
+        if error:
+            return node
+        return literal_node(result, node) or node
+
+    def fold_IfNode(self, node):
+        node.cases = [(self.fold(condition), self.fold(expr), should_return_null)
+                      for condition, expr, should_return_null in node.cases]
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            node.else_case = (self.fold(expr), should_return_null)
+        return node
+
+    def fold_ForNode(self, node):
+        node.start_value_node = self.fold(node.start_value_node)
+        node.end_value_node = self.fold(node.end_value_node)
+        if node.step_value_node:
+            node.step_value_node = self.fold(node.step_value_node)
+        node.body_node = self.fold(node.body_node)
+        return node
+
+    def fold_WhileNode(self, node):
+        node.condition_node = self.fold(node.condition_node)
+        node.body_node = self.fold(node.body_node)
+        return node
+
+    # 函数在程序结束后仍可被调用，届时内建常量可能已被之后的程序重新赋值，函数体中不替换内建常量，只折叠字面量的运算
+    def fold_FuncDefNode(self, node):
+        constants, self.constants = self.constants, {}
+        try:
+            node.body_node = self.fold(node.body_node)
+        finally:
+            self.constants = constants
+        return node
+
+    def fold_CallNode(self, node):
+        node.node_to_call = self.fold(node.node_to_call)
+        node.arg_nodes = [self.fold(arg_node) for arg_node in node.arg_nodes]
+        return node
+
+    def fold_ReturnNode(self, node):
+        if node.node_to_return:
+            node.node_to_return = self.fold(node.node_to_return)
+        return node
+
+
+# 字面量结点对应的值，不是字面量则返回 None
+def literal_value(node):
+    if isinstance(node, NumberNode):
+        return Number(node.tok.value)
+    elif isinstance(node, StringNode):
+        return String(node.tok.value)
+    return None
+
+
+# 以 value 创建位置与 node 相同的字面量结点；value 不宜写入 AST 时返回 None
+def literal_node(value, node):
+    if isinstance(value, String):
+        if len(value.value) > MAX_FOLDED_STRING:
+            return None
+        return StringNode(Token.at(TT_STRING, value.value, node.pos_start, node.pos_end))
+
+    if not isinstance(value, Number):
+        return None
+    if isinstance(value.value, int):
+        if value.value.bit_length() > MAX_FOLDED_INT_BITS:
+            return None
+        return NumberNode(Token.at(TT_INT, value.value, node.pos_start, node.pos_end))
+    if isinstance(value.value, float) and math.isfinite(value.value):
+        return NumberNode(Token.at(TT_FLOAT, value.value, node.pos_start, node.pos_end))
+    return None
+
+
+# 收集程序中被绑定的名称（VAR、FOR 循环变量、具名 FUN、函数形参）以及被访问的名称
+def bound_and_accessed_names(node):
+    bound = set()
+    accessed = set()
+    nodes = [node]
+
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (VarAssignNode, ForNode)):
+            bound.add(node.var_name_tok.value)
+        elif isinstance(node, FuncDefNode):
+            if node.var_name_tok:
+                bound.add(node.var_name_tok.value)
+            bound.update(arg_name.value for arg_name in node.arg_name_toks)
+        elif isinstance(node, VarAccessNode):
+            accessed.add(node.var_name_tok.value)
+        nodes.extend(child_nodes(node))
+
+    return bound, accessed
+
+
+#######################################
+# IMPORTS
+#######################################
+
+import math
+
+from data.tokens import Token, TT_INT, TT_FLOAT, TT_STRING
+from util.nodes import *
+from util.operations import binary_operation, unary_operation
+from util.values import Number, String
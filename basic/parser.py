@@ -6,8 +6,15 @@
 
 class Parser:
     # 初始化新创建对象的状态，在对象被创建以后便立即调用
-    def __init__(self, tokens):
+    # packrat 为真时，回退之后缓存 statement、expr_node 在各个位置的分析结果（见 memoized）
+    def __init__(self, tokens, packrat=True):
         self.tokens = tokens
+        self.attempts = []  # 尚未结束的、失败时需要回退的尝试开始处的下标，由外向内
+        self.packrat = packrat
+        self.memo = None  # (规则, 开始处的下标) -> (结果, self.expr_error, 结束处的下标)；只在回退之后才开始缓存
+        self.loop_failures = {}  # (最低优先级, 运算符的下标) -> (错误, 结束处的下标)，见 record_loop_failure
+        self.memo_end = 0  # 已经读取过的最靠后的位置，回退之后再次读到此处之前缓存的结果都可能用到
+        self.expr_error = None  # 表达式分析失败时的错误（见 expr_node）
         # 设计用因：使得每次初始化时自动往前读取 token 列表
         self.tok_idx = -1  # 索引从 -1 开始
         self.advance()  # 随后立即调用 advance 函数
@@ -22,19 +29,70 @@ class Parser:
         self.update_current_tok()
         return self.current_tok
 
+    # 开始一次失败时需要回退的尝试（try_register）：失败时最多回退到当前位置
+    def begin_attempt(self):
+        self.attempts.append(self.tok_idx)
+
+    def end_attempt(self):
+        self.attempts.pop()
+
+    # 尝试失败后回退 amount 个 token。这些 token 将被再次分析，自此开始缓存分析结果（packrat），直至读过失败处
+    # 语法正确的程序中，尝试只会在第一个 token 处失败，不必回退，也就不必缓存
+    def backtrack(self, amount):
+        if amount and self.packrat:
+            if self.memo is None:
+                self.memo = {}
+            self.memo_end = max(self.memo_end, self.tok_idx)
+        self.reverse(amount)
+
+    # packrat：以 (规则, 开始处的下标) 缓存 parse 的结果（ParseResult，或 expr_node 的结点与 self.expr_error）
+    # 尝试失败、回退之后，其中的 token 可能被其他规则再次分析；再次在同一处分析同一规则时，直接取出结果并前进到结束处，
+    # 否则嵌套的 RETURN 尝试会使分析的耗时随嵌套层数指数增长
+    # 分析只取决于 token，结果可以共享：调用者只读取结果，而失败的尝试中构建的结点不会出现在最终的 AST 中
+    def memoized(self, rule, parse):
+        if self.memo is None:
+            return parse()
+        key = (rule, self.tok_idx)
+        entry = self.memo.get(key)
+        if entry:
+            result, self.expr_error, self.tok_idx = entry
+            self.update_current_tok()
+            return result
+        result = parse()
+        # 分析过程中可能已经停止缓存（见 commit_statement）
+        if self.memo is not None:
+            self.memo[key] = (result, self.expr_error, self.tok_idx)
+            self.memo_end = max(self.memo_end, self.tok_idx)
+        return result
+
+    # 一条语句分析成功，且不在任何尝试之中：此前的 token 不会再被回退到；已经读过回退之前读取过的所有 token 时，
+    # 缓存的结果也不会再用到，停止缓存
+    def commit_statement(self):
+        if self.memo is not None and not self.attempts and self.tok_idx >= self.memo_end:
+            self.memo = None
+            self.loop_failures.clear()
+
     # 更新当前索引值
     def update_current_tok(self):
         if self.tok_idx >= 0 and self.tok_idx < len(self.tokens):  # tokens 列表
             self.current_tok = self.tokens[self.tok_idx]
 
     def parse(self):
-        res = self.statements()  # 根据已经写好的 BNF 文法可知，statements 函数位于起始处；自此便开始了递归向下的处理
-        # 如果存在 error 并且没有读到 EOF，则报告错误
-        if not res.error and self.current_tok.type != TT_EOF:
-            return res.failure(InvalidSyntaxError(
+        try:
+            res = self.statements()  # 根据已经写好的 BNF 文法可知，statements 函数位于起始处；自此便开始了递归向下的处理
+        except RecursionError:
+            # 表达式的嵌套不占用 python 调用栈（见 execute），但嵌套过深的列表、IF、FOR、WHILE、FUN 仍会耗尽 python 调用栈，
+            # 报告为语法错误，而不是使整个进程崩溃
+            return ParseResult().failure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
-                "Token cannot appear after previous tokens"
+                "Expression is nested too deeply"
             ))
+        # 如果存在 error 并且没有读到 EOF，则报告错误
+        if not res.error and self.current_tok.type != TT_EOF:
+            res.failure(self.syntax_failure("Token cannot appear after previous tokens"))
+        # 失败确实需要报告，此时才构建错误
+        if res.error:
+            res.error = res.error.as_error()
         return res
 
     ###################################
@@ -53,6 +111,7 @@ class Parser:
         if res.error:
             return res
         statements.append(statement)
+        self.commit_statement()
 
         more_statements = True
 
@@ -67,12 +126,15 @@ class Parser:
 
             if not more_statements:
                 break
+            self.begin_attempt()
             statement = res.try_register(self.statement())
+            self.end_attempt()
             if not statement:
-                self.reverse(res.to_reverse_count)
+                self.backtrack(res.to_reverse_count)
                 more_statements = False
                 continue
             statements.append(statement)
+            self.commit_statement()
 
         return res.success(ListNode(
             statements,
@@ -85,6 +147,9 @@ class Parser:
     #	         ->  KEYWORD:BREAK
     #		     ->  expr
     def statement(self):
+        return self.memoized('statement', self.parse_statement)
+
+    def parse_statement(self):
         res = ParseResult()
         pos_start = self.current_tok.pos_start.copy()
 
@@ -93,9 +158,11 @@ class Parser:
             res.register_advancement()
             self.advance()
 
+            self.begin_attempt()
             expr = res.try_register(self.expr())
+            self.end_attempt()
             if not expr:
-                self.reverse(res.to_reverse_count)
+                self.backtrack(res.to_reverse_count)
             return res.success(ReturnNode(expr, pos_start, self.current_tok.pos_start.copy()))
 
         # 匹配 RETURN 关键字
@@ -112,157 +179,259 @@ class Parser:
 
         expr = res.register(self.expr())
         if res.error:
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
+            return res.failure(self.syntax_failure(
                 "Expected 'RETURN', 'CONTINUE', 'BREAK', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'"
             ))
         return res.success(expr)
 
     # expr  ->  KEYWORD:VAR IDENTIFIER EQ expr
     #       ->  comp-expr ((KEYWORD:AND|KEYWORD:OR) comp-expr)*
+    # 表达式由 expr_node 以优先级分析（Pratt）构建，此处只把结果包装为 ParseResult
     def expr(self):
         res = ParseResult()
+        start = self.tok_idx
+        node = self.execute(self.expr_node())
+        res.register_advancements(self.tok_idx - start)
+        if node is None:
+            return res.failure(self.expr_error)
+        return res.success(node)
 
-        if self.current_tok.matches(TT_KEYWORD, 'VAR'):
-            res.register_advancement()
-            self.advance()
-
-            if self.current_tok.type != TT_IDENTIFIER:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    "Expected identifier"  # 因为此时按照文法来讲，应为变量名
-                ))
+    # 以下 expr_node、binary_expr、unary_expr、call_expr、atom_node 不为每一层分配 ParseResult：
+    # 分析成功时返回结点，失败时返回 None，并把错误记录在 self.expr_error 中
+    # 报告的错误与逐层递归向下的分析一致：某一层的第一个 token 即无法分析时，报告的是从该处开始的最外层的错误信息
+    # 除 atom_node 以外都是生成器，由 execute 驱动（与 StackInterpreter 相同）：分析可以任意嵌套的子表达式（括号、NOT、
+    # 一元运算与幂运算的操作数、实参、VAR 的值）时 yield 子表达式的生成器，execute 中的循环分析完毕后再把结点 send 回去，
+    # 尚未完成的分析存放于堆上的生成器栈中；层数有限的部分（例如二元运算右侧更高优先级的运算）以 yield from 直接调用
+    # 每一层嵌套都经过一次 execute，嵌套再深的表达式也不占用 python 调用栈
+    # 不含嵌套的 atom 由 atom_node 直接分析，不创建生成器；列表、IF、FOR、WHILE、FUN 仍以递归向下分析
+
+    # 驱动生成器 generator 直至其返回，返回其返回值
+    def execute(self, generator):
+        try:
+            child = generator.send(None)
+        except StopIteration as stop:
+            # 没有需要由此处分析的子表达式
+            return stop.value
+
+        stack = [generator, child]  # 尚未完成的分析，栈顶为当前正在分析的子表达式
+        node = None  # 送回栈顶生成器的结点
 
-            var_name = self.current_tok  # 变量名
-            res.register_advancement()
-            self.advance()
+        while True:
+            try:
+                child = stack[-1].send(node)
+            except StopIteration as stop:
+                # 栈顶的子表达式分析完毕，把结点送回上一个生成器
+                stack.pop()
+                if not stack:
+                    return stop.value
+                node = stop.value
+                continue
+            stack.append(child)
+            node = None
 
-            if self.current_tok.type != TT_EQ:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    "Expected '='"
-                ))
+    # expr  ->  KEYWORD:VAR IDENTIFIER EQ expr
+    #       ->  comp-expr ((KEYWORD:AND|KEYWORD:OR) comp-expr)*
+    def expr_node(self):
+        if self.memo is None:
+            return self.parse_expr_node()
+        return self.memoized_expr()
+
+    # 与 memoized 相同，以 ('expr', 开始处的下标) 缓存 parse_expr_node 的结果
+    def memoized_expr(self):
+        key = ('expr', self.tok_idx)
+        entry = self.memo.get(key)
+        if entry:
+            node, self.expr_error, self.tok_idx = entry
+            self.update_current_tok()
+            return node
+        node = yield self.parse_expr_node()
+        # 分析过程中可能已经停止缓存（见 commit_statement）
+        if self.memo is not None:
+            self.memo[key] = (node, self.expr_error, self.tok_idx)
+            self.memo_end = max(self.memo_end, self.tok_idx)
+        return node
+
+    # 返回分析表达式的生成器
+    def parse_expr_node(self):
+        if self.current_tok.matches(TT_KEYWORD, 'VAR'):
+            return self.var_assign_expr()
+        return self.binary_expr(PREC_LOGIC)
 
-            res.register_advancement()
-            self.advance()
-            expr = res.register(self.expr())
-            if res.error:
-                return res
-            # 该句文法结束
-            return res.success(VarAssignNode(var_name, expr))
+    # expr  ->  KEYWORD:VAR IDENTIFIER EQ expr
+    def var_assign_expr(self):
+        self.advance()
 
-        # 依照文法往下走
-        node = res.register(self.bin_op(
-            self.comp_expr, ((TT_KEYWORD, 'AND'), (TT_KEYWORD, 'OR'))))
+        if self.current_tok.type != TT_IDENTIFIER:
+            return self.expr_failure("Expected identifier")  # 因为此时按照文法来讲，应为变量名
 
-        if res.error:
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                "Expected 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'"
-            ))
+        var_name = self.current_tok  # 变量名
+        self.advance()
 
-        return res.success(node)
+        if self.current_tok.type != TT_EQ:
+            return self.expr_failure("Expected '='")
 
-    # comp-expr  ->  NOT comp-expr
-    #            ->  arith-expr ((EE|LT|GT|LTE|GTE) arith-expr)*
-    def comp_expr(self):
-        res = ParseResult()
+        self.advance()
+        expr = yield self.expr_node()
+        if expr is None:
+            return None
+        # 该句文法结束
+        return VarAssignNode(var_name, expr)
+
+    # 优先级不低于 min_prec 的二元运算构成的表达式：
+    #   min_prec 为 PREC_LOGIC 时即 comp-expr ((KEYWORD:AND|KEYWORD:OR) comp-expr)*
+    #   min_prec 为 PREC_COMP 时即 comp-expr  ->  NOT comp-expr
+    #                                         ->  arith-expr ((EE|LT|GT|LTE|GTE) arith-expr)*
+    #   min_prec 为 PREC_ARITH、PREC_TERM 时即 arith-expr、term
+    # 运算符都是左结合的：右侧的操作数只包含优先级更高的运算
+    # atom 为调用者已经分析的、第一个操作数开头的 atom
+    def binary_expr(self, min_prec, atom=None):
+        start = self.tok_idx
+        tok = self.current_tok
 
-        if self.current_tok.matches(TT_KEYWORD, 'NOT'):
+        if atom is None and tok.type in PLAIN_ATOM_TYPES:
+            atom = self.atom_node()
+
+        if atom is not None:
+            # 不含嵌套的 atom 直接分析，不必创建 unary_expr 的生成器
+            left = atom
+            if self.current_tok.type in (TT_LPAREN, TT_POW):
+                left = yield from self.power_expr(left)
+                if left is None:
+                    return None
+        elif min_prec <= PREC_COMP and tok.matches(TT_KEYWORD, 'NOT'):
+            self.advance()
+            node = yield self.binary_expr(PREC_COMP)
+            if node is None:
+                return None
+            left = UnaryOpNode(tok, node)
+        else:
+            left = yield from self.unary_expr()
+            if left is None:
+                # 第一个 token 即无法分析，报告 expr、comp-expr 的错误信息
+                if self.tok_idx == start and min_prec == PREC_LOGIC:
+                    return self.expr_failure(
+                        "Expected 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'")
+                if self.tok_idx == start and min_prec == PREC_COMP:
+                    return self.expr_failure(
+                        "Expected int, float, identifier, '+', '-', '(', '[', 'IF', 'FOR', 'WHILE', 'FUN' or 'NOT'")
+                return None
+
+        op_indices = None  # 本次循环中各个运算符的下标（packrat 时）
+        while True:
             op_tok = self.current_tok
-            res.register_advancement()
+            prec = BINARY_PRECEDENCE.get((op_tok.type, op_tok.value))
+            if prec is None or prec < min_prec:
+                return left
+            if self.memo is not None:
+                if op_indices is None:
+                    op_indices = []
+                op_indices.append(self.tok_idx)
+                # 从此处开始的循环此前已经失败过
+                if self.loop_failures and (min_prec, self.tok_idx) in self.loop_failures:
+                    self.expr_error, self.tok_idx = self.loop_failures[(min_prec, self.tok_idx)]
+                    self.update_current_tok()
+                    return self.record_loop_failure(min_prec, op_indices)
             self.advance()
+            # 右侧的操作数为不含嵌套的 atom、其后也没有优先级更高的运算时，直接得到操作数
+            if self.current_tok.type in PLAIN_ATOM_TYPES:
+                right = self.atom_node()
+                next_tok = self.current_tok
+                if (next_tok.type in (TT_LPAREN, TT_POW)
+                        or BINARY_PRECEDENCE.get((next_tok.type, next_tok.value), 0) > prec):
+                    right = yield from self.binary_expr(prec + 1, right)
+            else:
+                right = yield from self.binary_expr(prec + 1)
+            if right is None:
+                return self.record_loop_failure(min_prec, op_indices)
+            left = BinOpNode(left, op_tok, right)
 
-            node = res.register(self.comp_expr())
-            if res.error:
-                return res
-            return res.success(UnaryOpNode(op_tok, node))
-
-        node = res.register(self.bin_op(
-            self.arith_expr, (TT_EE, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE)))
-
-        if res.error:
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                "Expected int, float, identifier, '+', '-', '(', '[', 'IF', 'FOR', 'WHILE', 'FUN' or 'NOT'"
-            ))
-
-        return res.success(node)
-
-    # arith-expr  ->  term ((PLUS|MINUS) term)*
-    def arith_expr(self):
-        return self.bin_op(self.term, (TT_PLUS, TT_MINUS))
-
-    # term  ->  factor ((MUL|DIV) factor)*
-    def term(self):
-        return self.bin_op(self.factor, (TT_MUL, TT_DIV))
-
-    # 根据文法（grammar.txt）实现函数之间的递归调用
     # factor ->  (PLUS|MINUS) factor -1 == --1 == ---1
     #	     ->  power
-    def factor(self):
-        res = ParseResult()  # ParseResult 返回的是对象
+    def unary_expr(self):
         tok = self.current_tok
 
-        # factor -> (PLUS|MINUS) factor -1 == --1 == ---1
         if tok.type in (TT_PLUS, TT_MINUS):
-            res.register_advancement()  # 便于进程在出错时的回滚操作
             self.advance()
-            factor = res.register(self.factor())  # 调用自身
-            # 因为 factor() 为非终止符，所以会继续向前匹配，在这个过程中可能存在 error
-            if res.error:
-                return res
+            factor = self.factor()
+            if type(factor) is GeneratorType:
+                factor = yield factor
+            if factor is None:
+                return None
             # 一元操作
-            return res.success(UnaryOpNode(tok, factor))
+            return UnaryOpNode(tok, factor)
 
-        # 下一句文法，调用 self.power 函数
-        return self.power()
+        if tok.type == TT_LPAREN:
+            left = yield from self.paren_expr()
+        else:
+            left = self.atom_node()
+        if left is None:
+            return None
+        if self.current_tok.type in (TT_LPAREN, TT_POW):
+            return (yield from self.power_expr(left))
+        return left
+
+    # power  ->  call (POW factor)*
+    # 由 atom 之后读到 LPAREN 或 POW 时调用，left 为已经分析的 atom
+    def power_expr(self, left):
+        if self.current_tok.type == TT_LPAREN:
+            left = yield from self.call_expr(left)
+            if left is None:
+                return None
 
-    # power  ->  call (POWf actor)*
-    def power(self):
-        return self.bin_op(self.call, (TT_POW,), self.factor)
+        # 右侧的 factor 同样会读取其后所有的 POW，幂运算因此是右结合的
+        while self.current_tok.type == TT_POW:
+            op_tok = self.current_tok
+            self.advance()
+            right = self.factor()
+            if type(right) is GeneratorType:
+                right = yield right
+            if right is None:
+                return None
+            left = BinOpNode(left, op_tok, right)
+
+        return left
+
+    # 一元运算、幂运算右侧的 factor：不含嵌套的 atom 之后没有调用、幂运算时直接返回结点，
+    # 否则返回分析 factor 的生成器，由调用者 yield 给 execute
+    def factor(self):
+        if self.current_tok.type not in PLAIN_ATOM_TYPES:
+            return self.unary_expr()
+        atom = self.atom_node()
+        if self.current_tok.type in (TT_LPAREN, TT_POW):
+            return self.power_expr(atom)
+        return atom
 
     # call  ->  atom (LPAREN (expr (COMMA expr)*)? RPAREN)?
-    def call(self):
-        res = ParseResult()
-        atom = res.register(self.atom())
-        if res.error:
-            return res
+    # 由 power_expr 在 atom 之后读到 LPAREN 时调用，分析实参列表
+    def call_expr(self, atom):
+        self.advance()
+        arg_nodes = []
 
-        if self.current_tok.type == TT_LPAREN:
-            res.register_advancement()
+        if self.current_tok.type == TT_RPAREN:
             self.advance()
-            arg_nodes = []
+        else:
+            start = self.tok_idx
+            arg_node = yield self.expr_node()
+            if arg_node is None:
+                if self.tok_idx == start:
+                    return self.expr_failure(
+                        "Expected ')', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'")
+                return None
+            arg_nodes.append(arg_node)
 
-            if self.current_tok.type == TT_RPAREN:
-                res.register_advancement()
+            while self.current_tok.type == TT_COMMA:
                 self.advance()
-            else:
-                arg_nodes.append(res.register(self.expr()))
-                if res.error:
-                    return res.failure(InvalidSyntaxError(
-                        self.current_tok.pos_start, self.current_tok.pos_end,
-                        "Expected ')', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'"
-                    ))
-
-                while self.current_tok.type == TT_COMMA:
-                    res.register_advancement()
-                    self.advance()
 
-                    arg_nodes.append(res.register(self.expr()))
-                    if res.error:
-                        return res
+                arg_node = yield self.expr_node()
+                if arg_node is None:
+                    return None
+                arg_nodes.append(arg_node)
 
-                if self.current_tok.type != TT_RPAREN:
-                    return res.failure(InvalidSyntaxError(
-                        self.current_tok.pos_start, self.current_tok.pos_end,
-                        f"Expected ',' or ')'"
-                    ))
+            if self.current_tok.type != TT_RPAREN:
+                return self.expr_failure(f"Expected ',' or ')'")
 
-                res.register_advancement()
-                self.advance()
-            return res.success(CallNode(atom, arg_nodes))
-        return res.success(atom)
+            self.advance()
+        return CallNode(atom, arg_nodes)
 
     # atom  ->  INT|FLOAT|STRING|IDENTIFIER
     #       ->  LPAREN expr RPAREN
@@ -271,75 +440,78 @@ class Parser:
     #       ->  for-expr
     #       ->  while-expr
     #       ->  func-def
-    def atom(self):
-        res = ParseResult()
+    # LPAREN expr RPAREN 含有嵌套的子表达式，由 paren_expr 分析
+    def atom_node(self):
         tok = self.current_tok
 
         if tok.type in (TT_INT, TT_FLOAT):
-            res.register_advancement()
             self.advance()
-            return res.success(NumberNode(tok))
+            return NumberNode(tok)
 
         elif tok.type == TT_STRING:
-            res.register_advancement()
             self.advance()
-            return res.success(StringNode(tok))
+            return StringNode(tok)
 
         elif tok.type == TT_IDENTIFIER:
-            res.register_advancement()
-            self.advance()
-            return res.success(VarAccessNode(tok))
-
-        elif tok.type == TT_LPAREN:
-            res.register_advancement()
             self.advance()
-            expr = res.register(self.expr())
-            if res.error:
-                return res
-            if self.current_tok.type == TT_RPAREN:
-                res.register_advancement()
-                self.advance()
-                return res.success(expr)
-            else:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    "Expected ')'"
-                ))
+            return VarAccessNode(tok)
 
         elif tok.type == TT_LSQUARE:
-            list_expr = res.register(self.list_expr())
-            if res.error:
-                return res
-            return res.success(list_expr)
+            return self.node_of(self.list_expr())
 
         elif tok.matches(TT_KEYWORD, 'IF'):
-            if_expr = res.register(self.if_expr())
-            if res.error:
-                return res
-            return res.success(if_expr)
+            return self.node_of(self.if_expr())
 
         elif tok.matches(TT_KEYWORD, 'FOR'):
-            for_expr = res.register(self.for_expr())
-            if res.error:
-                return res
-            return res.success(for_expr)
+            return self.node_of(self.for_expr())
 
         elif tok.matches(TT_KEYWORD, 'WHILE'):
-            while_expr = res.register(self.while_expr())
-            if res.error:
-                return res
-            return res.success(while_expr)
+            return self.node_of(self.while_expr())
 
         elif tok.matches(TT_KEYWORD, 'FUN'):
-            func_def = res.register(self.func_def())
-            if res.error:
-                return res
-            return res.success(func_def)
+            return self.node_of(self.func_def())
 
-        return res.failure(InvalidSyntaxError(
-            tok.pos_start, tok.pos_end,
-            "Expected int, float, identifier, '+', '-', '(', '[', IF', 'FOR', 'WHILE', 'FUN'"
-        ))
+        return self.expr_failure("Expected int, float, identifier, '+', '-', '(', '[', IF', 'FOR', 'WHILE', 'FUN'")
+
+    # atom  ->  LPAREN expr RPAREN
+    def paren_expr(self):
+        self.advance()
+        expr = yield self.expr_node()
+        if expr is None:
+            return None
+        if self.current_tok.type == TT_RPAREN:
+            self.advance()
+            return expr
+        else:
+            return self.expr_failure("Expected ')'")
+
+    # packrat：运算符循环 (op operand)* 从某个运算符开始的分析只取决于其后的 token，与左侧的操作数无关
+    # 循环失败时，记录从其中每个运算符开始的循环都以同样的错误失败于同一处；回退之后再次读到这些运算符时直接失败，
+    # 否则每一层回退都要把其后的运算符链重新分析一遍
+    def record_loop_failure(self, min_prec, op_indices):
+        if op_indices:
+            failure = (self.expr_error, self.tok_idx)
+            for idx in op_indices:
+                self.loop_failures[(min_prec, idx)] = failure
+            self.memo_end = max(self.memo_end, self.tok_idx)
+        return None
+
+    # 在当前 token 处报告语法错误
+    def expr_failure(self, details):
+        self.expr_error = self.syntax_failure(details)
+        return None
+
+    # 当前 token 处的语法错误。分析中的失败大多发生在尝试（try_register）之中，随即被丢弃，
+    # 因此只记录出错的 token 与错误信息，InvalidSyntaxError 直到失败由 parse 报告时才构建
+    def syntax_failure(self, details):
+        return SyntaxFailure(self.current_tok, details)
+
+    # 由返回 ParseResult 的分析函数得到结点；出错时记录错误并返回 None
+    def node_of(self, res):
+        if res.error:
+            self.expr_error = res.error
+            return None
+        return res.node
 
     # list-expr  ->  LSQUARE (expr (COMMA expr)*)? RSQUARE
     def list_expr(self):
@@ -348,10 +520,7 @@ class Parser:
         pos_start = self.current_tok.pos_start.copy()
 
         if self.current_tok.type != TT_LSQUARE:
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected '['"
-            ))
+            return res.failure(self.syntax_failure(f"Expected '['"))
 
         res.register_advancement()
         self.advance()
@@ -363,8 +532,7 @@ class Parser:
         else:
             element_nodes.append(res.register(self.expr()))
             if res.error:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
+                return res.failure(self.syntax_failure(
                     "Expected ']', 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'"
                 ))
 
@@ -377,10 +545,7 @@ class Parser:
                     return res
 
             if self.current_tok.type != TT_RSQUARE:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    f"Expected ',' or ']'"
-                ))
+                return res.failure(self.syntax_failure(f"Expected ',' or ']'"))
 
             res.register_advancement()
             self.advance()
@@ -433,10 +598,7 @@ class Parser:
                     res.register_advancement()
                     self.advance()
                 else:
-                    return res.failure(InvalidSyntaxError(
-                        self.current_tok.pos_start, self.current_tok.pos_end,
-                        "Expected 'END'"
-                    ))
+                    return res.failure(self.syntax_failure("Expected 'END'"))
             else:
                 expr = res.register(self.statement())
                 if res.error:
@@ -467,10 +629,7 @@ class Parser:
         else_case = None
 
         if not self.current_tok.matches(TT_KEYWORD, case_keyword):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected '{case_keyword}'"
-            ))
+            return res.failure(self.syntax_failure(f"Expected '{case_keyword}'"))
 
         res.register_advancement()  # 不要忘记记录当前正在读取的位置
         self.advance()
@@ -480,10 +639,7 @@ class Parser:
             return res
 
         if not self.current_tok.matches(TT_KEYWORD, 'THEN'):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected 'THEN'"
-            ))
+            return res.failure(self.syntax_failure(f"Expected 'THEN'"))
 
         res.register_advancement()
         self.advance()
@@ -529,29 +685,20 @@ class Parser:
         res = ParseResult()
 
         if not self.current_tok.matches(TT_KEYWORD, 'FOR'):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected 'FOR'"
-            ))
+            return res.failure(self.syntax_failure(f"Expected 'FOR'"))
 
         res.register_advancement()  # 套路操作，无论何时都不用忘记记录当前正在读取的位置，便于进程的回滚
         self.advance()
 
         if self.current_tok.type != TT_IDENTIFIER:
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected identifier"
-            ))
+            return res.failure(self.syntax_failure(f"Expected identifier"))
 
         var_name = self.current_tok
         res.register_advancement()
         self.advance()
 
         if self.current_tok.type != TT_EQ:
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected '='"
-            ))
+            return res.failure(self.syntax_failure(f"Expected '='"))
 
         res.register_advancement()
         self.advance()
@@ -562,10 +709,7 @@ class Parser:
             return res
 
         if not self.current_tok.matches(TT_KEYWORD, 'TO'):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected 'TO'"
-            ))
+            return res.failure(self.syntax_failure(f"Expected 'TO'"))
 
         res.register_advancement()
         self.advance()
@@ -586,10 +730,7 @@ class Parser:
             step_value = None
 
         if not self.current_tok.matches(TT_KEYWORD, 'THEN'):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected 'THEN'"
-            ))
+            return res.failure(self.syntax_failure(f"Expected 'THEN'"))
 
         res.register_advancement()
         self.advance()
@@ -603,10 +744,7 @@ class Parser:
                 return res
 
             if not self.current_tok.matches(TT_KEYWORD, 'END'):
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    f"Expected 'END'"
-                ))
+                return res.failure(self.syntax_failure(f"Expected 'END'"))
 
             res.register_advancement()
             self.advance()
@@ -626,10 +764,7 @@ class Parser:
         res = ParseResult()
 
         if not self.current_tok.matches(TT_KEYWORD, 'WHILE'):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected 'WHILE'"
-            ))
+            return res.failure(self.syntax_failure(f"Expected 'WHILE'"))
 
         res.register_advancement()
         self.advance()
@@ -639,10 +774,7 @@ class Parser:
             return res
 
         if not self.current_tok.matches(TT_KEYWORD, 'THEN'):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected 'THEN'"
-            ))
+            return res.failure(self.syntax_failure(f"Expected 'THEN'"))
 
         res.register_advancement()
         self.advance()
@@ -656,10 +788,7 @@ class Parser:
                 return res
 
             if not self.current_tok.matches(TT_KEYWORD, 'END'):
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    f"Expected 'END'"
-                ))
+                return res.failure(self.syntax_failure(f"Expected 'END'"))
 
             res.register_advancement()
             self.advance()
@@ -681,10 +810,7 @@ class Parser:
         res = ParseResult()
 
         if not self.current_tok.matches(TT_KEYWORD, 'FUN'):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected 'FUN'"
-            ))
+            return res.failure(self.syntax_failure(f"Expected 'FUN'"))
 
         res.register_advancement()
         self.advance()
@@ -694,17 +820,11 @@ class Parser:
             res.register_advancement()
             self.advance()
             if self.current_tok.type != TT_LPAREN:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    f"Expected '('"
-                ))
+                return res.failure(self.syntax_failure(f"Expected '('"))
         else:
             var_name_tok = None
             if self.current_tok.type != TT_LPAREN:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    f"Expected identifier or '('"
-                ))
+                return res.failure(self.syntax_failure(f"Expected identifier or '('"))
 
         res.register_advancement()
         self.advance()
@@ -720,26 +840,17 @@ class Parser:
                 self.advance()
 
                 if self.current_tok.type != TT_IDENTIFIER:
-                    return res.failure(InvalidSyntaxError(
-                        self.current_tok.pos_start, self.current_tok.pos_end,
-                        f"Expected identifier"
-                    ))
+                    return res.failure(self.syntax_failure(f"Expected identifier"))
 
                 arg_name_toks.append(self.current_tok)
                 res.register_advancement()
                 self.advance()
 
             if self.current_tok.type != TT_RPAREN:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    f"Expected ',' or ')'"
-                ))
+                return res.failure(self.syntax_failure(f"Expected ',' or ')'"))
         else:
             if self.current_tok.type != TT_RPAREN:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end,
-                    f"Expected identifier or ')'"
-                ))
+                return res.failure(self.syntax_failure(f"Expected identifier or ')'"))
 
         res.register_advancement()
         self.advance()
@@ -760,10 +871,7 @@ class Parser:
             ))
 
         if self.current_tok.type != TT_NEWLINE:
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected '->' or NEWLINE"
-            ))
+            return res.failure(self.syntax_failure(f"Expected '->' or NEWLINE"))
 
         res.register_advancement()
         self.advance()
@@ -773,10 +881,7 @@ class Parser:
             return res
 
         if not self.current_tok.matches(TT_KEYWORD, 'END'):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                f"Expected 'END'"
-            ))
+            return res.failure(self.syntax_failure(f"Expected 'END'"))
 
         res.register_advancement()
         self.advance()
@@ -788,38 +893,157 @@ class Parser:
             False
         ))
 
-    ###################################
 
-    # 抽离文法中 func_a op func_b 类似的公共操作，比如 factor ((MUL|DIV) factor)*
-    # 构建 AST
-    def bin_op(self, func_a, ops, func_b=None):
-        # func_b 形参类型是函数且为可选参数
-        if func_b == None:
-            func_b = func_a
+# TokenStream 每读取这么多个 token 才丢弃一次已不再需要的部分
+STREAM_RELEASE_SIZE = 1024
 
+
+# 流式读取的 token：从迭代器中按需读取，只保留仍可能被读取的部分（窗口），其余的随读取进度丢弃
+class TokenStream:
+    __slots__ = ('tokens', 'window', 'offset')
+
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.window = []  # 已读取、尚未丢弃的 token
+        self.offset = 0  # window[0] 的下标
+
+    # 下标为 idx 的 token；读到 EOF 之后始终为 EOF
+    def get(self, idx):
+        window = self.window
+        while idx - self.offset >= len(window):
+            tok = next(self.tokens, None)
+            if tok is None:
+                return window[-1]
+            window.append(tok)
+        if idx < self.offset:
+            raise Exception(f"Token {idx} has already been released")
+        return window[idx - self.offset]
+
+    # 丢弃下标小于 idx 的 token；攒够一批再丢弃，避免每次都移动整个窗口
+    def release(self, idx):
+        idx = min(idx, self.offset + len(self.window) - 1)  # 至少保留最后读取的一个（读完之后即 EOF）
+        if idx - self.offset >= STREAM_RELEASE_SIZE:
+            del self.window[:idx - self.offset]
+            self.offset = idx
+
+
+# 流式语法分析：token 由迭代器逐个产生（见 RegexLexer.generate_tokens），不必事先得到全部 token
+# 回退只发生在 statements 与 RETURN 的 try_register 失败时，最多退回到尝试开始处；
+# 因此只需保留最外层尚未结束的尝试开始以后的 token，窗口的大小取决于最长的一条顶层语句，而不是整个源码
+class StreamingParser(Parser):
+    def __init__(self, tokens, packrat=True):
+        super().__init__(TokenStream(tokens), packrat)
+
+    def update_current_tok(self):
+        tokens = self.tokens
+        if self.tok_idx - tokens.offset >= STREAM_RELEASE_SIZE:
+            tokens.release(self.attempts[0] if self.attempts else self.tok_idx)
+        idx = self.tok_idx - tokens.offset
+        # 已读取过的 token（例如回退之后）直接从窗口中取出，否则由 get 向迭代器读取
+        if 0 <= idx < len(tokens.window):
+            self.current_tok = tokens.window[idx]
+        elif self.tok_idx >= 0:
+            self.current_tok = tokens.get(self.tok_idx)
+
+
+# 逐条分析顶层语句，与 Parser.parse 的结果一致，用于增量分析（见 basic/incremental.py）：
+# 另外记录每条顶层语句读到过的最远的 token，且可以从任意一条语句之后开始
+class TopLevelParser(Parser):
+    # 从下标 start 处开始分析；furthest 为此前读到过的最远的下标
+    def __init__(self, tokens, start, furthest):
+        self.furthest = furthest
+        super().__init__(tokens)
+        self.tok_idx = start
+        self.update_current_tok()
+
+    def advance(self):
+        self.tok_idx += 1
+        if self.tok_idx > self.furthest:
+            self.furthest = self.tok_idx
+        self.update_current_tok()
+        return self.current_tok
+
+    # 分析顶层语句，依次加入 statements；statements 为空时从源码开头开始，否则从其最后一条语句之后开始
+    # 每条语句之前以其开始处的下标调用 reusable，返回真值时不再继续，此时结果的 node 为 True
+    # 出错时结果带有错误（SyntaxFailure）
+    def parse_statements(self, statements, reusable):
+        try:
+            return self.top_level_statements(statements, reusable)
+        except RecursionError:
+            return ParseResult().failure(self.syntax_failure("Expression is nested too deeply"))
+
+    # 与 Parser.statements 一致：第一条语句出错时报告其错误，其后的语句出错时回退，报告其后无法分析的 token
+    def top_level_statements(self, statements, reusable):
         res = ParseResult()
-        left = res.register(func_a())
-        if res.error:
-            return res
 
-        while self.current_tok.type in ops or (self.current_tok.type, self.current_tok.value) in ops:
-            # 因为此时该方法调用的其它函数已经调用 advance 函数完成向前读取的功能，所以当前 token 为 op_token
-            op_tok = self.current_tok
-            res.register_advancement()
-            self.advance()
-            right = res.register(func_b())
+        if not statements:
+            while self.current_tok.type == TT_NEWLINE:
+                self.advance()
+            start = self.tok_idx
+            statement = res.register(self.statement())
             if res.error:
                 return res
-            left = BinOpNode(left, op_tok, right)
+            statements.append((statement, start, self.tok_idx, self.furthest))
+            self.commit_statement()
+
+        while True:
+            newline_count = 0
+            while self.current_tok.type == TT_NEWLINE:
+                self.advance()
+                newline_count += 1
+            if newline_count == 0:
+                break
 
-        return res.success(left)
+            if reusable(self.tok_idx):
+                return res.success(True)
+            start = self.tok_idx
+            self.begin_attempt()
+            statement = res.try_register(self.statement())
+            self.end_attempt()
+            if not statement:
+                self.backtrack(res.to_reverse_count)
+                break
+            statements.append((statement, start, self.tok_idx, self.furthest))
+            self.commit_statement()
+
+        if self.current_tok.type != TT_EOF:
+            return res.failure(self.syntax_failure("Token cannot appear after previous tokens"))
+        return res.success(False)
 
 
 #######################################
 # IMPORTS
 #######################################
 
+from types import GeneratorType
+
 from util.parser_result import ParseResult
-from util.error import InvalidSyntaxError
+from util.error import InvalidSyntaxError, SyntaxFailure
 from data.tokens import *
-from util.nodes import *
\ No newline at end of file
+from util.nodes import *
+
+
+# 二元运算符的优先级，数值越大结合越紧
+PREC_LOGIC = 1  # AND OR
+PREC_COMP = 2  # == != < > <= >=
+PREC_ARITH = 3  # + -
+PREC_TERM = 4  # * /
+
+# 不含嵌套的子表达式的 atom 的 token 类型
+PLAIN_ATOM_TYPES = (TT_INT, TT_FLOAT, TT_STRING, TT_IDENTIFIER)
+
+# (运算符的 token 类型, token 值) -> 优先级；只有关键字运算符的 token 带有值。用到 token 类型，故置于 IMPORTS 之后
+BINARY_PRECEDENCE = {
+    (TT_KEYWORD, 'AND'): PREC_LOGIC,
+    (TT_KEYWORD, 'OR'): PREC_LOGIC,
+    (TT_EE, None): PREC_COMP,
+    (TT_NE, None): PREC_COMP,
+    (TT_LT, None): PREC_COMP,
+    (TT_GT, None): PREC_COMP,
+    (TT_LTE, None): PREC_COMP,
+    (TT_GTE, None): PREC_COMP,
+    (TT_PLUS, None): PREC_ARITH,
+    (TT_MINUS, None): PREC_ARITH,
+    (TT_MUL, None): PREC_TERM,
+    (TT_DIV, None): PREC_TERM,
+}
@@ -0,0 +1,118 @@
+#######################################
+# PURITY
+# 纯函数推断：找出返回值只取决于参数的具名函数，标记为 node.memoize，执行时包装为 MemoFunction，
+# 相同参数的调用直接返回缓存的结果（见 util/values.py 中的 MemoCache）
+#
+# mendax 的作用域是动态的，函数体内的自由变量沿调用链查找，其值取决于调用者。因此只有满足以下条件的函数才被视为纯函数：
+#   1. 是程序顶层的 FUN 语句，函数名在整个程序中只被这一条语句绑定（没有被重新赋值，也不是任何函数的形参、局部变量），
+#      调用时按名称查找到的始终是这个函数
+#   2. 函数体内读取的变量要么是形参、已经赋值的局部变量，要么是 PURE_NAMES 中的内建名称或其他纯函数，
+#      同样不能在程序中的任何地方被绑定
+#   3. 函数体内只调用 PURE_NAMES 中的内建函数与其他纯函数（PRINT、INPUT、APPEND、RUN 等有副作用的内建函数不在其中），
+#      不定义嵌套函数，不在循环之外 BREAK / CONTINUE（那会作用于调用者的循环）
+#   4. 不对 mendax 函数尾调用（见 basic/tail_calls.py）：记忆化的函数不参与尾调用，尾递归会因此占用 python 调用栈，
+#      而尾递归的函数相当于循环，各次调用的参数互不相同，缓存也无从命中
+# 须在 mark_tail_calls 之后执行
+#######################################
+
+# 可以在纯函数中使用的内建名称：内建常量，以及没有副作用、不调用参数中的函数的内建函数
+PURE_NAMES = {
+    'NULL', 'FALSE', 'TRUE', 'MATH_PI',
+    'IS_NUM', 'IS_STR', 'IS_LIST', 'IS_FUN', 'LEN',
+    'VEC_ADD', 'VEC_SUB', 'VEC_MUL', 'VEC_DIV', 'VEC_POW',
+    'SUM', 'MIN', 'MAX', 'RANGE',
+}
+
+
+# 标记整个程序中的纯函数；返回 node
+def mark_pure_functions(node):
+    statements = node.element_nodes if isinstance(node, ListNode) else [node]
+    bound_names = function_bound_names(node)
+    top_level_names = assigned_names(node)
+
+    # 候选：顶层 FUN 语句定义、名称只被绑定一次的函数
+    candidates = {}
+    for statement in statements:
+        if isinstance(statement, FuncDefNode) and statement.var_name_tok:
+            name = statement.var_name_tok.value
+            if name not in bound_names and top_level_names.count(name) == 1:
+                candidates[name] = statement
+
+    builtin_names = {name for name in PURE_NAMES if name not in bound_names and name not in top_level_names}
+
+    # 纯函数可以调用其他纯函数（包括自身）：先假设候选都是纯函数，反复剔除不满足条件的，直至不再变化
+    pure_names = set(candidates)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure_names):
+            func_node = candidates[name]
+            bound = {arg_name_tok.value for arg_name_tok in func_node.arg_name_toks}
+            if not is_pure(func_node.body_node, bound, builtin_names | pure_names, False):
+                pure_names.discard(name)
+                changed = True
+
+    for name in pure_names:
+        candidates[name].memoize = True
+    return node
+
+
+# node 的求值是否没有副作用、结果只取决于 bound 中的变量；bound 为此时一定已经赋值的局部变量，求值过程中随赋值更新
+# safe_names 为可以读取、调用的全局名称；in_loop 为是否位于函数体内的循环中
+def is_pure(node, bound, safe_names, in_loop):
+    if isinstance(node, (NumberNode, StringNode)):
+        return True
+    elif isinstance(node, VarAccessNode):
+        name = node.var_name_tok.value
+        return name in bound or name in safe_names
+    elif isinstance(node, VarAssignNode):
+        if not is_pure(node.value_node, bound, safe_names, in_loop):
+            return False
+        bound.add(node.var_name_tok.value)
+        return True
+    elif isinstance(node, (ListNode, BinOpNode, UnaryOpNode, ReturnNode)):
+        # 子结点依次求值
+        return all(is_pure(child_node, bound, safe_names, in_loop) for child_node in child_nodes(node))
+    elif isinstance(node, IfNode):
+        # 只有第一个条件一定被求值；其余条件与各分支中的赋值在 IF 之后不一定发生
+        cases = iter(node.cases)
+        condition, expr, _ = next(cases)
+        if not is_pure(condition, bound, safe_names, in_loop):
+            return False
+        if not is_pure(expr, set(bound), safe_names, in_loop):
+            return False
+        for condition, expr, _ in cases:
+            branch_bound = set(bound)
+            if not is_pure(condition, branch_bound, safe_names, in_loop):
+                return False
+            if not is_pure(expr, branch_bound, safe_names, in_loop):
+                return False
+        return not node.else_case or is_pure(node.else_case[0], set(bound), safe_names, in_loop)
+    elif isinstance(node, ForNode):
+        for value_node in (node.start_value_node, node.end_value_node, node.step_value_node):
+            if value_node and not is_pure(value_node, bound, safe_names, in_loop):
+                return False
+        return is_pure(node.body_node, bound | {node.var_name_tok.value}, safe_names, True)
+    elif isinstance(node, WhileNode):
+        if not is_pure(node.condition_node, bound, safe_names, in_loop):
+            return False
+        return is_pure(node.body_node, set(bound), safe_names, True)
+    elif isinstance(node, CallNode):
+        # 只能按名称调用内建函数或纯函数；局部变量中的函数无从得知是否为纯函数
+        node_to_call = node.node_to_call
+        if not isinstance(node_to_call, VarAccessNode) or node_to_call.var_name_tok.value not in safe_names:
+            return False
+        if node.is_tail and node_to_call.var_name_tok.value not in PURE_NAMES:
+            return False
+        return all(is_pure(arg_node, bound, safe_names, in_loop) for arg_node in node.arg_nodes)
+    elif isinstance(node, (BreakNode, ContinueNode)):
+        return in_loop
+    return False
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from basic.resolver import assigned_names, function_bound_names
+from util.nodes import *
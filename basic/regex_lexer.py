@@ -0,0 +1,132 @@
+#######################################
+# REGEX LEXER
+# 以一个预先编译的总正则表达式做词法分析：每个 token 由一次匹配得到，数字、变量、字符串直接从源码中截取，
+# 不再逐个字符前进、拼接；生成的 token 与错误和 Lexer（basic/lexer.py）完全一致
+#######################################
+
+import re
+import sys
+
+# 各分组依次尝试，匹配到的分组名即 token 的种类；空格、制表符与注释不生成 token
+# 注释连同其后的换行符一并跳过（与 Lexer.skip_comment 一致），位于源码末尾、没有换行符的注释同样跳过
+TOKEN_PATTERN = re.compile(r'''
+    (?P<SKIP>[ \t]+)
+  | (?P<COMMENT>\#[^\n]*\n?)
+  | (?P<NEWLINE>[;\n])
+  | (?P<NUMBER>[0-9]+(?:\.[0-9]*)?)
+  | (?P<IDENTIFIER>[A-Za-z][A-Za-z0-9_]*)
+  | (?P<STRING>"[^"]*"?)
+  | (?P<OPERATOR>->|==|!=|<=|>=|[-+*/^()\[\],=<>])
+''', re.VERBOSE)
+
+
+class RegexLexer:
+    # source 为 text 所在的源码，默认新建（增量分析时为编辑后的源码，见 basic/incremental.py）
+    def __init__(self, fn, text, source=None):
+        self.fn = fn
+        self.text = text
+        self.source = source or Source(fn, text)
+        self.error = None
+
+    # 解析 token
+    def make_tokens(self):
+        tokens = list(self.generate_tokens())
+        if self.error:
+            return [], self.error
+        return tokens, None
+
+    # 逐个产生 token，供语法分析按需读取（见 basic/parser.py 中的 StreamingParser）
+    # 遇到错误时把错误记录在 self.error 中，并以一个 EOF 结束，使语法分析随之结束
+    # start 为开始分析的下标，须为一次匹配的开始处（例如某个 token 的结束处），用于增量分析
+    def generate_tokens(self, start=0):
+        text = self.text
+        source = self.source
+        self.error = None
+        idx = start  # 下一个 token 应当开始的下标
+
+        for match in TOKEN_PATTERN.finditer(text, start):
+            start = match.start()
+            # 两次匹配之间有未能匹配的字符
+            if start != idx:
+                break
+            idx = match.end()
+            kind = match.lastgroup
+
+            if kind == 'SKIP' or kind == 'COMMENT':
+                continue
+            elif kind == 'IDENTIFIER':
+                value = sys.intern(match.group())  # 同名标识符共享同一个字符串
+                yield Token(TT_KEYWORD if value in KEYWORD_SET else TT_IDENTIFIER, value, source, start, idx)
+            elif kind == 'OPERATOR':
+                yield Token(OPERATORS[match.group()], None, source, start, idx)
+            elif kind == 'NEWLINE':
+                yield Token(TT_NEWLINE, None, source, start)
+            elif kind == 'NUMBER':
+                value = match.group()
+                if '.' in value:
+                    yield Token(TT_FLOAT, float(value), source, start, idx)
+                else:
+                    yield Token(TT_INT, int(value), source, start, idx)
+            else:
+                token = self.make_string(match.group(), start, idx)
+                idx = token.end  # 未闭合的字符串读到了源码末尾之后，EOF 随之后移一位
+                yield token
+
+        if idx < len(text):
+            self.error = self.make_error(idx)
+
+        # 表示匹配结束
+        yield Token(TT_EOF, None, source, idx)
+
+    # 由字符串的原文生成 token；与 Lexer.make_string 一致：反斜杠本身被丢弃，其后的字符按普通字符处理
+    def make_string(self, raw, start, end):
+        if len(raw) > 1 and raw[-1] == '"':
+            string = raw[1:-1]
+        else:
+            # 未闭合，与 Lexer 一致，读到源码末尾之后
+            string = raw[1:]
+            end += 1
+        if '\\' in string:
+            string = string.replace('\\', '')
+        return Token(TT_STRING, string, self.source, start, end)
+
+    # 下标 idx 处的字符无法开始任何 token
+    def make_error(self, idx):
+        if self.text[idx] == '!':
+            # 与 Lexer.make_not_equals 一致，错误的范围包括 '!' 之后的一个字符
+            return ExpectedCharError(Position(idx, self.source), Position(idx + 2, self.source), "'=' (after '!')")
+        return IllegalCharError(Position(idx, self.source), Position(idx + 1, self.source), "'" + self.text[idx] + "'")
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.position import Source, Position
+from util.error import IllegalCharError, ExpectedCharError
+from data.tokens import *
+
+
+# 运算符的原文 -> token 类型；KEYWORD_SET 用于判断变量名是否为关键字。用到 token 类型，故置于 IMPORTS 之后
+OPERATORS = {
+    '+': TT_PLUS,
+    '-': TT_MINUS,
+    '*': TT_MUL,
+    '/': TT_DIV,
+    '^': TT_POW,
+    '(': TT_LPAREN,
+    ')': TT_RPAREN,
+    '[': TT_LSQUARE,
+    ']': TT_RSQUARE,
+    ',': TT_COMMA,
+    '->': TT_ARROW,
+    '=': TT_EQ,
+    '==': TT_EE,
+    '!=': TT_NE,
+    '<': TT_LT,
+    '<=': TT_LTE,
+    '>': TT_GT,
+    '>=': TT_GTE,
+}
+
+KEYWORD_SET = frozenset(KEYWORDS)
@@ -0,0 +1,115 @@
+#######################################
+# RESOLVER
+# 作用域分析：在执行之前确定每个变量访问、赋值所对应的存储位置，并记录于结点上
+#
+# mendax 的作用域是动态的：函数的父级符号表是调用者的符号表，函数体内的自由变量要沿调用链查找，
+# 其所在的层数在编译期无法确定。因此只在能够静态确定的情况下予以解析：
+#   1. 函数的形参以及函数体内被赋值的变量是该函数的局部变量，分配槽位（node.slot），执行时直接按下标读写数组
+#   2. 函数体内的自由变量，若程序中没有任何函数绑定过这个名称，则沿调用链查找必然落到全局符号表，
+#      标记为全局变量（node.is_global），执行时直接读取全局符号表，不再逐层查找
+#      REPL、RUN 中多个程序共用全局符号表，之后的程序可能在函数中绑定这个名称，调用之前程序中的函数时须按名称查找；
+#      因此执行时还须确认名称从未在全局符号表以外绑定（不在 SymbolTable.local_names 中），否则仍按名称查找
+#   3. 其余变量仍按名称沿符号表链查找
+# 程序顶层的变量就存放于全局符号表中，无需解析
+#######################################
+
+
+# 函数体的局部变量布局
+class FunctionScope:
+    def __init__(self):
+        self.slot_map = {}  # 局部变量名 -> 槽位下标
+        self.slot_names = []  # 槽位下标 -> 局部变量名
+        self.arg_slots = []  # 形参依次对应的槽位
+
+    # 槽位中的局部变量同样在全局符号表以外绑定了名称，使按名称查找的 LookupCache 不会越过它
+    def add_slot(self, name):
+        if name not in self.slot_map:
+            self.slot_map[name] = len(self.slot_names)
+            self.slot_names.append(name)
+            bind_local_name(name)
+        return self.slot_map[name]
+
+
+class Resolver:
+    def __init__(self):
+        self.function_bound = set()  # 在任何函数体内被绑定过的名称
+
+    # 解析整个程序，结果记录于各个结点上；返回 node
+    def resolve_program(self, node):
+        self.function_bound = function_bound_names(node)
+        self.resolve(node, None)
+        return node
+
+    # scope 为当前所在函数的 FunctionScope，程序顶层为 None
+    def resolve(self, node, scope):
+        nodes = [node]
+
+        while nodes:
+            node = nodes.pop()
+
+            if isinstance(node, VarAccessNode):
+                var_name = node.var_name_tok.value
+                if scope:
+                    node.slot = scope.slot_map.get(var_name)
+                    node.is_global = node.slot is None and var_name not in self.function_bound
+            elif isinstance(node, (VarAssignNode, ForNode)):
+                if scope:
+                    node.slot = scope.slot_map[node.var_name_tok.value]
+            elif isinstance(node, FuncDefNode):
+                if scope and node.var_name_tok:
+                    node.slot = scope.slot_map[node.var_name_tok.value]
+                node.scope = self.function_scope(node)
+                self.resolve(node.body_node, node.scope)
+                continue
+
+            nodes.extend(child_nodes(node))
+
+    # 形参以及函数体内被赋值的变量都是该函数的局部变量，分配槽位
+    def function_scope(self, node):
+        scope = FunctionScope()
+        for arg_name_tok in node.arg_name_toks:
+            scope.arg_slots.append(scope.add_slot(arg_name_tok.value))
+        for name in assigned_names(node.body_node):
+            scope.add_slot(name)
+        return scope
+
+
+# 收集在当前函数体内被赋值的变量名（VAR、FOR 循环变量、具名 FUN），不进入嵌套函数的函数体
+def assigned_names(node):
+    names = []
+    nodes = [node]
+
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (VarAssignNode, ForNode)):
+            names.append(node.var_name_tok.value)
+        elif isinstance(node, FuncDefNode):
+            if node.var_name_tok:
+                names.append(node.var_name_tok.value)
+            continue
+        nodes.extend(child_nodes(node))
+
+    return names
+
+
+# 收集在任何函数体内被绑定的名称（形参以及函数体内被赋值的变量）
+def function_bound_names(node):
+    names = set()
+    nodes = [node]
+
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, FuncDefNode):
+            names.update(arg_name_tok.value for arg_name_tok in node.arg_name_toks)
+            names.update(assigned_names(node.body_node))
+        nodes.extend(child_nodes(node))
+
+    return names
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.nodes import *
+from util.symbol_table import bind_local_name
@@ -22,36 +22,140 @@ global_symbol_table.set("APPEND", BuiltInFunction.append)
 global_symbol_table.set("POP", BuiltInFunction.pop)
 global_symbol_table.set("EXTEND", BuiltInFunction.extend)
 global_symbol_table.set("LEN", BuiltInFunction.len)
+global_symbol_table.set("VEC_ADD", BuiltInFunction.vec_add)
+global_symbol_table.set("VEC_SUB", BuiltInFunction.vec_sub)
+global_symbol_table.set("VEC_MUL", BuiltInFunction.vec_mul)
+global_symbol_table.set("VEC_DIV", BuiltInFunction.vec_div)
+global_symbol_table.set("VEC_POW", BuiltInFunction.vec_pow)
+global_symbol_table.set("MAP", BuiltInFunction.map)
+global_symbol_table.set("FILTER", BuiltInFunction.filter)
+global_symbol_table.set("REDUCE", BuiltInFunction.reduce)
+global_symbol_table.set("SUM", BuiltInFunction.sum)
+global_symbol_table.set("MIN", BuiltInFunction.min)
+global_symbol_table.set("MAX", BuiltInFunction.max)
+global_symbol_table.set("RANGE", BuiltInFunction.range)
+global_symbol_table.set("MEMO", BuiltInFunction.memo)
+global_symbol_table.set("MEMO_STATS", BuiltInFunction.memo_stats)
 global_symbol_table.set("RUN", BuiltInFunction.run)
 
+# 可在常量折叠时被替换为字面量的内建常量
+BUILTIN_CONSTANTS = ["NULL", "FALSE", "TRUE", "MATH_PI"]
 
-def run(fn, text):
-    # Generate tokens
-    lexer = Lexer(fn, text)
-    tokens, error = lexer.make_tokens()
-    if error:
-        return None, error
 
-    # Generate AST
-    parser = Parser(tokens)
-    ast = parser.parse()
-    if ast.error:
-        return None, ast.error
+# 内建常量当前的值（变量名 -> python 数值）；已被重新赋值为非数字的不在其中
+def builtin_constants():
+    constants = {}
+    for name in BUILTIN_CONSTANTS:
+        value = global_symbol_table.get(name)
+        if isinstance(value, Number):
+            constants[name] = value.value
+    return constants
 
-    # Run program
-    interpreter = Interpreter()
+
+# engine 选择执行方式：'tree' 为逐结点遍历 AST 的解释器，'signal' 同样逐结点遍历，但以异常传递错误与跳转，
+# 'closure' 为先把 AST 编译为闭包再执行，'vm' 为先把 AST 编译为字节码再交由虚拟机执行，
+# 'python' 为先把 AST 转译为 python 代码再 exec 执行，'stack' 为以显式栈逐结点求值、不占用 python 调用栈的解释器
+# optimize 为真时，在执行之前对 AST 做常量折叠
+# recursion_limit 为 'stack'、'vm' 中 mendax 函数调用的最大深度，默认为 RECURSION_LIMIT（其余执行方式受 python 调用栈的限制）
+# unboxed 为真时，'vm' 中数字运算的中间结果为 python 数值，只在存入变量、传入函数等处才包装为 Number（见 basic/bytecode.py）
+# memoize 为真时，推断出的纯函数（见 basic/purity.py）自动记忆化，与以 MEMO 包装一样缓存相同参数的调用结果
+# stream 为真时，词法分析与语法分析交替进行，token 不必全部保存在内存中（见 basic/parser.py 中的 StreamingParser）
+# cache 为真且设置了缓存目录（环境变量 MENDAX_CACHE_DIR）时，语法分析的结果缓存在磁盘上，内容相同的源码再次运行时直接读取（见 basic/cache.py）
+def run(fn, text, engine='tree', optimize=True, recursion_limit=None, unboxed=False, memoize=False, stream=False,
+        cache=True):
     context = Context('<program>')  # display_name = <program>
     context.symbol_table = global_symbol_table
-    result = interpreter.visit(ast.node, context)
+    constants = builtin_constants() if optimize else None
+
+    # 转译结果按源码缓存，命中时无需再次词法分析、语法分析；折叠进代码的内建常量的值也是缓存键的一部分
+    if engine == 'python':
+        cache_key = (fn, text, optimize and tuple(constants.items()), memoize)
+        program = cached_program(cache_key)
+        if program:
+            result = program.run(context)
+            return result.value, result.error
+
+    # Generate tokens & AST
+    node = load_ast(fn, text) if cache else None
+    if node:
+        ast = ParseResult().success(node)
+    else:
+        ast = parse(fn, text, stream)
+        if ast.error:
+            return None, ast.error
+        if cache:
+            store_ast(text, ast.node)
+
+    # Optimize AST
+    if optimize:
+        ast.node = ConstantFolder(constants).fold_program(ast.node)
+    mark_tail_calls(ast.node)
+    mark_unused_loops(ast.node)
+    if memoize:
+        mark_pure_functions(ast.node)
+
+    # Run program
+    if engine == 'tree':
+        interpreter = Interpreter()
+        result = interpreter.visit(ast.node, context)
+    elif engine == 'signal':
+        result = SignalInterpreter().run(ast.node, context)
+    elif engine == 'closure':
+        program = ClosureCompiler().compile_program(ast.node)
+        result = program(context)
+    elif engine == 'vm':
+        code = BytecodeCompiler(unboxed).compile_program(ast.node)
+        result = VM(recursion_limit).run(code, context)
+    elif engine == 'python':
+        program = Transpiler().transpile_program(ast.node)
+        cache_program(cache_key, program)
+        result = program.run(context)
+    elif engine == 'stack':
+        result = StackInterpreter(recursion_limit).run(ast.node, context)
+    else:
+        raise Exception(f"No engine named '{engine}'")
 
     return result.value, result.error
 
 
+# 词法分析与语法分析；词法错误同样以 ParseResult 返回
+def parse(fn, text, stream=False):
+    lexer = RegexLexer(fn, text)
+    if stream:
+        # 语法分析按需向词法分析读取 token，不保留全部 token
+        tokens = lexer.generate_tokens()
+        ast = StreamingParser(tokens).parse()
+        # 与先得到全部 token 时一致，词法错误优先于语法错误：出现语法错误时读完剩余的 token，以确定其后是否有词法错误
+        if ast.error:
+            for _ in tokens:
+                pass
+        if lexer.error:
+            return ParseResult().failure(lexer.error)
+        return ast
+
+    tokens, error = lexer.make_tokens()
+    if error:
+        return ParseResult().failure(error)
+    return Parser(tokens).parse()
+
+
 #######################################
 # IMPORTS
 #######################################
 
 from util.context import Context
 from basic.interpreter import Interpreter
-from basic.parser import Parser
-from basic.lexer import Lexer
\ No newline at end of file
+from basic.signal_interpreter import SignalInterpreter
+from basic.stack_interpreter import StackInterpreter
+from basic.closure_compiler import ClosureCompiler
+from basic.bytecode import BytecodeCompiler
+from basic.vm import VM
+from basic.optimizer import ConstantFolder
+from basic.tail_calls import mark_tail_calls
+from basic.usage import mark_unused_loops
+from basic.purity import mark_pure_functions
+from basic.transpiler import Transpiler, cached_program, cache_program
+from basic.parser import Parser, StreamingParser
+from basic.regex_lexer import RegexLexer
+from basic.cache import load_ast, store_ast
+from util.parser_result import ParseResult
\ No newline at end of file
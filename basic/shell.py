@@ -9,7 +9,7 @@ while True:
     if error:
         print(error.as_string())
     elif result:
-        if len(result.elements) == 1:
+        if result.length == 1:
             print(repr(result.elements[0]))
         else:
             print(repr(result))
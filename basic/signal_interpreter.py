@@ -0,0 +1,196 @@
+#######################################
+# SIGNAL INTERPRETER
+# 以异常传递控制流的解释器：与 Interpreter 一样逐结点遍历 AST，但 visit 直接返回 Value
+# 运行期错误以及 RETURN / BREAK / CONTINUE 以 util/signals.py 中的异常抛出，
+# 正常求值时无需为每个结点创建 RTResult，也无需在每一步调用 register、should_return
+#######################################
+
+
+class SignalInterpreter:
+    def visit(self, node, context):  # node : ASTNode；返回值为 Value
+        # 与 Interpreter 相同的分派方式，两者的差别只在于控制流的传递
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        return method(node, context)
+
+    def no_visit_method(self, node, context):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    # 执行整个程序，结果转换为 RTResult
+    def run(self, node, context):
+        return signal_result(self.visit, node, context)
+
+    ###################################
+
+    def visit_NumberNode(self, node, context):
+        return Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_StringNode(self, node, context):
+        return String(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_ListNode(self, node, context):
+        elements = [self.visit(element_node, context)
+                    for element_node in node.element_nodes]
+        return List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_VarAccessNode(self, node, context):
+        var_name = node.var_name_tok.value
+        value = node.cache.get(context.symbol_table)
+
+        if not value:
+            raise RTErrorSignal(RTError(
+                node.pos_start, node.pos_end,
+                f"'{var_name}' is not defined",
+                context
+            ))
+
+        # 值创建后不再被修改，直接共享
+        return value
+
+    def visit_VarAssignNode(self, node, context):
+        value = self.visit(node.value_node, context)
+        context.symbol_table.set(node.var_name_tok.value, value)
+        return value
+
+    def visit_BinOpNode(self, node, context):
+        left = self.visit(node.left_node, context)
+        right = self.visit(node.right_node, context)
+
+        method_name = binary_method_name(node.op_tok)
+        # 两个操作数都是 Number 时直接对 python 数值运算（见 Interpreter.visit_BinOpNode）
+        if type(left) is Number and type(right) is Number:
+            try:
+                return Number(NUMBER_OPERATIONS[method_name](left.value, right.value))
+            except ZeroDivisionError:
+                pass
+
+        operation = BINARY_OPERATIONS[method_name]
+        result, error = operation(left, right)
+        if error:
+            raise RTErrorSignal(binary_error(operation, left, right, node.left_node, node.right_node, context))
+        return result
+
+    def visit_UnaryOpNode(self, node, context):
+        number = self.visit(node.node, context)
+
+        operation = unary_operation(node.op_tok)
+        result, error = operation(number)
+        if error:
+            raise RTErrorSignal(unary_error(operation, number, node.node, context))
+        return result
+
+    def visit_IfNode(self, node, context):
+        for condition, expr, should_return_null in node.cases:
+            if self.visit(condition, context).is_true():
+                expr_value = self.visit(expr, context)
+                return Number.null if should_return_null else expr_value
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            expr_value = self.visit(expr, context)
+            return Number.null if should_return_null else expr_value
+
+        return Number.null
+
+    def visit_ForNode(self, node, context):
+        elements = []
+
+        start_value = self.visit(node.start_value_node, context)
+        end_value = self.visit(node.end_value_node, context)
+        if node.step_value_node:
+            step_value = self.visit(node.step_value_node, context)
+        else:
+            step_value = Number(1)
+
+        i = start_value.value
+        end = end_value.value
+        step = step_value.value
+        ascending = step >= 0  # 若设置的 STEP 值大于 0，则从小到大累加
+
+        while (i < end) if ascending else (i > end):
+            context.symbol_table.set(node.var_name_tok.value, Number(i))
+            i += step
+
+            # 循环体内（包括被调用的函数中）的 CONTINUE / BREAK 在此捕获
+            try:
+                value = self.visit(node.body_node, context)
+            except ContinueSignal:
+                continue
+            except BreakSignal:
+                break
+
+            if not node.should_return_null:
+                elements.append(value)
+
+        return (
+            Number.null if node.should_return_null else
+            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+        )
+
+    def visit_WhileNode(self, node, context):
+        elements = []
+
+        # 条件在 try 之外求值，其中的 CONTINUE / BREAK 作用于外层循环
+        while self.visit(node.condition_node, context).is_true():
+            try:
+                value = self.visit(node.body_node, context)
+            except ContinueSignal:
+                continue
+            except BreakSignal:
+                break
+
+            if not node.should_return_null:
+                elements.append(value)
+
+        return (
+            Number.null if node.should_return_null else
+            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+        )
+
+    def visit_FuncDefNode(self, node, context):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        func_value = SignalFunction(func_name, node.body_node, arg_names, node.should_auto_return).set_context(
+            context).set_pos(node.pos_start, node.pos_end)
+        if node.memoize:
+            func_value = MemoFunction(func_value)
+
+        if node.var_name_tok:
+            context.symbol_table.set(func_name, func_value)
+
+        return func_value
+
+    def visit_CallNode(self, node, context):
+        value_to_call = self.visit(node.node_to_call, context)
+        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+        args = [self.visit(arg_node, context) for arg_node in node.arg_nodes]
+
+        # 尾调用交由所在函数的 SignalFunction.call 在循环中执行
+        if node.is_tail and type(value_to_call) is SignalFunction:
+            return TailCall(value_to_call, args)
+
+        return_value = value_to_call.call(args)
+        return return_value
+
+    def visit_ReturnNode(self, node, context):
+        if node.node_to_return:
+            value = self.visit(node.node_to_return, context)
+        else:
+            value = Number.null
+        raise ReturnSignal(value)
+
+    def visit_ContinueNode(self, node, context):
+        raise ContinueSignal()
+
+    def visit_BreakNode(self, node, context):
+        raise BreakSignal()
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.values import Number, String, List, SignalFunction, MemoFunction, TailCall
+from util.error import RTError
+from util.operations import BINARY_OPERATIONS, NUMBER_OPERATIONS, binary_method_name, unary_operation, binary_error, unary_error
+from util.signals import RTErrorSignal, ReturnSignal, BreakSignal, ContinueSignal, signal_result
@@ -0,0 +1,331 @@
+#######################################
+# STACK INTERPRETER
+# 以显式栈驱动的解释器：各 visit 方法是生成器，需要子结点的值时 yield (子结点, 上下文)，
+# 由 execute 中的循环对子结点求值后再把值 send 回去。尚未完成的求值过程都存放于堆上的生成器栈中，
+# 不占用 python 调用栈，嵌套再深的表达式、递归再深的 mendax 函数都不会引发 RecursionError
+# mendax 函数的调用深度由 recursion_limit 限制，超出时报出 RTError
+# 错误与 RETURN / BREAK / CONTINUE 与 SignalInterpreter 一样以 util/signals.py 中的异常传递，
+# 由 execute 逐个 throw 给栈中的上一个生成器
+#######################################
+
+RECURSION_LIMIT = 10000  # mendax 函数调用的默认最大深度
+
+
+class StackInterpreter:
+    def __init__(self, recursion_limit=None):
+        self.recursion_limit = RECURSION_LIMIT if recursion_limit is None else recursion_limit
+        self.depth = 0  # 当前 mendax 函数调用的深度
+
+    # 叶结点的 visit 直接返回 Value，其余结点的 visit 返回生成器
+    def visit(self, node, context):
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        return method(node, context)
+
+    def no_visit_method(self, node, context):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    # 执行整个程序，结果转换为 RTResult
+    def run(self, node, context):
+        # 全局变量（node.is_global）直接读取全局符号表，递归很深时不必沿很长的调用链逐层查找
+        Resolver().resolve_program(node)
+        return signal_result(self.evaluate, node, context)
+
+    # 求 node 的值
+    def evaluate(self, node, context):
+        result = self.visit(node, context)
+        if type(result) is not GeneratorType:
+            return result
+        return self.execute(result)
+
+    # 在 StackInterpreter 之外（例如内建函数）调用 StackFunction，返回函数的返回值
+    # 函数与内建函数交替递归时，每一层内建函数都占用 python 调用栈；python 调用栈耗尽时同样报出超出最大递归深度
+    def call(self, func, args):
+        try:
+            return self.execute(self.call_function(func, args))
+        except RecursionError:
+            raise RTErrorSignal(RTError(
+                func.pos_start, func.pos_end,
+                'Maximum recursion depth exceeded',
+                func.context
+            ))
+
+    # 驱动生成器 generator 直至其返回，返回其返回值
+    def execute(self, generator):
+        stack = [generator]  # 尚未完成求值的生成器，栈顶为当前正在求值的结点
+        value = None  # 送回栈顶生成器的值
+        signal = None  # 抛给栈顶生成器的异常
+
+        while True:
+            generator = stack[-1]
+            try:
+                if signal is None:
+                    child_node, child_context = generator.send(value)
+                else:
+                    thrown, signal = signal, None
+                    child_node, child_context = generator.throw(thrown)
+            except StopIteration as stop:
+                # 栈顶结点求值完毕，把值送回上一个生成器
+                stack.pop()
+                if not stack:
+                    return stop.value
+                value = stop.value
+                continue
+            except SIGNALS as raised:
+                # 栈顶结点没有处理的错误、跳转，交给上一个生成器
+                stack.pop()
+                if not stack:
+                    raise
+                signal = raised.with_traceback(None)
+                continue
+
+            # 栈顶生成器请求对子结点求值
+            try:
+                result = self.visit(child_node, child_context)
+            except SIGNALS as raised:
+                signal = raised.with_traceback(None)
+                continue
+
+            if type(result) is GeneratorType:
+                stack.append(result)
+                value = None
+            else:
+                value = result
+
+    # 执行 mendax 函数，返回其返回值；返回值为尾调用时，在此循环中接着执行被调用的函数
+    def call_function(self, func, args):
+        if self.depth >= self.recursion_limit:
+            raise RTErrorSignal(RTError(
+                func.pos_start, func.pos_end,
+                'Maximum recursion depth exceeded',
+                func.context
+            ))
+
+        self.depth += 1
+        try:
+            while True:
+                exec_ctx = func.generate_new_context()
+
+                res = func.check_args(func.arg_names, args)
+                if res.error:
+                    raise RTErrorSignal(res.error)
+                func.populate_args(func.arg_names, args, exec_ctx)
+
+                try:
+                    value = yield func.body_node, exec_ctx
+                    if not func.should_auto_return:
+                        value = Number.null
+                except ReturnSignal as signal:
+                    value = signal.value
+
+                if type(value) is not TailCall:
+                    return value
+                func, args = value.func, value.args
+                func.skip_caller_context(exec_ctx, func.arg_names, args)
+        finally:
+            self.depth -= 1
+
+    ###################################
+
+    def visit_NumberNode(self, node, context):
+        return Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_StringNode(self, node, context):
+        return String(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_ListNode(self, node, context):
+        elements = []
+        for element_node in node.element_nodes:
+            elements.append((yield element_node, context))
+        return List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_VarAccessNode(self, node, context):
+        var_name = node.var_name_tok.value
+        if node.is_global and var_name not in SymbolTable.local_names:
+            value = global_symbol_table.symbols.get(var_name)
+        else:
+            value = node.cache.get(context.symbol_table)
+
+        if not value:
+            raise RTErrorSignal(RTError(
+                node.pos_start, node.pos_end,
+                f"'{var_name}' is not defined",
+                context
+            ))
+
+        # 值创建后不再被修改，直接共享
+        return value
+
+    def visit_VarAssignNode(self, node, context):
+        value = yield node.value_node, context
+        context.symbol_table.set(node.var_name_tok.value, value)
+        return value
+
+    def visit_BinOpNode(self, node, context):
+        left = yield node.left_node, context
+        right = yield node.right_node, context
+
+        method_name = binary_method_name(node.op_tok)
+        # 两个操作数都是 Number 时直接对 python 数值运算（见 Interpreter.visit_BinOpNode）
+        if type(left) is Number and type(right) is Number:
+            try:
+                return Number(NUMBER_OPERATIONS[method_name](left.value, right.value))
+            except ZeroDivisionError:
+                pass
+
+        operation = BINARY_OPERATIONS[method_name]
+        result, error = operation(left, right)
+        if error:
+            raise RTErrorSignal(binary_error(operation, left, right, node.left_node, node.right_node, context))
+        return result
+
+    def visit_UnaryOpNode(self, node, context):
+        number = yield node.node, context
+
+        operation = unary_operation(node.op_tok)
+        result, error = operation(number)
+        if error:
+            raise RTErrorSignal(unary_error(operation, number, node.node, context))
+        return result
+
+    def visit_IfNode(self, node, context):
+        for condition, expr, should_return_null in node.cases:
+            condition_value = yield condition, context
+            if condition_value.is_true():
+                expr_value = yield expr, context
+                return Number.null if should_return_null else expr_value
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            expr_value = yield expr, context
+            return Number.null if should_return_null else expr_value
+
+        return Number.null
+
+    def visit_ForNode(self, node, context):
+        elements = []
+
+        start_value = yield node.start_value_node, context
+        end_value = yield node.end_value_node, context
+        if node.step_value_node:
+            step_value = yield node.step_value_node, context
+        else:
+            step_value = Number(1)
+
+        i = start_value.value
+        end = end_value.value
+        step = step_value.value
+        ascending = step >= 0  # 若设置的 STEP 值大于 0，则从小到大累加
+
+        while (i < end) if ascending else (i > end):
+            context.symbol_table.set(node.var_name_tok.value, Number(i))
+            i += step
+
+            # 循环体内（包括被调用的函数中）的 CONTINUE / BREAK 在此捕获
+            try:
+                value = yield node.body_node, context
+            except ContinueSignal:
+                continue
+            except BreakSignal:
+                break
+
+            if not node.should_return_null:
+                elements.append(value)
+
+        return (
+            Number.null if node.should_return_null else
+            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+        )
+
+    def visit_WhileNode(self, node, context):
+        elements = []
+
+        # 条件在 try 之外求值，其中的 CONTINUE / BREAK 作用于外层循环
+        while True:
+            condition_value = yield node.condition_node, context
+            if not condition_value.is_true():
+                break
+
+            try:
+                value = yield node.body_node, context
+            except ContinueSignal:
+                continue
+            except BreakSignal:
+                break
+
+            if not node.should_return_null:
+                elements.append(value)
+
+        return (
+            Number.null if node.should_return_null else
+            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+        )
+
+    def visit_FuncDefNode(self, node, context):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        func_value = StackFunction(func_name, node.body_node, arg_names, node.should_auto_return, self).set_context(
+            context).set_pos(node.pos_start, node.pos_end)
+        if node.memoize:
+            func_value = MemoFunction(func_value)
+
+        if node.var_name_tok:
+            context.symbol_table.set(func_name, func_value)
+
+        return func_value
+
+    def visit_CallNode(self, node, context):
+        value_to_call = yield node.node_to_call, context
+        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+        args = []
+        for arg_node in node.arg_nodes:
+            args.append((yield arg_node, context))
+
+        if type(value_to_call) is MemoFunction and type(value_to_call.func) is StackFunction:
+            # 记忆化的 StackFunction：命中缓存时直接返回结果，否则同样在生成器栈中执行，返回时再存入缓存
+            # 出错、BREAK / CONTINUE 以异常穿过 call_function，不会存入缓存
+            key = memo_key(args)
+            if key is not None:
+                value = value_to_call.cache.get(key)
+                if value is not None:
+                    return value
+            return_value = yield from self.call_function(value_to_call.wrapped(), args)
+            if key is not None:
+                return_value = value_to_call.cache.put(key, return_value)
+        elif type(value_to_call) is not StackFunction:
+            return_value = value_to_call.call(args)
+        elif node.is_tail:
+            # 尾调用交由所在函数的 call_function 在循环中执行
+            return TailCall(value_to_call, args)
+        else:
+            # 函数体的求值过程同样压入生成器栈，而不是在 python 调用栈上递归
+            return_value = yield from self.call_function(value_to_call, args)
+        return return_value
+
+    def visit_ReturnNode(self, node, context):
+        if node.node_to_return:
+            value = yield node.node_to_return, context
+        else:
+            value = Number.null
+        raise ReturnSignal(value)
+
+    def visit_ContinueNode(self, node, context):
+        raise ContinueSignal()
+
+    def visit_BreakNode(self, node, context):
+        raise BreakSignal()
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from types import GeneratorType
+
+from basic.resolver import Resolver
+from basic.run import global_symbol_table
+from util.symbol_table import SymbolTable
+from util.values import Number, String, List, StackFunction, MemoFunction, TailCall, memo_key
+from util.error import RTError
+from util.operations import BINARY_OPERATIONS, NUMBER_OPERATIONS, binary_method_name, unary_operation, binary_error, unary_error
+from util.signals import RTErrorSignal, ReturnSignal, BreakSignal, ContinueSignal, SIGNALS, signal_result
@@ -0,0 +1,57 @@
+#######################################
+# TAIL CALLS
+# 尾调用分析：标记处于尾部位置的函数调用（node.is_tail），其返回值就是所在函数的返回值
+# 执行时尾调用不再嵌套一层新的执行过程，而是把被调用的函数与参数（TailCall）交还给所在函数的 execute，
+# 由其在同一个循环中继续执行，递归再深也不会占用更多的 python 调用栈
+# 上下文链仍按动态作用域保留；调用者的局部变量全部被形参遮蔽时（例如尾递归），调用者的上下文被略过，
+# 见 BaseFunction.skip_caller_context；VM 的帧本就存放于堆上，尾调用时以新帧取代当前帧（TAIL_CALL）
+#######################################
+
+
+# 标记整个程序中的尾调用；返回 node
+def mark_tail_calls(node):
+    nodes = [node]
+
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, FuncDefNode):
+            # 箭头函数 FUN f() -> expr 自动返回 expr 的值
+            if node.should_auto_return:
+                mark_tail_position(node.body_node)
+            # 函数体内的 RETURN expr；程序顶层的 RETURN 不属于任何函数，不作标记
+            mark_returns(node.body_node)
+        nodes.extend(child_nodes(node))
+
+    return node
+
+
+# 标记当前函数体内（不进入嵌套函数）RETURN 的返回值
+def mark_returns(node):
+    nodes = [node]
+
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, FuncDefNode):
+            continue
+        if isinstance(node, ReturnNode) and node.node_to_return:
+            mark_tail_position(node.node_to_return)
+        nodes.extend(child_nodes(node))
+
+
+# node 的值即为函数的返回值：函数调用是尾调用；IF 各分支的值即为 IF 的值（返回 Number.null 的分支除外）
+def mark_tail_position(node):
+    if isinstance(node, CallNode):
+        node.is_tail = True
+    elif isinstance(node, IfNode):
+        for _, expr, should_return_null in node.cases:
+            if not should_return_null:
+                mark_tail_position(expr)
+        if node.else_case and not node.else_case[1]:
+            mark_tail_position(node.else_case[0])
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.nodes import *
@@ -0,0 +1,394 @@
+#######################################
+# TRANSPILER
+# 转译器：把 AST 转译为 python 源码，经 compile 得到 python 的代码对象后由 exec 执行
+# mendax 函数转译为 python 函数，FOR / WHILE 转译为 python 原生的 while 循环
+# 每个结点的值存放于临时变量 t1, t2 ... 中，表达式中的 BREAK / CONTINUE / RETURN 因此可以直接转译为语句
+#######################################
+
+# 转译结果按 (文件名, 源码, ...) 缓存，重复运行同一段脚本时跳过词法分析、语法分析与转译
+PROGRAM_CACHE_SIZE = 128
+program_cache = {}
+
+
+def cached_program(key):
+    return program_cache.get(key)
+
+
+def cache_program(key, program):
+    if len(program_cache) >= PROGRAM_CACHE_SIZE:
+        del program_cache[next(iter(program_cache))]  # 淘汰最早缓存的程序
+    program_cache[key] = program
+
+
+# 函数的编译期信息，供 PythonFunction 在调用时创建上下文、传入参数
+class FunctionInfo:
+    def __init__(self, name, arg_names, slot_map, arg_slots):
+        self.name = name
+        self.arg_names = arg_names
+        self.slot_map = slot_map  # 局部变量名 -> 槽位下标
+        self.slot_count = len(slot_map)
+        self.arg_slots = arg_slots  # 形参依次对应的槽位
+
+
+# 转译结果
+class PythonProgram:
+    def __init__(self, code, positions, consts, source):
+        self.code = code  # python 代码对象
+        self.positions = positions  # 位置表，生成的代码以 P[i] 引用，报错时定位到 mendax 源码
+        self.consts = consts  # 常量表，生成的代码以 C[i] 引用
+        self.source = source  # 生成的 python 源码，便于调试
+
+    def run(self, context):
+        namespace = {
+            'P': self.positions, 'C': self.consts, 'G': global_symbol_table.symbols, 'L': SymbolTable.local_names,
+            'Number': Number, 'String': String, 'List': List, 'PythonFunction': PythonFunction, 'MemoFunction': MemoFunction,
+            'RTErrorSignal': RTErrorSignal, 'BreakSignal': BreakSignal, 'ContinueSignal': ContinueSignal,
+            'load_name': load_name, 'call': call, 'tail_call': tail_call,
+            'binary_error': binary_error, 'unary_error': unary_error,
+        }
+        exec(self.code, namespace)
+        return signal_result(namespace['_program'], context)
+
+
+class Transpiler:
+    def __init__(self):
+        self.positions = []
+        self.consts = []
+        self.functions = []  # 已生成的各个 python 函数的源码
+        self.function_count = 0
+        self.lines = None  # 当前函数的源码行
+        self.indent = 0
+        self.temp_count = 0
+        self.in_function = False  # 程序顶层为 False，变量存放于符号表中
+        self.in_loop = False  # 当前位置是否直接处于循环体内，是则 BREAK / CONTINUE 可转译为 python 的 break / continue
+
+    # 转译整个程序
+    def transpile_program(self, node):
+        Resolver().resolve_program(node)
+        self.begin_function('_program', 'context')
+        value = self.transpile(node)
+        self.emit(f'return {value}')
+        self.end_function()
+
+        source = '\n\n'.join(self.functions)
+        code = compile(source, '<mendax>', 'exec')
+        return PythonProgram(code, self.positions, self.consts, source)
+
+    # 转译结点：生成计算该结点的语句，返回存放其值的 python 表达式（临时变量名或无副作用的字面量表达式）
+    def transpile(self, node):
+        method_name = f'transpile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_transpile_method)
+        return method(node)
+
+    def no_transpile_method(self, node):
+        raise Exception(f'No transpile_{type(node).__name__} method defined')
+
+    def emit(self, line):
+        self.lines.append('    ' * self.indent + line)
+
+    def new_temp(self):
+        self.temp_count += 1
+        return f't{self.temp_count}'
+
+    # 登记结点的位置，返回形如 'P[0], P[1]' 的 pos_start, pos_end 参数
+    def pos(self, node):
+        index = len(self.positions)
+        self.positions.extend([node.pos_start, node.pos_end])
+        return f'P[{index}], P[{index + 1}]'
+
+    def add_const(self, value):
+        self.consts.append(value)
+        return f'C[{len(self.consts) - 1}]'
+
+    def begin_function(self, name, params):
+        self.lines = [f'def {name}({params}):']
+        self.indent = 1
+        self.temp_count = 0
+
+    def end_function(self):
+        self.functions.append('\n'.join(self.lines))
+
+    # 读取变量（依据 basic/resolver.py 的解析结果）：局部变量读取槽位，全局变量直接读取全局符号表 G
+    # （名称在之后的程序中于全局符号表以外绑定过、即在 L 中时除外），
+    # 未取到值时（局部变量尚未赋值、变量未定义、名称在 L 中）按名称沿符号表链查找或报错
+    def emit_load(self, node):
+        var_name = node.var_name_tok.value
+        temp = self.new_temp()
+        pos = self.pos(node)
+        cache = self.add_const(node.cache)
+        if node.slot is not None:
+            self.emit(f'{temp} = S[{node.slot}]')
+            self.emit(f'if {temp} is None: {temp} = load_name(context, {cache}, {pos})')
+        elif node.is_global:
+            self.emit(f'{temp} = G.get({var_name!r}) if {var_name!r} not in L else None')
+            self.emit(f'if {temp} is None: {temp} = load_name(context, {cache}, {pos})')
+        else:
+            self.emit(f'{temp} = load_name(context, {cache}, {pos})')
+        return temp
+
+    def emit_store(self, var_name, slot, value):
+        if slot is not None:
+            self.emit(f'S[{slot}] = {value}')
+        else:
+            self.emit(f'context.symbol_table.set({var_name!r}, {value})')
+
+    # 可能抛出错误的 Value 运算：result, error = ...；出错时求值 error 表达式得到带有操作数位置的错误
+    def emit_operation(self, expr, error):
+        temp = self.new_temp()
+        self.emit(f'{temp}, e = {expr}')
+        self.emit(f'if e: raise RTErrorSignal({error})')
+        return temp
+
+    ###################################
+
+    # 字面量的值在转译期创建一次，存入常量表，每次执行都读取同一个值
+    def transpile_NumberNode(self, node):
+        return self.add_const(Number(node.tok.value).set_pos(node.pos_start, node.pos_end))
+
+    def transpile_StringNode(self, node):
+        return self.add_const(String(node.tok.value).set_pos(node.pos_start, node.pos_end))
+
+    def transpile_ListNode(self, node):
+        elements = [self.transpile(element_node)
+                    for element_node in node.element_nodes]
+        temp = self.new_temp()
+        self.emit(
+            f'{temp} = List([{", ".join(elements)}]).set_context(context).set_pos({self.pos(node)})')
+        return temp
+
+    def transpile_VarAccessNode(self, node):
+        return self.emit_load(node)
+
+    def transpile_VarAssignNode(self, node):
+        value = self.materialize(self.transpile(node.value_node))
+        self.emit_store(node.var_name_tok.value, node.slot, value)
+        return value
+
+    # 二元操作：直接调用运算符对应的 Value 方法
+    def transpile_BinOpNode(self, node):
+        left = self.materialize(self.transpile(node.left_node))
+        right = self.transpile(node.right_node)
+        method_name = binary_method_name(node.op_tok)
+        operation = self.add_const(binary_operation(node.op_tok))
+        left_node, right_node = self.add_const(node.left_node), self.add_const(node.right_node)
+        return self.emit_operation(
+            f'{left}.{method_name}({right})',
+            f'binary_error({operation}, {left}, {right}, {left_node}, {right_node}, context)')
+
+    def transpile_UnaryOpNode(self, node):
+        number = self.transpile(node.node)
+        error = f'unary_error({self.add_const(unary_operation(node.op_tok))}, {number}, {self.add_const(node.node)}, context)'
+        if node.op_tok.type == TT_MINUS:
+            return self.emit_operation(f'{number}.multed_by(Number(-1))', error)
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            return self.emit_operation(f'{number}.notted()', error)
+        return number
+
+    # IF 条件表达式：后续分支的条件须在前一分支不成立时才求值，故逐层嵌套于 else 中
+    def transpile_IfNode(self, node):
+        temp = self.new_temp()
+        indent = self.indent
+
+        for condition, expr, should_return_null in node.cases:
+            condition_value = self.transpile(condition)
+            self.emit(f'if {condition_value}.is_true():')
+            self.indent += 1
+            self.transpile_branch(temp, expr, should_return_null)
+            self.indent -= 1
+            self.emit('else:')
+            self.indent += 1
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            self.transpile_branch(temp, expr, should_return_null)
+        else:
+            self.emit(f'{temp} = Number.null')
+
+        self.indent = indent
+        return temp
+
+    def transpile_branch(self, temp, expr, should_return_null):
+        value = self.transpile(expr)
+        self.emit(f'{temp} = Number.null' if should_return_null else f'{temp} = {value}')
+
+    # FOR 循环：计数器为 python 的数值，每一轮才包装为 Number 存入循环变量
+    def transpile_ForNode(self, node):
+        start = self.materialize(self.transpile(node.start_value_node))
+        end = self.materialize(self.transpile(node.end_value_node))
+        step = self.transpile(
+            node.step_value_node) if node.step_value_node else None
+
+        i, end_value, step_value, elements = self.new_temp(), self.new_temp(), self.new_temp(), self.new_temp()
+        self.emit(f'{i} = {start}.value')
+        self.emit(f'{end_value} = {end}.value')
+        self.emit(f'{step_value} = {step}.value' if step else f'{step_value} = 1')
+        self.emit(f'{elements} = []')
+
+        # 若设置的 STEP 值大于 0，则从小到大累加
+        ascending = self.new_temp()
+        self.emit(f'{ascending} = {step_value} >= 0')
+        self.emit(f'while ({i} < {end_value}) if {ascending} else ({i} > {end_value}):')
+        self.indent += 1
+        self.emit_store(node.var_name_tok.value, node.slot, f'Number({i})')
+        self.emit(f'{i} += {step_value}')
+        self.transpile_loop_body(node, elements)
+        self.indent -= 1
+
+        return self.loop_value(node, elements)
+
+    # WHILE 循环：条件在循环体之外求值，其中的 BREAK / CONTINUE 作用于外层循环
+    def transpile_WhileNode(self, node):
+        elements = self.new_temp()
+        self.emit(f'{elements} = []')
+
+        outer_in_loop = self.in_loop
+        if outer_in_loop:
+            # 条件中的跳转以异常抛出，由包裹整个循环的 try 交给外层循环处理
+            self.emit('try:')
+            self.indent += 1
+
+        self.emit('while True:')
+        self.indent += 1
+        self.in_loop = False
+        condition = self.transpile(node.condition_node)
+        self.in_loop = outer_in_loop
+        self.emit(f'if not {condition}.is_true(): break')
+        self.transpile_loop_body(node, elements)
+        self.indent -= 1
+
+        if outer_in_loop:
+            self.indent -= 1
+            self.emit_loop_signal_handlers()
+
+        return self.loop_value(node, elements)
+
+    def transpile_loop_body(self, node, elements):
+        outer_in_loop, self.in_loop = self.in_loop, True
+        value = self.transpile(node.body_node)
+        self.in_loop = outer_in_loop
+        # 返回 Number.null 的循环无需收集每一轮的值
+        if not node.should_return_null:
+            self.emit(f'{elements}.append({value})')
+
+    def loop_value(self, node, elements):
+        if node.should_return_null:
+            return 'Number.null'
+        temp = self.new_temp()
+        self.emit(
+            f'{temp} = List({elements}).set_context(context).set_pos({self.pos(node)})')
+        return temp
+
+    # 被调用的函数体内的 BREAK / CONTINUE 以异常抛出，作用于调用处所在的循环
+    def emit_loop_signal_handlers(self):
+        self.emit('except BreakSignal:')
+        self.emit('    break')
+        self.emit('except ContinueSignal:')
+        self.emit('    continue')
+
+    # 函数定义：函数体转译为独立的 python 函数 body(context, S)，S 为局部变量槽位
+    def transpile_FuncDefNode(self, node):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+
+        info = FunctionInfo(func_name, arg_names,
+                            node.scope.slot_map, node.scope.arg_slots)
+        self.function_count += 1
+        body_name = f'_fn{self.function_count}'
+
+        saved = self.lines, self.indent, self.temp_count, self.in_function, self.in_loop
+        self.begin_function(body_name, 'context, S')
+        self.in_function = True
+        self.in_loop = False
+        value = self.transpile(node.body_node)
+        self.emit(f'return {value}' if node.should_auto_return else 'return Number.null')
+        self.end_function()
+        self.lines, self.indent, self.temp_count, self.in_function, self.in_loop = saved
+
+        temp = self.new_temp()
+        self.emit(f'{temp} = PythonFunction({self.add_const(info)}, {body_name})'
+                  f'.set_context(context).set_pos({self.pos(node)})')
+        if node.memoize:
+            self.emit(f'{temp} = MemoFunction({temp})')
+        if func_name:
+            self.emit_store(func_name, node.slot, temp)
+        return temp
+
+    def transpile_CallNode(self, node):
+        value_to_call = self.materialize(self.transpile(node.node_to_call))
+        args = [self.materialize(self.transpile(arg_node))
+                for arg_node in node.arg_nodes]
+        temp = self.new_temp()
+        # 尾调用由 tail_call 交给所在函数的 PythonFunction.call 在循环中执行
+        helper = 'tail_call' if node.is_tail else 'call'
+        line = f'{temp} = {helper}({value_to_call}, [{", ".join(args)}], {self.pos(node)}, context)'
+
+        if self.in_loop:
+            self.emit('try:')
+            self.emit('    ' + line)
+            self.emit_loop_signal_handlers()
+        else:
+            self.emit(line)
+        return temp
+
+    # 函数体内转译为 python 的 return；程序顶层的 RETURN 使程序的结果为 None
+    def transpile_ReturnNode(self, node):
+        value = self.transpile(
+            node.node_to_return) if node.node_to_return else 'Number.null'
+        self.emit(f'return {value}' if self.in_function else 'return None')
+        return 'None'
+
+    def transpile_ContinueNode(self, node):
+        self.emit('continue' if self.in_loop else 'raise ContinueSignal()')
+        return 'None'
+
+    def transpile_BreakNode(self, node):
+        self.emit('break' if self.in_loop else 'raise BreakSignal()')
+        return 'None'
+
+    # 字面量表达式会延迟到使用处才求值；若其后还有语句（例如另一操作数）则先存入临时变量，保持求值顺序
+    def materialize(self, value):
+        if value.isidentifier():
+            return value
+        temp = self.new_temp()
+        self.emit(f'{temp} = {value}')
+        return temp
+
+
+# 运行期辅助函数，供生成的代码调用
+
+# 按名称从符号表中读取变量，cache 为变量访问结点的 LookupCache
+def load_name(context, cache, pos_start, pos_end):
+    value = cache.get(context.symbol_table)
+    if not value:
+        raise RTErrorSignal(RTError(
+            pos_start, pos_end,
+            f"'{cache.name}' is not defined",
+            context
+        ))
+    return value
+
+
+# 函数调用，与 Interpreter.visit_CallNode 一致
+def call(value_to_call, args, pos_start, pos_end, context):
+    return value_to_call.copy().set_pos(pos_start, pos_end).set_context(context).call(args)
+
+
+# 尾调用：被调用的是转译生成的函数时，返回 TailCall 交由所在函数执行
+def tail_call(value_to_call, args, pos_start, pos_end, context):
+    if type(value_to_call) is PythonFunction:
+        return TailCall(value_to_call.copy().set_pos(pos_start, pos_end).set_context(context), args)
+    return call(value_to_call, args, pos_start, pos_end, context)
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from basic.resolver import Resolver
+from basic.run import global_symbol_table
+from util.symbol_table import SymbolTable
+from data.tokens import *
+from util.error import RTError
+from util.operations import binary_method_name, binary_operation, unary_operation, binary_error, unary_error
+from util.signals import RTErrorSignal, BreakSignal, ContinueSignal, signal_result
+from util.values import Number, String, List, PythonFunction, MemoFunction, TailCall
@@ -0,0 +1,44 @@
+#######################################
+# USAGE
+# 值的使用分析：找出值不会被使用的循环，例如多行函数体中的循环、多行循环体内的循环、多行 IF 分支中的循环，
+# 把它们标记为 should_return_null。执行时这样的循环不再把每一轮循环体的值收集为 List，
+# 与多行 FOR / WHILE 一样返回 Number.null（反正无人读取），循环再长内存占用也是 O(1)
+#######################################
+
+
+# 分析整个程序；程序顶层各语句的值组成程序的执行结果，都被使用；返回 node
+def mark_unused_loops(node):
+    nodes = [(node, True)]  # (结点, 其值是否被使用)
+
+    while nodes:
+        node, used = nodes.pop()
+
+        if isinstance(node, ListNode):
+            nodes.extend((element_node, used) for element_node in node.element_nodes)
+        elif isinstance(node, (ForNode, WhileNode)):
+            if not used:
+                node.should_return_null = True
+            # 循环体的值只在循环收集结果时被使用
+            for child_node in child_nodes(node):
+                nodes.append((child_node, child_node is not node.body_node or not node.should_return_null))
+        elif isinstance(node, IfNode):
+            for condition, expr, should_return_null in node.cases:
+                nodes.append((condition, True))
+                nodes.append((expr, used and not should_return_null))
+            if node.else_case:
+                expr, should_return_null = node.else_case
+                nodes.append((expr, used and not should_return_null))
+        elif isinstance(node, FuncDefNode):
+            # 多行函数的函数体的值被丢弃，只有 RETURN 的值被返回
+            nodes.append((node.body_node, node.should_auto_return))
+        else:
+            nodes.extend((child_node, True) for child_node in child_nodes(node))
+
+    return node
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.nodes import *
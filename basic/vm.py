@@ -0,0 +1,422 @@
+#######################################
+# VM
+# 字节码虚拟机：用显式的帧栈执行 basic/bytecode.py 编译出的 Code
+# 调用 mendax 函数只是压入一个新帧，不再为每次调用新建 Interpreter 或占用 python 调用栈
+#######################################
+
+
+# 栈帧
+class Frame:
+    def __init__(self, code, context, slots=None):
+        self.code = code
+        self.context = context
+        self.slots = slots  # 局部变量槽位；程序顶层为 None，变量存放于符号表中
+        self.ip = 0  # 下一条指令的下标
+        self.stack = []  # 操作数栈
+        self.blocks = []  # 循环块栈：(CONTINUE 目标, BREAK 目标, 操作数栈高度, 循环体起点)
+        self.memo = None  # 记忆化函数未命中缓存的调用：(MemoCache, 参数的键)，返回时把返回值存入缓存
+
+
+# 循环状态（FOR 循环的计数器与收集到的值）
+class Loop:
+    def __init__(self, i=None, end=None, step=None):
+        self.i = i
+        self.end = end
+        self.step = step
+        self.elements = []
+
+
+class VM:
+    def __init__(self, recursion_limit=None):
+        # mendax 函数调用的最大深度，即帧栈的最大长度
+        self.recursion_limit = RECURSION_LIMIT if recursion_limit is None else recursion_limit
+        # 外层 execute 的帧数：内建函数（MAP 等）回调本 VM 中的函数时，新的帧栈接在外层的帧栈之上，共用调用深度
+        self.depth = 0
+
+    # 执行整个程序
+    def run(self, code, context):
+        return self.execute(Frame(code, context))
+
+    # 在 VM 之外（例如内建函数）调用由 VM 编译的函数
+    # 函数与内建函数交替递归时，每一层内建函数都占用 python 调用栈；python 调用栈耗尽时同样报出超出最大递归深度
+    def call(self, func, args):
+        if self.depth > self.recursion_limit:
+            return self.recursion_error(func)
+        frame, error = self.make_frame(func, args)
+        if error:
+            return RTResult().failure(error)
+        try:
+            return self.execute(frame)
+        except RecursionError:
+            return self.recursion_error(func)
+
+    @staticmethod
+    def recursion_error(func):
+        return RTResult().failure(RTError(
+            func.pos_start, func.pos_end,
+            'Maximum recursion depth exceeded',
+            func.context
+        ))
+
+    # 为函数调用准备新帧，与 Function.execute 中上下文、参数的处理一致
+    def make_frame(self, func, args):
+        code = func.code
+        slots = [None] * len(code.slot_names)
+        exec_ctx = func.generate_new_slot_context(code.slot_map, slots)
+
+        res = func.check_args(code.arg_names, args)
+        if res.error:
+            return None, res.error
+
+        for i in range(len(args)):
+            slots[code.arg_slots[i]] = args[i]
+
+        return Frame(code, exec_ctx, slots), None
+
+    # 执行 frame 直至其返回
+    def execute(self, base_frame):
+        frames = [base_frame]
+        frame = base_frame
+        code = frame.code
+        instructions = code.instructions
+        consts = code.consts
+        stack = frame.stack
+        context = frame.context
+        slots = frame.slots
+        ip = frame.ip
+        global_symbols = global_symbol_table.symbols
+        local_names = SymbolTable.local_names
+        depth = self.depth
+
+        while True:
+            op = instructions[ip]
+            arg = instructions[ip + 1]
+            ip += 2
+
+            if op == LOAD_LOCAL:
+                value = slots[arg]
+                if value is None:
+                    # 局部变量尚未赋值，按名称向调用者的符号表查找
+                    value = context.symbol_table.get(code.slot_names[arg])
+                if not value:
+                    pos_start, pos_end = code.positions[(ip - 2) >> 1]
+                    return RTResult().failure(RTError(
+                        pos_start, pos_end,
+                        f"'{code.slot_names[arg]}' is not defined",
+                        context
+                    ))
+                stack.append(value)
+
+            elif op == LOAD_GLOBAL:
+                cache = consts[arg]
+                if cache.name in local_names:
+                    value = cache.get(context.symbol_table)
+                else:
+                    value = global_symbols.get(cache.name)
+                if value is None:
+                    pos_start, pos_end = code.positions[(ip - 2) >> 1]
+                    return RTResult().failure(RTError(
+                        pos_start, pos_end,
+                        f"'{cache.name}' is not defined",
+                        context
+                    ))
+                stack.append(value)
+
+            elif op == LOAD_NUMBER:
+                stack.append(consts[arg])
+
+            elif op == BINARY_OP:
+                right = stack.pop()
+                left = stack.pop()
+                result, error = consts[arg](left, right)
+                if error:
+                    left_node, right_node = code.operands[ip - 2]
+                    return RTResult().failure(binary_error(
+                        consts[arg], left, right, left_node, right_node, context))
+                stack.append(result)
+
+            elif op == BINARY_OP_UNBOXED:
+                right = stack.pop()
+                left = stack.pop()
+                number_operation, operation = consts[arg]
+                # 两个操作数都是数字（python 数值或 Number）时直接运算，压入 python 数值
+                left_number = left.value if type(left) is Number else left
+                right_number = right.value if type(right) is Number else right
+                if type(left_number) in NUMBER_TYPES and type(right_number) in NUMBER_TYPES:
+                    try:
+                        stack.append(number_operation(left_number, right_number))
+                        continue
+                    except ZeroDivisionError:
+                        pass  # 由 Number.dived_by 报错
+                left, right = boxed(left), boxed(right)
+                result, error = operation(left, right)
+                if error:
+                    left_node, right_node = code.operands[ip - 2]
+                    return RTResult().failure(binary_error(
+                        operation, left, right, left_node, right_node, context))
+                stack.append(result)
+
+            elif op == LOAD_NAME:
+                cache = consts[arg]
+                value = cache.get(context.symbol_table)
+                if not value:
+                    pos_start, pos_end = code.positions[(ip - 2) >> 1]
+                    return RTResult().failure(RTError(
+                        pos_start, pos_end,
+                        f"'{cache.name}' is not defined",
+                        context
+                    ))
+                stack.append(value)
+
+            elif op == STORE_LOCAL:
+                slots[arg] = stack[-1]
+
+            elif op == STORE_NAME:
+                context.symbol_table.set(code.names[arg], stack[-1])
+
+            elif op == POP_TOP:
+                stack.pop()
+
+            elif op == POP_JUMP_IF_FALSE:
+                if not stack.pop().is_true():
+                    ip = arg
+
+            elif op == POP_JUMP_IF_FALSE_UNBOXED:
+                value = stack.pop()
+                if (value == 0) if type(value) in NUMBER_TYPES else not value.is_true():
+                    ip = arg
+
+            elif op == JUMP:
+                ip = arg
+
+            elif op == FOR_ITER:
+                loop = stack[-1]
+                if (loop.i < loop.end) if loop.step >= 0 else (loop.i > loop.end):
+                    stack.append(Number(loop.i))
+                    loop.i += loop.step
+                else:
+                    ip = arg
+
+            elif op == LOOP_APPEND:
+                value = stack.pop()
+                stack[-1].elements.append(value)
+
+            elif op == LOAD_STRING:
+                stack.append(consts[arg])
+
+            elif op == LOAD_NULL:
+                stack.append(Number.null)
+
+            elif op == UNARY_OP:
+                number = stack.pop()
+                result, error = consts[arg](number)
+                if error:
+                    operand_node, = code.operands[ip - 2]
+                    return RTResult().failure(unary_error(consts[arg], number, operand_node, context))
+                stack.append(result)
+
+            elif op == BOX:
+                if type(stack[-1]) in NUMBER_TYPES:
+                    stack[-1] = Number(stack[-1])
+
+            elif op == UNARY_OP_UNBOXED:
+                number = stack.pop()
+                number_operation, operation = consts[arg]
+                value = number.value if type(number) is Number else number
+                if type(value) in NUMBER_TYPES:
+                    stack.append(number_operation(value))
+                    continue
+                result, error = operation(number)
+                if error:
+                    operand_node, = code.operands[ip - 2]
+                    return RTResult().failure(unary_error(operation, number, operand_node, context))
+                stack.append(result)
+
+            elif op == CALL or op == TAIL_CALL:
+                args = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                pos_start, pos_end = code.positions[(ip - 2) >> 1]
+                value_to_call = stack.pop().copy().set_pos(pos_start, pos_end).set_context(context)
+
+                # 记忆化的 VMFunction：命中缓存时直接压入结果，否则同样压入新帧，返回时再存入缓存
+                memo = None
+                if type(value_to_call) is MemoFunction and type(value_to_call.func) is VMFunction:
+                    key = memo_key(args)
+                    if key is not None:
+                        value = value_to_call.cache.get(key)
+                        if value is not None:
+                            stack.append(value)
+                            continue
+                        memo = value_to_call.cache, key
+                    value_to_call = value_to_call.wrapped()
+                    op = CALL
+                elif op == TAIL_CALL and frame.memo:
+                    # 当前帧返回时要存入缓存，不能被取代
+                    op = CALL
+
+                if isinstance(value_to_call, VMFunction):
+                    if op == CALL and depth + len(frames) > self.recursion_limit:
+                        return RTResult().failure(RTError(
+                            pos_start, pos_end,
+                            'Maximum recursion depth exceeded',
+                            context
+                        ))
+                    if op == TAIL_CALL:
+                        value_to_call.skip_caller_context(context, value_to_call.code.arg_names, args)
+                    new_frame, error = self.make_frame(value_to_call, args)
+                    if error:
+                        return RTResult().failure(error)
+                    new_frame.memo = memo
+                    if op == TAIL_CALL:
+                        # 当前函数已执行完毕，新帧取代当前帧，其返回值直接交给当前帧的调用者
+                        frames.pop()
+                    else:
+                        # 保存当前帧的状态，切换到新帧
+                        frame.ip = ip
+                    frames.append(new_frame)
+                    frame = new_frame
+                    code = frame.code
+                    instructions = code.instructions
+                    consts = code.consts
+                    stack = frame.stack
+                    context = frame.context
+                    slots = frame.slots
+                    ip = 0
+                    continue
+
+                self.depth = depth + len(frames)
+                res = value_to_call.execute(args)
+                self.depth = depth
+                if res.error:
+                    return res
+                if res.loop_should_continue or res.loop_should_break:
+                    # 函数内的 CONTINUE / BREAK 会作用于调用者所在的循环
+                    frame = self.unwind_loop(
+                        frames, res.loop_should_continue, ip)
+                    if not frame:
+                        return res
+                    code = frame.code
+                    instructions = code.instructions
+                    consts = code.consts
+                    stack = frame.stack
+                    context = frame.context
+                    slots = frame.slots
+                    ip = frame.ip
+                else:
+                    stack.append(res.value)
+
+            elif op == BUILD_LIST:
+                elements = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                pos_start, pos_end = code.positions[(ip - 2) >> 1]
+                stack.append(List(elements).set_context(
+                    context).set_pos(pos_start, pos_end))
+
+            elif op == SETUP_LOOP:
+                break_target, body_start = consts[arg]
+                frame.blocks.append((ip, break_target, len(stack), body_start))
+
+            elif op == POP_BLOCK:
+                frame.blocks.pop()
+
+            elif op == FOR_SETUP:
+                step_value = stack.pop()
+                end_value = stack.pop()
+                start_value = stack.pop()
+                stack.append(
+                    Loop(start_value.value, end_value.value, step_value.value))
+
+            elif op == WHILE_SETUP:
+                stack.append(Loop())
+
+            elif op == LOOP_END:
+                loop = stack.pop()
+                if arg:
+                    stack.append(Number.null)
+                else:
+                    pos_start, pos_end = code.positions[(ip - 2) >> 1]
+                    stack.append(List(loop.elements).set_context(
+                        context).set_pos(pos_start, pos_end))
+
+            elif op == MAKE_FUNCTION:
+                func_code = consts[arg]
+                pos_start, pos_end = code.positions[(ip - 2) >> 1]
+                func_value = VMFunction(func_code.name, func_code, self).set_context(
+                    context).set_pos(pos_start, pos_end)
+                stack.append(MemoFunction(func_value) if func_code.memoize else func_value)
+
+            elif op == CONTINUE_LOOP or op == BREAK_LOOP:
+                frame = self.unwind_loop(frames, op == CONTINUE_LOOP, ip)
+                if not frame:
+                    res = RTResult()
+                    return res.success_continue() if op == CONTINUE_LOOP else res.success_break()
+                code = frame.code
+                instructions = code.instructions
+                consts = code.consts
+                stack = frame.stack
+                context = frame.context
+                slots = frame.slots
+                ip = frame.ip
+
+            elif op == RETURN_VALUE or op == END:
+                value = stack.pop()
+                if op == RETURN_VALUE or code.should_auto_return:
+                    return_value = value
+                else:
+                    return_value = Number.null
+
+                returning_frame = frames.pop()
+                if returning_frame.memo:
+                    cache, key = returning_frame.memo
+                    return_value = cache.put(key, return_value)
+                if not frames:
+                    if returning_frame.slots is None:
+                        # 程序顶层：执行完毕时的值为各语句组成的 List，RETURN 则使结果为 None
+                        return RTResult().success(None if op == RETURN_VALUE else value)
+                    return RTResult().success(return_value)
+
+                frame = frames[-1]
+                code = frame.code
+                instructions = code.instructions
+                consts = code.consts
+                stack = frame.stack
+                context = frame.context
+                slots = frame.slots
+                ip = frame.ip
+                stack.append(return_value)
+
+    # 处理 CONTINUE / BREAK：跳转到最内层的循环块；若当前帧内没有循环，则连同该帧一起退出，作用于调用者的循环
+    # ip 为当前帧中跳转发生处之后的指令下标；返回跳转后所在的帧，若已退出所有帧则返回 None
+    def unwind_loop(self, frames, is_continue, ip):
+        frames[-1].ip = ip
+
+        while True:
+            frame = frames[-1]
+            blocks = frame.blocks
+            # 发生在 WHILE 条件中（循环体起点之前）的跳转不属于该循环，作用于外层循环
+            while blocks and frame.ip < blocks[-1][3]:
+                blocks.pop()
+            if blocks:
+                break
+            frames.pop()
+            if not frames:
+                return None
+
+        continue_target, break_target, height, _ = blocks[-1]
+        del frame.stack[height:]
+        frame.ip = continue_target if is_continue else break_target
+        return frame
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from basic.bytecode import *
+from basic.run import global_symbol_table
+from util.symbol_table import SymbolTable
+from basic.stack_interpreter import RECURSION_LIMIT
+from util.error import RTError
+from util.rt_result import RTResult
+from util.operations import NUMBER_TYPES, boxed, binary_error, unary_error
+from util.values import Number, List, VMFunction, MemoFunction, memo_key
@@ -0,0 +1,62 @@
+#######################################
+# BINOP BENCHMARK
+# 对比以 RTResult 传递控制流的 Interpreter（'tree'）与以异常传递控制流的 SignalInterpreter（'signal'）
+# 在大量二元运算的代码上的耗时、python 函数调用次数以及 RTResult 的创建次数
+# 在仓库根目录下运行：python -m benchmarks.binop
+#######################################
+
+import cProfile
+import pstats
+import time
+
+import util.values
+from basic.run import run
+
+SOURCE = '''
+VAR total = 0
+FOR i = 0 TO 20000 THEN
+    VAR total = total + i * 2 - i / 4 + (i - 1) * (i + 1) - i ^ 2
+END
+total
+'''
+
+ENGINES = ['tree', 'signal']
+REPEAT = 5
+
+
+# 取多次运行中最短的耗时
+def measure_time(engine):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result, error = run('<benchmark>', SOURCE, engine)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise Exception(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# python 函数调用总次数与 RTResult.__init__ 的调用次数
+def measure_calls(engine):
+    profile = cProfile.Profile()
+    profile.runcall(run, '<benchmark>', SOURCE, engine)
+    stats = pstats.Stats(profile)
+
+    results = 0
+    for (file_name, _, func_name), (_, calls, _, _, _) in stats.stats.items():
+        if file_name.endswith('rt_result.py') and func_name == '__init__':
+            results += calls
+    return stats.total_calls, results
+
+
+def main():
+    print(f"{'engine':10s}{'time (s)':>12s}{'calls':>14s}{'RTResult':>12s}")
+    for engine in ENGINES:
+        elapsed = measure_time(engine)
+        calls, results = measure_calls(engine)
+        print(f'{engine:10s}{elapsed:12.3f}{calls:14d}{results:12d}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#######################################
+# BUILTINS BENCHMARK
+# 对十万个数字求平方再求和：在 mendax 的 FOR 循环中完成，与以 MAP、SUM 在 python 中遍历列表的耗时
+# 各列均包含以 RANGE 创建列表的耗时
+# 在仓库根目录下运行：python -m benchmarks.builtins
+#######################################
+
+import time
+
+import util.values
+from basic.run import run
+
+SETUP = '''
+VAR numbers = RANGE(0, 100000)
+'''
+
+SOURCES = [
+    ('setup', SETUP),
+    ('FOR', SETUP + '''
+VAR total = 0
+FOR i = 0 TO LEN(numbers) THEN
+    VAR x = numbers / i
+    VAR total = total + x * x
+END
+total
+'''),
+    ('MAP + SUM', SETUP + 'SUM(MAP(numbers, FUN (x) -> x * x))'),
+    ('VEC + SUM', SETUP + 'SUM(VEC_MUL(numbers, numbers))'),
+]
+ENGINES = ['tree', 'vm']
+REPEAT = 3
+
+
+# 取多次运行中最短的耗时
+def measure_time(engine, source):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result, error = run('<benchmark>', source, engine)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise Exception(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print(f"{'engine':10s}" + ''.join(f'{name:>12s}' for name, _ in SOURCES))
+    for engine in ENGINES:
+        times = [measure_time(engine, source) for _, source in SOURCES]
+        print(f'{engine:10s}' + ''.join(f'{elapsed:12.3f}' for elapsed in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#######################################
+# CACHE BENCHMARK
+# 对一段较大的生成脚本，比较词法分析加语法分析与从磁盘缓存读取 AST（见 basic/cache.py）的耗时，以及缓存文件的大小
+# 缓存写入一个临时目录，运行结束后删除
+# 在仓库根目录下运行：python -m benchmarks.cache
+#######################################
+
+import os
+import tempfile
+import time
+
+import util.values
+from basic.cache import load_ast, store_ast, cache_path
+from basic.run import parse
+from benchmarks.lexer import make_source
+
+REPEAT = 3
+
+
+# 取多次运行中最短的耗时
+def measure_time(function):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        if result is None or getattr(result, 'error', None):
+            raise Exception('Failed to load the program')
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    source = make_source()
+    print(f'source: {len(source) / 2 ** 20:.2f} MiB')
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['MENDAX_CACHE_DIR'] = directory
+        store_ast(source, parse('<benchmark>', source).node)
+        size = os.path.getsize(cache_path(directory, source))
+
+        parsed = measure_time(lambda: parse('<benchmark>', source))
+        loaded = measure_time(lambda: load_ast('<benchmark>', source))
+        del os.environ['MENDAX_CACHE_DIR']
+
+    print(f'cache file: {size / 2 ** 20:.2f} MiB')
+    print(f"{'mode':10s}{'time (s)':>12s}")
+    print(f"{'parse':10s}{parsed:12.3f}")
+    print(f"{'cache':10s}{loaded:12.3f}")
+
+
+if __name__ == '__main__':
+    main()
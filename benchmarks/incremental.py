@@ -0,0 +1,63 @@
+#######################################
+# INCREMENTAL BENCHMARK
+# 对一段较大的生成脚本做一系列小的编辑，比较每次编辑之后重新分析全部源码（RegexLexer、Parser）与增量分析（Document.edit）的耗时
+# 增量分析只重新分析受影响的 token 与顶层语句（见 basic/incremental.py）
+# 在仓库根目录下运行：python -m benchmarks.incremental
+#######################################
+
+import time
+
+from basic.incremental import Document
+from basic.parser import Parser
+from basic.regex_lexer import RegexLexer
+from benchmarks.lexer import make_source
+
+# 编辑：(名称, 由源码得到一次编辑 (offset, removed, inserted) 的函数)；编辑都位于源码的中间，每次编辑之后随即撤销
+EDITS = [
+    ('number', lambda text: (text.index('STEP 2', len(text) // 2) + 5, 1, '3')),
+    ('new line', lambda text: (text.index('\nVAR', len(text) // 2) + 1, 0, 'VAR extra = 1\n')),
+    ('syntax error', lambda text: (text.index('THEN', len(text) // 2), 4, 'THEM')),
+    ('open string', lambda text: (text.index('\nVAR', len(text) // 2) + 1, 0, '"')),
+]
+REPEAT = 3
+
+
+def parse_all(text):
+    tokens, error = RegexLexer('<benchmark>', text).make_tokens()
+    if error:
+        return error
+    return Parser(tokens).parse()
+
+
+# 取多次运行中最短的耗时
+def measure_time(function):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    source = make_source()
+    document = Document('<benchmark>', source)
+    print(f'source: {len(source) / 2 ** 20:.2f} MiB, {len(document.tokens)} tokens')
+    print(f"{'edit':14s}{'full (s)':>12s}{'incremental (s)':>18s}")
+    for name, make_edit in EDITS:
+        offset, removed, inserted = make_edit(source)
+        edited = source[:offset] + inserted + source[offset + removed:]
+        full = measure_time(lambda: parse_all(edited))
+
+        # 编辑并撤销，耗时取两者的平均值
+        def edit_and_undo():
+            document.edit(offset, removed, inserted)
+            document.edit(offset, len(inserted), source[offset:offset + removed])
+
+        incremental = measure_time(edit_and_undo) / 2
+        print(f'{name:14s}{full:12.3f}{incremental:18.4f}')
+
+
+if __name__ == '__main__':
+    main()
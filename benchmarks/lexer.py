@@ -0,0 +1,69 @@
+#######################################
+# LEXER BENCHMARK
+# 对一段较大的生成脚本做词法分析，比较逐个字符读取的 Lexer 与以总正则表达式匹配的 RegexLexer：
+# 耗时、吞吐量（MiB/s），以及 token 列表占用的内存与平均每个 token 占用的字节数（tracemalloc）
+# token 只存放起止下标，行号、列号在报错时才计算（见 util/position.py）
+# 在仓库根目录下运行：python -m benchmarks.lexer
+#######################################
+
+import time
+import tracemalloc
+
+from basic.lexer import Lexer
+from basic.regex_lexer import RegexLexer
+
+# 一段包含函数定义、循环、字符串与列表的代码，重复若干次构成较大的脚本
+CHUNK = '''
+FUN area_{0}(width, height) -> width * height + {0}
+VAR total_{0} = 0
+FOR i = 0 TO 100 STEP 2 THEN
+    IF i / 3 == 0 THEN VAR total_{0} = total_{0} + area_{0}(i, 2.5) ELSE VAR total_{0} = total_{0} - 1
+END
+VAR name_{0} = "item {0}"
+VAR items_{0} = [1, 2, 3, total_{0}, name_{0}]
+# comment {0}
+'''
+CHUNKS = 4000
+LEXERS = [('Lexer', Lexer), ('RegexLexer', RegexLexer)]
+REPEAT = 3
+
+
+def make_source():
+    return ''.join(CHUNK.format(i) for i in range(CHUNKS))
+
+
+# 取多次运行中最短的耗时
+def measure_time(lexer_class, source):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        tokens, error = lexer_class('<benchmark>', source).make_tokens()
+        elapsed = time.perf_counter() - start
+        if error:
+            raise Exception(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(tokens)
+
+
+# 词法分析完毕后 token 列表占用的内存（字节）
+def measure_memory(lexer_class, source):
+    tracemalloc.start()
+    tokens, error = lexer_class('<benchmark>', source).make_tokens()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main():
+    source = make_source()
+    size = len(source) / 2 ** 20
+    print(f'source: {size:.2f} MiB')
+    print(f"{'lexer':12s}{'tokens':>10s}{'time (s)':>12s}{'MiB/s':>10s}{'memory (MiB)':>16s}{'bytes/token':>14s}")
+    for name, lexer_class in LEXERS:
+        elapsed, count = measure_time(lexer_class, source)
+        memory = measure_memory(lexer_class, source)
+        print(f'{name:12s}{count:10d}{elapsed:12.3f}{size / elapsed:10.2f}{memory / 2 ** 20:16.1f}{memory / count:14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#######################################
+# LISTS BENCHMARK
+# 在循环中以 + 累加列表、以 / 读取元素：列表长度翻倍时，耗时应大致翻倍（+ 不复制已有的元素）
+# 在仓库根目录下运行：python -m benchmarks.lists
+#######################################
+
+import time
+
+import util.values
+from basic.run import run
+
+SOURCE = '''
+VAR numbers = []
+FOR i = 0 TO {n} THEN
+    VAR numbers = numbers + i
+    VAR last = numbers / -1
+END
+LEN(numbers)
+'''
+
+SIZES = [25000, 50000, 100000]
+ENGINES = ['tree', 'vm']
+REPEAT = 3
+
+
+# 取多次运行中最短的耗时
+def measure_time(engine, n):
+    source = SOURCE.format(n=n)
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result, error = run('<benchmark>', source, engine)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise Exception(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print(f"{'engine':10s}" + ''.join(f'{n:>12d}' for n in SIZES))
+    for engine in ENGINES:
+        times = [measure_time(engine, n) for n in SIZES]
+        print(f'{engine:10s}' + ''.join(f'{elapsed:12.3f}' for elapsed in times))
+
+
+if __name__ == '__main__':
+    main()
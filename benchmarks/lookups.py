@@ -0,0 +1,59 @@
+#######################################
+# LOOKUPS BENCHMARK
+# 在较深的调用链中反复读取全局变量、调用内建函数：动态作用域下按名称查找要沿符号表链逐层进行，
+# 由变量访问结点上的内联缓存（util/symbol_table.py 中的 LookupCache）直接读取全局符号表
+# 报告各执行方式的耗时与缓存命中率
+# 在仓库根目录下运行：python -m benchmarks.lookups
+#######################################
+
+import time
+
+import util.values
+from basic.run import run
+from util.symbol_table import LookupCache
+
+SOURCE = '''
+VAR data = [1, 2, 3]
+VAR scale = 3
+FUN work(n)
+    VAR total = 0
+    FOR i = 0 TO 200 THEN
+        VAR total = total + LEN(data) * scale
+    END
+    RETURN total
+END
+FUN nest(depth) -> IF depth == 0 THEN work(0) ELSE nest(depth - 1) + 0
+VAR result = 0
+FOR i = 0 TO 20 THEN
+    VAR result = result + nest(40)
+END
+result
+'''
+
+ENGINES = ['tree', 'signal', 'vm']
+REPEAT = 3
+
+
+# 取多次运行中最短的耗时
+def measure_time(engine):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result, error = run('<benchmark>', SOURCE, engine)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise Exception(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print(f"{'engine':10s}{'time (s)':>12s}{'hit rate':>12s}")
+    for engine in ENGINES:
+        LookupCache.hits = LookupCache.misses = 0
+        elapsed = measure_time(engine)
+        print(f'{engine:10s}{elapsed:12.3f}{LookupCache.hit_rate():12.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#######################################
+# MEMO BENCHMARK
+# 递归求斐波那契数：不做记忆化、以 MEMO 包装、由 run 的 memoize 自动推断为纯函数三种方式的耗时，
+# 以及记忆化时缓存的命中次数与未命中次数
+# 在仓库根目录下运行：python -m benchmarks.memo
+#######################################
+
+import time
+
+import util.values
+from basic.run import run
+
+FIB = 'FUN fib(n) -> IF n < 2 THEN n ELSE fib(n - 1) + fib(n - 2)\n'
+
+# (名称, 源码, run 的 memoize 参数)
+MODES = [
+    ('plain', FIB + 'fib(22)', False),
+    ('MEMO', FIB + 'VAR fib = MEMO(fib)\nfib(22)\nMEMO_STATS(fib)', False),
+    ('memoize', FIB + 'fib(22)\nMEMO_STATS(fib)', True),
+]
+ENGINES = ['tree', 'vm']
+REPEAT = 3
+
+
+# 取多次运行中最短的耗时；返回 (耗时, 最后一次运行的结果)
+def measure_time(engine, source, memoize):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result, error = run('<benchmark>', source, engine, memoize=memoize)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise Exception(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    print(f"{'engine':10s}{'mode':10s}{'time (s)':>12s}{'hits':>8s}{'misses':>8s}")
+    for engine in ENGINES:
+        for name, source, memoize in MODES:
+            elapsed, result = measure_time(engine, source, memoize)
+            if name == 'plain':
+                hits = misses = '-'
+            else:
+                hits, misses, _ = result.get_elements()[-1].get_elements()
+            print(f'{engine:10s}{name:10s}{elapsed:12.3f}{str(hits):>8s}{str(misses):>8s}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#######################################
+# MEMORY BENCHMARK
+# 创建含一百万个数字的列表：各执行方式的耗时、内存峰值与列表占用的内存（tracemalloc），以及单个 Number、Token、Position 的大小
+# 在仓库根目录下运行：python -m benchmarks.memory
+#######################################
+
+import sys
+import time
+import tracemalloc
+
+import util.values
+from basic.run import run
+from data.tokens import Token, TT_INT
+from util.position import Source, Position
+from util.values import Number
+
+SOURCE = '''
+VAR numbers = FOR i = 0 TO 1000000 THEN i
+LEN(numbers)
+'''
+
+# 程序结果中保留该列表，以统计其占用的内存
+SOURCE_LIST = '''
+FOR i = 0 TO 1000000 THEN i
+'''
+
+ENGINES = ['tree', 'vm']
+REPEAT = 3
+
+
+# 取多次运行中最短的耗时
+def measure_time(engine):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result, error = run('<benchmark>', SOURCE, engine)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise Exception(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# 执行过程中 python 对象占用内存的峰值（MiB），以及执行完毕后程序结果中的列表平均每个元素占用的字节数
+def measure_peak(engine):
+    tracemalloc.start()
+    result, error = run('<benchmark>', SOURCE_LIST, engine)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    numbers = result.get_elements()[-1]
+    return peak / 2 ** 20, current / numbers.length
+
+
+# 对象本身及其 __dict__（若有）占用的字节数
+def object_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def main():
+    print(f"{'engine':10s}{'time (s)':>12s}{'peak (MiB)':>14s}{'bytes/element':>16s}")
+    for engine in ENGINES:
+        elapsed = measure_time(engine)
+        peak, per_element = measure_peak(engine)
+        print(f'{engine:10s}{elapsed:12.3f}{peak:14.1f}{per_element:16.1f}')
+
+    source = Source('<benchmark>', '1')
+    pos = Position(0, source)
+    print()
+    print(f"{'object':10s}{'bytes':>12s}")
+    print(f"{'Number':10s}{object_size(Number(1).set_pos(pos, pos)):12d}")
+    print(f"{'Token':10s}{object_size(Token(TT_INT, 1, source, 0)):12d}")
+    print(f"{'Position':10s}{object_size(pos):12d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#######################################
+# PACKRAT BENCHMARK
+# 对嵌套的 RETURN 语句做语法分析：RETURN 之后的表达式分析失败时会回溯并改为分析不带表达式的 RETURN，
+# 每层嵌套都如此，不缓存时耗时随嵌套层数指数增长；缓存（packrat）后同一位置的同一规则只分析一次，耗时近似线性
+# 不缓存的情况只测到较小的层数
+# 在仓库根目录下运行：python -m benchmarks.packrat
+#######################################
+
+import time
+
+from basic.parser import Parser
+from basic.regex_lexer import RegexLexer
+
+# 各种会引起回溯的嵌套写法，n 为嵌套层数；均以语法错误结束（层数不超过语法分析允许的嵌套深度）
+FAMILIES = [
+    ('return-minus', lambda n: 'IF a THEN RETURN - ' * n + '(x'),
+    ('return-paren', lambda n: 'IF a THEN RETURN (' * n + 'x ]'),
+    ('block-return', lambda n: 'IF a THEN\nx\nRETURN - ' * n + '(x'),
+]
+SIZES = [4, 8, 12, 16, 32, 48]
+MAX_PLAIN_SIZE = 16  # 不缓存时的最大层数
+REPEAT = 3
+
+
+def make_tokens(source):
+    tokens, error = RegexLexer('<benchmark>', source).make_tokens()
+    if error:
+        raise Exception(error.as_string())
+    return tokens
+
+
+# 取多次运行中最短的耗时
+def measure_time(tokens, packrat):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        Parser(tokens, packrat).parse()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print(f"{'input':14s}{'depth':>8s}{'plain (s)':>12s}{'packrat (s)':>14s}")
+    for name, make_source in FAMILIES:
+        for n in SIZES:
+            tokens = make_tokens(make_source(n))
+            plain = f'{measure_time(tokens, False):12.4f}' if n <= MAX_PLAIN_SIZE else f"{'-':>12s}"
+            print(f'{name:14s}{n:8d}{plain}{measure_time(tokens, True):14.4f}')
+
+
+if __name__ == '__main__':
+    main()
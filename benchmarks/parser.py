@@ -0,0 +1,73 @@
+#######################################
+# PARSER BENCHMARK
+# 对一段较大、以表达式为主的生成脚本做语法分析（不含词法分析）的耗时与吞吐量（token/s）
+# 表达式由 Parser.expr_node 以优先级分析构建，不再为每一层文法分配 ParseResult
+# 另一段脚本以多行的块为主：每个块的 END、每个不带表达式的 RETURN 处都有一次失败的尝试，失败时不构建错误（见 Parser.syntax_failure）
+# 在仓库根目录下运行：python -m benchmarks.parser
+#######################################
+
+import time
+
+from basic.parser import Parser
+from basic.regex_lexer import RegexLexer
+
+# 一段以算术、比较、逻辑运算与函数调用为主的代码，重复若干次构成较大的脚本
+CHUNK = '''
+VAR a_{0} = 1 + 2 * 3 - 4 / 5 ^ 2
+VAR b_{0} = (a_{0} + {0}) * -a_{0} + f(a_{0}, 2, 3 * a_{0})
+VAR c_{0} = a_{0} < b_{0} AND NOT b_{0} == 3 OR a_{0} >= {0}
+[a_{0}, b_{0}, c_{0} + 1, g()]
+'''
+# 一段以多行的函数、条件、循环为主的代码
+BLOCK_CHUNK = '''
+FUN f_{0}(a, b)
+    IF a < b THEN
+        RETURN
+    ELSE
+        WHILE a > b THEN
+            VAR a = a - 1
+        END
+    END
+    FOR i = 0 TO a THEN
+        IF i == b THEN BREAK
+        CONTINUE
+    END
+    RETURN a
+END
+'''
+SCRIPTS = [('expressions', CHUNK), ('blocks', BLOCK_CHUNK)]
+CHUNKS = 3000
+REPEAT = 3
+
+
+def make_tokens(chunk):
+    source = ''.join(chunk.format(i) for i in range(CHUNKS))
+    tokens, error = RegexLexer('<benchmark>', source).make_tokens()
+    if error:
+        raise Exception(error.as_string())
+    return tokens
+
+
+# 取多次运行中最短的耗时
+def measure_time(tokens):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        ast = Parser(tokens).parse()
+        elapsed = time.perf_counter() - start
+        if ast.error:
+            raise Exception(ast.error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print(f"{'script':14s}{'tokens':>10s}{'time (s)':>12s}{'tokens/s':>12s}")
+    for name, chunk in SCRIPTS:
+        tokens = make_tokens(chunk)
+        elapsed = measure_time(tokens)
+        print(f'{name:14s}{len(tokens):10d}{elapsed:12.3f}{len(tokens) / elapsed:12.0f}')
+
+
+if __name__ == '__main__':
+    main()
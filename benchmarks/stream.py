@@ -0,0 +1,65 @@
+#######################################
+# STREAM BENCHMARK
+# 对一段较大的生成脚本做词法分析与语法分析：先得到全部 token 再由 Parser 分析，与由 StreamingParser 按需读取 token 相比，
+# 耗时与内存峰值（tracemalloc，包括生成的 AST）
+# 在仓库根目录下运行：python -m benchmarks.stream
+#######################################
+
+import time
+import tracemalloc
+
+from basic.parser import Parser, StreamingParser
+from basic.regex_lexer import RegexLexer
+from benchmarks.lexer import make_source
+
+REPEAT = 3
+
+
+def parse_list(source):
+    tokens, error = RegexLexer('<benchmark>', source).make_tokens()
+    if error:
+        raise Exception(error.as_string())
+    return Parser(tokens).parse()
+
+
+def parse_stream(source):
+    return StreamingParser(RegexLexer('<benchmark>', source).generate_tokens()).parse()
+
+
+MODES = [('list', parse_list), ('stream', parse_stream)]
+
+
+# 取多次运行中最短的耗时
+def measure_time(parse, source):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        ast = parse(source)
+        elapsed = time.perf_counter() - start
+        if ast.error:
+            raise Exception(ast.error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# 分析过程中 python 对象占用内存的峰值（MiB）
+def measure_peak(parse, source):
+    tracemalloc.start()
+    ast = parse(source)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main():
+    source = make_source()
+    print(f'source: {len(source) / 2 ** 20:.2f} MiB')
+    print(f"{'mode':10s}{'time (s)':>12s}{'peak (MiB)':>14s}")
+    for name, parse in MODES:
+        elapsed = measure_time(parse, source)
+        peak = measure_peak(parse, source)
+        print(f'{name:10s}{elapsed:12.3f}{peak:14.1f}')
+
+
+if __name__ == '__main__':
+    main()
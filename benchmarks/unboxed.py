@@ -0,0 +1,70 @@
+#######################################
+# UNBOXED BENCHMARK
+# 对比虚拟机（'vm'）在默认模式与 unboxed 模式下，以及逐结点遍历的 Interpreter（'tree'）
+# 在大量数字运算的代码上的耗时与创建 Number 的次数
+# 在仓库根目录下运行：python -m benchmarks.unboxed
+#######################################
+
+import cProfile
+import pstats
+import time
+
+import util.values
+from basic.run import run
+from util.values import Number
+
+SOURCE = '''
+VAR total = 0
+VAR i = 0
+WHILE i < 20000 THEN
+    VAR total = total + i * 2 - i / 4 + (i - 1) * (i + 1) - i ^ 2
+    VAR i = i + 1
+END
+total
+'''
+
+# (名称, run 的参数)
+MODES = [
+    ('tree', {'engine': 'tree'}),
+    ('vm', {'engine': 'vm'}),
+    ('vm unboxed', {'engine': 'vm', 'unboxed': True}),
+]
+REPEAT = 5
+
+
+# 取多次运行中最短的耗时
+def measure_time(options):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result, error = run('<benchmark>', SOURCE, **options)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise Exception(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# Number.__init__ 的调用次数
+def measure_numbers(options):
+    profile = cProfile.Profile()
+    profile.runcall(run, '<benchmark>', SOURCE, **options)
+    stats = pstats.Stats(profile)
+
+    init = Number.__init__.__code__
+    for (file_name, line, _), (_, calls, _, _, _) in stats.stats.items():
+        if file_name == init.co_filename and line == init.co_firstlineno:
+            return calls
+    return 0
+
+
+def main():
+    print(f"{'mode':14s}{'time (s)':>12s}{'Numbers':>12s}")
+    for name, options in MODES:
+        elapsed = measure_time(options)
+        numbers = measure_numbers(options)
+        print(f'{name:14s}{elapsed:12.3f}{numbers:12d}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#######################################
+# VECTORS BENCHMARK
+# 两个十万个数字的列表逐元素相加：在 mendax 循环中逐个以 / 读取元素相加，与以 VEC_ADD 对整个 array 一次运算的耗时
+# 各列均包含创建两个列表（setup 列）的耗时
+# 在仓库根目录下运行：python -m benchmarks.vectors
+#######################################
+
+import time
+
+import util.values
+from basic.run import run
+
+SETUP = '''
+VAR a = FOR i = 0 TO 100000 THEN i
+VAR b = FOR i = 0 TO 100000 THEN i * 0.5
+'''
+
+SOURCES = [
+    ('setup', SETUP),
+    ('loop', SETUP + 'VAR c = FOR i = 0 TO 100000 THEN (a / i) + (b / i)\nLEN(c)'),
+    ('VEC_ADD', SETUP + 'VAR c = VEC_ADD(a, b)\nLEN(c)'),
+]
+ENGINES = ['tree', 'vm']
+REPEAT = 3
+
+
+# 取多次运行中最短的耗时
+def measure_time(engine, source):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result, error = run('<benchmark>', source, engine)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise Exception(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print(f"{'engine':10s}" + ''.join(f'{name:>12s}' for name, _ in SOURCES))
+    for engine in ENGINES:
+        times = [measure_time(engine, source) for _, source in SOURCES]
+        print(f'{engine:10s}' + ''.join(f'{elapsed:12.3f}' for elapsed in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -45,20 +45,43 @@ KEYWORDS = [
 ]
 
 
+# token 只存放其在源码 source 中的起止下标 start、end（不含 end），pos_start / pos_end 在用到时才创建 Position
 class Token:
-    def __init__(self, type_, value=None, pos_start=None, pos_end=None):
-        # 可选参数 value, pos_start, pos_end
+    __slots__ = ('type', 'value', 'source', 'start', 'end')
+
+    def __init__(self, type_, value=None, source=None, start=0, end=None):
+        # 可选参数 value, source, start, end
         self.type = type_
         self.value = value
+        self.source = source
+
+        # 若没有传入 end，则 token 只占一个字符，比如 +
+        self.start = start
+        self.end = start + 1 if end is None else end
+
+    # 依据已有的位置（例如常量折叠所替换的结点的位置）创建 token
+    @staticmethod
+    def at(type_, value, pos_start, pos_end):
+        return Token(type_, value, pos_start.source, pos_start.idx, pos_end.idx)
+
+    @property
+    def pos_start(self):
+        return Position(self.start, self.source)
 
-        # 若没有传入 pos_end，比如 1，此时 pos_start == 1 且 pos_end == 1
-        if pos_start:
-            self.pos_start = pos_start.copy()  # 调用 copy 方法
-            self.pos_end = pos_start.copy()
-            self.pos_end.advance()
+    @property
+    def pos_end(self):
+        # 换行符的结束位置仍算作该行的末尾；编辑之前的源码不保留文本，先换算到最新的源码中
+        if self.type == TT_NEWLINE and self.relocate().source.text.startswith('\n', self.start):
+            return LineEndPosition(self.end, self.source)
+        return Position(self.end, self.source)
 
-        if pos_end:
-            self.pos_end = pos_end.copy()
+    # 源码被编辑过时（见 Source.edited），把起止下标换算到最新的源码中，此后不必再逐次换算
+    def relocate(self):
+        if self.source.edit is not None:
+            source, self.start = self.source.locate(self.start)
+            self.end = self.source.locate(self.end)[1]
+            self.source = source
+        return self
 
     # 判断 type-value 是否一致
     def matches(self, type_, value):
@@ -68,3 +91,10 @@ class Token:
         if self.value:
             return f'{self.type}:{self.value}'
         return f'{self.type}'
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.position import Position, LineEndPosition
@@ -0,0 +1,69 @@
+#######################################
+# CACHE TESTS
+# 语法分析结果的磁盘缓存（basic/cache.py）：缓存文件损坏时不影响运行，重新分析源码
+# 在仓库根目录下运行：python -m unittest tests.test_cache
+#######################################
+
+import marshal
+import os
+import tempfile
+import unittest
+import zlib
+
+import util.values
+from basic.cache import CACHE_TAG, cache_path, load_ast
+from basic.run import run
+
+SOURCE = 'VAR cache_total = 0\nFOR i = 0 TO 10 THEN VAR cache_total = cache_total + i\ncache_total'
+
+# 标签正确、内容损坏的编码：未知的结点类名、元素不足的结点、结构不对的结点
+CORRUPTED = [
+    ('NoSuchNode',),
+    ('NumberNode',),
+    ('ListNode', (('BinOpNode', ('NumberNode', ('INT', 1, 0, 1))),), 0, 0),
+    ('IfNode', (), None),
+    7,
+]
+
+
+class CorruptedCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.previous = os.environ.get('MENDAX_CACHE_DIR')
+        os.environ['MENDAX_CACHE_DIR'] = self.directory.name
+
+    def tearDown(self):
+        if self.previous is None:
+            del os.environ['MENDAX_CACHE_DIR']
+        else:
+            os.environ['MENDAX_CACHE_DIR'] = self.previous
+        self.directory.cleanup()
+
+    def write_cache(self, data):
+        with open(cache_path(self.directory.name, SOURCE), 'wb') as f:
+            f.write(zlib.compress(marshal.dumps((CACHE_TAG, data))))
+
+    def assertRunsFromSource(self):
+        result, error = run('<test>', SOURCE)
+        self.assertIsNone(error)
+        self.assertEqual(result.elements[-1].value, 45)
+
+    # 损坏的缓存不被读取，运行时重新分析，并以正确的结果覆盖缓存
+    def test_corrupted_cache_falls_back_to_parsing(self):
+        self.assertRunsFromSource()
+        for data in CORRUPTED:
+            with self.subTest(data=data):
+                self.write_cache(data)
+                self.assertIsNone(load_ast('<test>', SOURCE))
+                self.assertRunsFromSource()
+                self.assertIsNotNone(load_ast('<test>', SOURCE))
+
+    # 不是 zlib 压缩的数据
+    def test_garbage_cache_falls_back_to_parsing(self):
+        with open(cache_path(self.directory.name, SOURCE), 'wb') as f:
+            f.write(b'garbage')
+        self.assertRunsFromSource()
+
+
+if __name__ == '__main__':
+    unittest.main()
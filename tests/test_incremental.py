@@ -0,0 +1,68 @@
+#######################################
+# INCREMENTAL TESTS
+# 增量分析（basic/incremental.py）：长时间编辑之后占用的内存不随编辑次数增长
+# 在仓库根目录下运行：python -m unittest tests.test_incremental
+#######################################
+
+import gc
+import tracemalloc
+import unittest
+
+import util.values
+from basic.incremental import Document, REBASE_EDITS
+from basic.regex_lexer import RegexLexer
+from basic.parser import Parser
+
+
+def make_text(count):
+    lines = []
+    for i in range(count):
+        lines.append(f'VAR total_{i} = {i} * 2 + 1')
+        lines.append(f'FUN add_{i}(a, b) -> a + b + total_{i}')
+    return '\n'.join(lines) + '\n'
+
+
+class DocumentMemoryTest(unittest.TestCase):
+    # 在源码中间插入并删除一行
+    @staticmethod
+    def edit_many(document, count):
+        for _ in range(count):
+            offset = document.text.index('\nVAR', len(document.text) // 2) + 1
+            document.edit(offset, 0, 'VAR extra = 1\n')
+            document.edit(offset, len('VAR extra = 1\n'), '')
+
+    # 被编辑之前的文本不再保留：之后的许多次编辑不增加占用的内存
+    def test_retained_size_is_flat(self):
+        text = make_text(500)
+        tracemalloc.start()
+        try:
+            document = Document('<test>', text)
+            self.edit_many(document, REBASE_EDITS)
+            gc.collect()
+            before = tracemalloc.get_traced_memory()[0]
+            self.edit_many(document, 4 * REBASE_EDITS)
+            gc.collect()
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(after - before, len(text))
+
+    # 换算到最新的源码之后，结果与重新分析全部源码一致
+    def test_positions_after_rebase(self):
+        text = make_text(50)
+        document = Document('<test>', text)
+        self.edit_many(document, REBASE_EDITS + 1)
+        offset = document.text.index('+ 1\n', len(document.text) // 2)
+        result = document.edit(offset, 1, '-')
+        self.assertIsNone(result.error)
+
+        tokens, error = RegexLexer('<test>', document.text).make_tokens()
+        expected = Parser(tokens).parse()
+        self.assertEqual(
+            [(node.pos_start.locate().idx, node.pos_end.locate().ln) for node in result.node.element_nodes],
+            [(node.pos_start.idx, node.pos_end.ln) for node in expected.node.element_nodes]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
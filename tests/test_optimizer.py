@@ -0,0 +1,34 @@
+#######################################
+# OPTIMIZER TESTS
+# 常量折叠（basic/optimizer.py）：内建常量被之后的程序重新赋值时，之前定义的函数读到的是新值
+# 在仓库根目录下运行：python -m unittest tests.test_optimizer
+#######################################
+
+import unittest
+
+import util.values
+from basic.run import run
+
+ENGINES = ['tree', 'signal', 'closure', 'vm', 'python', 'stack']
+
+
+class BuiltinConstantTest(unittest.TestCase):
+    def tearDown(self):
+        run('<test>', 'VAR MATH_PI = 3.141592653589793')
+
+    def test_rebound_after_definition(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                f = f'f_{engine}'
+                result, error = run('<test>', f'FUN {f}() -> MATH_PI * 2', engine)
+                self.assertIsNone(error)
+                result, error = run('<test>', 'VAR MATH_PI = 3', engine)
+                self.assertIsNone(error)
+
+                result, error = run('<test>', f'{f}()', engine)
+                self.assertIsNone(error)
+                self.assertEqual(result.get_elements()[-1].value, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
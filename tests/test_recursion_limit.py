@@ -0,0 +1,47 @@
+#######################################
+# RECURSION LIMIT TESTS
+# 'stack'、'vm' 中 mendax 函数调用的最大深度（recursion_limit）：经由内建函数（MAP 等）的调用同样受其限制，
+# 超出时报出 RTError，而不是 python 的 RecursionError
+# 在仓库根目录下运行：python -m unittest tests.test_recursion_limit
+#######################################
+
+import unittest
+
+import util.values
+from basic.run import run
+
+ENGINES = ['stack', 'vm']
+
+
+class BuiltinRecursionTest(unittest.TestCase):
+    # 在各执行方式中运行 text（其中的 {name} 为各执行方式不同的函数名），均应报出超出最大递归深度
+    def assertRecursionError(self, name, text, **options):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                result, error = run('<test>', text.format(name=f'{name}_{engine}'), engine, **options)
+                self.assertIsNotNone(error)
+                self.assertIn('Maximum recursion depth exceeded', error.as_string())
+
+    # MAP 调用的函数递归很深：使用设置的 recursion_limit，而不是默认值
+    def test_map_uses_recursion_limit(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                name = f'map_depth_{engine}'
+                text = f'FUN {name}(n) -> IF n <= 0 THEN 0 ELSE {name}(n - 1) + 1\nMAP([30000], {name})'
+                result, error = run('<test>', text, engine, recursion_limit=50000)
+                self.assertIsNone(error, error and error.as_string())
+                self.assertEqual(result.elements[-1].get_elements()[0].value, 30000)
+
+    # 函数与 MAP 交替递归：调用深度累计，超出 recursion_limit 时报错
+    def test_alternating_recursion_counts_depth(self):
+        text = 'FUN {name}(n) -> IF n <= 0 THEN 0 ELSE MAP([n - 1], {name})\n{name}(100)'
+        self.assertRecursionError('alternating_limit', text, recursion_limit=50)
+
+    # 交替递归很深时 python 调用栈先耗尽，同样报出 RTError
+    def test_alternating_recursion_exhausts_python_stack(self):
+        text = 'FUN {name}(n) -> IF n <= 0 THEN 0 ELSE MAP([n - 1], {name})\n{name}(5000)'
+        self.assertRecursionError('alternating_deep', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#######################################
+# RESOLVER TESTS
+# 作用域分析（basic/resolver.py）：多次 run 共用全局符号表时，标记为全局变量的访问仍遵循动态作用域
+# 在仓库根目录下运行：python -m unittest tests.test_resolver
+#######################################
+
+import unittest
+
+import util.values
+from basic.run import run
+
+ENGINES = ['tree', 'signal', 'closure', 'vm', 'python', 'stack']
+
+
+class SharedGlobalsTest(unittest.TestCase):
+    # 先运行的程序中的函数读取自由变量，之后的程序在调用它的函数中以形参绑定了同名变量
+    def check_dynamic_scope(self, define_global):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                # 各执行方式使用不同的名称，互不影响
+                x, g, f = f'x_{engine}_{define_global}', f'g_{engine}_{define_global}', f'f_{engine}_{define_global}'
+                first = f'FUN {g}() -> {x}'
+                if define_global:
+                    first = f'VAR {x} = 1\n' + first
+                result, error = run('<test>', first, engine)
+                self.assertIsNone(error)
+
+                result, error = run('<test>', f'FUN {f}({x}) -> {g}()\n{f}(5)', engine)
+                self.assertIsNone(error)
+                self.assertEqual(result.elements[-1].value, 5)
+
+    def test_parameter_shadows_global(self):
+        self.check_dynamic_scope(True)
+
+    def test_parameter_without_global(self):
+        self.check_dynamic_scope(False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#######################################
+# STACK INTERPRETER TESTS
+# 以显式栈驱动的解释器（basic/stack_interpreter.py）：递归很深的调用不占用 python 调用栈，超出 recursion_limit 时报出 RTError
+# 嵌套很深的表达式的语法分析（basic/parser.py）同样不占用 python 调用栈
+# 在仓库根目录下运行：python -m unittest tests.test_stack_interpreter
+#######################################
+
+import unittest
+
+import util.values
+from basic.run import run
+
+# 递归深度为 n 的函数
+DEPTH = 'FUN {name}(n) -> IF n <= 0 THEN 0 ELSE {name}(n - 1) + 1\n'
+
+
+class MemoRecursionTest(unittest.TestCase):
+    def assertValue(self, text, expected, **options):
+        result, error = run('<test>', text, 'stack', **options)
+        self.assertIsNone(error, error and error.as_string())
+        self.assertEqual(result.elements[-1].value, expected)
+
+    # 以 MEMO 包装的递归函数：每一层调用都未命中缓存
+    def test_memo_deep_recursion(self):
+        self.assertValue(DEPTH.format(name='memo_depth') + 'VAR memo_depth = MEMO(memo_depth)\nmemo_depth(5000)', 5000)
+
+    # 推断为纯函数、自动记忆化的递归函数
+    def test_memoize_deep_recursion(self):
+        self.assertValue(DEPTH.format(name='pure_depth') + 'pure_depth(5000)', 5000, memoize=True)
+
+    # 超出 recursion_limit 时报出 RTError，而不是 python 的 RecursionError
+    def test_memo_recursion_limit(self):
+        text = DEPTH.format(name='memo_limit') + 'VAR memo_limit = MEMO(memo_limit)\nmemo_limit(5000)'
+        result, error = run('<test>', text, 'stack', recursion_limit=1000)
+        self.assertIsNotNone(error)
+        self.assertIn('Maximum recursion depth exceeded', error.as_string())
+
+
+class DeepNestingTest(unittest.TestCase):
+    def assertValue(self, text, expected):
+        result, error = run('<test>', text, 'stack')
+        self.assertIsNone(error, error and error.as_string())
+        self.assertEqual(result.get_elements()[-1].value, expected)
+
+    def test_parentheses(self):
+        self.assertValue('(' * 5000 + '1' + ')' * 5000, 1)
+
+    def test_unary(self):
+        self.assertValue('-' * 5001 + '1', -1)
+        self.assertValue('NOT ' * 5000 + '0', 0)
+
+    def test_right_operands(self):
+        self.assertValue('1 + (' * 5000 + '1' + ')' * 5000, 5001)
+        self.assertValue('1 ^ ' * 5000 + '2', 1)
+
+    def test_arguments(self):
+        self.assertValue('FUN nest_id(x) -> x\n' + 'nest_id(' * 5000 + '7' + ')' * 5000, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
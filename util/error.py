@@ -14,11 +14,14 @@ class Error:
         result = f'{self.error_name}: {self.details}\n'
         # 提示报错文件的名称和报错位置（行号）
         result += f'File {self.pos_start.fn}, line {self.pos_start.ln + 1}'
-        result += '\n\n' + \
-            string_with_arrows(self.pos_start.ftxt,
-                               self.pos_start, self.pos_end)
+        result += '\n\n' + self.arrows()
         return result
 
+    # 标出错误范围的源码；源码被编辑过时（见 Source.edited），位置先换算到最新的源码中
+    def arrows(self):
+        pos_start, pos_end = self.pos_start.locate(), self.pos_end.locate()
+        return string_with_arrows(pos_start.ftxt, pos_start, pos_end)
+
 
 # 非法字符错误
 class IllegalCharError(Error):
@@ -38,6 +41,19 @@ class InvalidSyntaxError(Error):
         super().__init__(pos_start, pos_end, 'Invalid Syntax', details)
 
 
+# 语法分析中的失败：只记录出错处的 token 与错误信息，需要报告时再由 as_error 构建 InvalidSyntaxError
+# 尝试（try_register）失败时的错误会被立即丢弃，不必为其计算位置、构建错误（见 Parser.syntax_failure）
+class SyntaxFailure:
+    __slots__ = ('tok', 'details')
+
+    def __init__(self, tok, details):
+        self.tok = tok
+        self.details = details
+
+    def as_error(self):
+        return InvalidSyntaxError(self.tok.pos_start, self.tok.pos_end, self.details)
+
+
 class RTError(Error):
     def __init__(self, pos_start, pos_end, details, context):
         super().__init__(pos_start, pos_end, 'Runtime Error', details)
@@ -47,9 +63,7 @@ class RTError(Error):
     def as_string(self):
         result = self.generate_traceback()
         result += f'{self.error_name}: {self.details}'
-        result += '\n\n' + \
-            string_with_arrows(self.pos_start.ftxt,
-                               self.pos_start, self.pos_end)
+        result += '\n\n' + self.arrows()
         return result
 
     # 生成错误栈信息
@@ -1,12 +1,15 @@
 #######################################
 # NODES
 # 抽象语法树（AST）的结点
+# 各结点以 __slots__ 声明全部属性（包括分析阶段填写的 slot、is_global 等），不为每个结点创建 __dict__
 #######################################
 
 # 准备一个抽象语法树的 FOR WHILE 等的结点图示
 
 # 数字结点
 class NumberNode:
+    __slots__ = ('tok', 'pos_start', 'pos_end')
+
     def __init__(self, tok):
         self.tok = tok  # 把形参的值装入到自己的“布兜”里
 
@@ -19,6 +22,8 @@ class NumberNode:
 
 # 字符串结点
 class StringNode:
+    __slots__ = ('tok', 'pos_start', 'pos_end')
+
     def __init__(self, tok):
         self.tok = tok
 
@@ -31,6 +36,8 @@ class StringNode:
 
 # 列表结点
 class ListNode:
+    __slots__ = ('element_nodes', 'pos_start', 'pos_end')
+
     def __init__(self, element_nodes, pos_start, pos_end):
         self.element_nodes = element_nodes  # 列表中的元素
 
@@ -40,8 +47,13 @@ class ListNode:
 
 # 获取指定变量名的值的结点 （访问变量）
 class VarAccessNode:
+    __slots__ = ('var_name_tok', 'slot', 'is_global', 'cache', 'pos_start', 'pos_end')
+
     def __init__(self, var_name_tok):
         self.var_name_tok = var_name_tok
+        self.slot = None  # 由 basic/resolver.py 填写：局部变量的槽位
+        self.is_global = False  # 由 basic/resolver.py 填写：是否一定是全局变量
+        self.cache = LookupCache(var_name_tok.value)  # 按名称查找时的内联缓存
 
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.var_name_tok.pos_end
@@ -49,9 +61,12 @@ class VarAccessNode:
 
 # 为指定变量名分配值的结点 （变量赋值）
 class VarAssignNode:
+    __slots__ = ('var_name_tok', 'value_node', 'slot', 'pos_start', 'pos_end')
+
     def __init__(self, var_name_tok, value_node):
         self.var_name_tok = var_name_tok
         self.value_node = value_node
+        self.slot = None  # 由 basic/resolver.py 填写：局部变量的槽位
 
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.value_node.pos_end
@@ -59,6 +74,8 @@ class VarAssignNode:
 
 # 二元操作结点 （加｜减｜乘｜除）  1 + 2: left_node = '1' op_tok = '+' right_node = '2'
 class BinOpNode:
+    __slots__ = ('left_node', 'op_tok', 'right_node', 'pos_start', 'pos_end')
+
     def __init__(self, left_node, op_tok, right_node):
         self.left_node = left_node
         self.op_tok = op_tok
@@ -73,6 +90,8 @@ class BinOpNode:
 
 # 一元操作结点 （-1）  -1: op_tok = '-' node = '1'
 class UnaryOpNode:
+    __slots__ = ('op_tok', 'node', 'pos_start', 'pos_end')
+
     def __init__(self, op_tok, node):
         self.op_tok = op_tok
         self.node = node
@@ -86,6 +105,8 @@ class UnaryOpNode:
 
 # 关键字 IF 的结点
 class IfNode:
+    __slots__ = ('cases', 'else_case', 'pos_start', 'pos_end')
+
     def __init__(self, cases, else_case):
         self.cases = cases
         self.else_case = else_case
@@ -98,6 +119,9 @@ class IfNode:
 
 # 关键字 FOR 的结点
 class ForNode:
+    __slots__ = ('var_name_tok', 'start_value_node', 'end_value_node', 'step_value_node', 'body_node',
+                 'should_return_null', 'slot', 'pos_start', 'pos_end')
+
     def __init__(self, var_name_tok, start_value_node, end_value_node, step_value_node, body_node, should_return_null):
         self.var_name_tok = var_name_tok
         self.start_value_node = start_value_node
@@ -105,6 +129,7 @@ class ForNode:
         self.step_value_node = step_value_node
         self.body_node = body_node
         self.should_return_null = should_return_null
+        self.slot = None  # 由 basic/resolver.py 填写：循环变量的槽位
 
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.body_node.pos_end
@@ -112,6 +137,8 @@ class ForNode:
 
 # 关键字 WHILE 的结点
 class WhileNode:
+    __slots__ = ('condition_node', 'body_node', 'should_return_null', 'pos_start', 'pos_end')
+
     def __init__(self, condition_node, body_node, should_return_null):
         self.condition_node = condition_node
         self.body_node = body_node
@@ -123,11 +150,17 @@ class WhileNode:
 
 # 函数定义的结点
 class FuncDefNode:
+    __slots__ = ('var_name_tok', 'arg_name_toks', 'body_node', 'should_auto_return', 'slot', 'scope',
+                 'memoize', 'pos_start', 'pos_end')
+
     def __init__(self, var_name_tok, arg_name_toks, body_node, should_auto_return):
         self.var_name_tok = var_name_tok
         self.arg_name_toks = arg_name_toks
         self.body_node = body_node
         self.should_auto_return = should_auto_return
+        self.slot = None  # 由 basic/resolver.py 填写：函数名所在的槽位（定义于另一函数体内时）
+        self.scope = None  # 由 basic/resolver.py 填写：函数体的 FunctionScope
+        self.memoize = False  # 由 basic/purity.py 填写：是否为纯函数，执行时包装为 MemoFunction
 
         if self.var_name_tok:
             self.pos_start = self.var_name_tok.pos_start
@@ -141,10 +174,13 @@ class FuncDefNode:
 
 # 函数调用的结点
 class CallNode:
+    __slots__ = ('node_to_call', 'arg_nodes', 'is_tail', 'pos_start', 'pos_end')
+
     def __init__(self, node_to_call, arg_nodes):
         # add(1,2) node_to_call -> add, arg_nodes -> 1,2
         self.node_to_call = node_to_call  # 被调用的函数
         self.arg_nodes = arg_nodes  # 被调用的参数
+        self.is_tail = False  # 由 basic/tail_calls.py 填写：是否为尾调用
 
         self.pos_start = self.node_to_call.pos_start
 
@@ -156,6 +192,8 @@ class CallNode:
 
 # 关键字 RETURN 的结点
 class ReturnNode:
+    __slots__ = ('node_to_return', 'pos_start', 'pos_end')
+
     def __init__(self, node_to_return, pos_start, pos_end):
         self.node_to_return = node_to_return
 
@@ -165,6 +203,8 @@ class ReturnNode:
 
 # 关键字 CONTINUE 的结点
 class ContinueNode:
+    __slots__ = ('pos_start', 'pos_end')
+
     def __init__(self, pos_start, pos_end):
         self.pos_start = pos_start
         self.pos_end = pos_end
@@ -172,6 +212,47 @@ class ContinueNode:
 
 # 关键字 BREAK 的结点
 class BreakNode:
+    __slots__ = ('pos_start', 'pos_end')
+
     def __init__(self, pos_start, pos_end):
         self.pos_start = pos_start
         self.pos_end = pos_end
+
+
+# 结点的直接子结点，便于分析、优化等过程遍历 AST
+def child_nodes(node):
+    if isinstance(node, ListNode):
+        return node.element_nodes
+    elif isinstance(node, VarAssignNode):
+        return [node.value_node]
+    elif isinstance(node, BinOpNode):
+        return [node.left_node, node.right_node]
+    elif isinstance(node, UnaryOpNode):
+        return [node.node]
+    elif isinstance(node, IfNode):
+        nodes = []
+        for condition, expr, _ in node.cases:
+            nodes.extend([condition, expr])
+        if node.else_case:
+            nodes.append(node.else_case[0])
+        return nodes
+    elif isinstance(node, ForNode):
+        nodes = [node.start_value_node, node.end_value_node,
+                 node.step_value_node, node.body_node]
+        return [node for node in nodes if node]
+    elif isinstance(node, WhileNode):
+        return [node.condition_node, node.body_node]
+    elif isinstance(node, FuncDefNode):
+        return [node.body_node]
+    elif isinstance(node, CallNode):
+        return [node.node_to_call] + node.arg_nodes
+    elif isinstance(node, ReturnNode):
+        return [node.node_to_return] if node.node_to_return else []
+    return []
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.symbol_table import LookupCache
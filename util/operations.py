@@ -0,0 +1,129 @@
+#######################################
+# OPERATIONS
+# 运算符 -> Value 运算方法的映射，供各编译器在编译期选定运算，避免运行期逐个比较 op_tok
+#######################################
+
+import operator
+
+
+# 运算方法名 -> 调用该方法的函数
+BINARY_OPERATIONS = {
+    'added_to': lambda left, right: left.added_to(right),
+    'subbed_by': lambda left, right: left.subbed_by(right),
+    'multed_by': lambda left, right: left.multed_by(right),
+    'dived_by': lambda left, right: left.dived_by(right),
+    'powed_by': lambda left, right: left.powed_by(right),
+    'get_comparison_eq': lambda left, right: left.get_comparison_eq(right),
+    'get_comparison_ne': lambda left, right: left.get_comparison_ne(right),
+    'get_comparison_lt': lambda left, right: left.get_comparison_lt(right),
+    'get_comparison_gt': lambda left, right: left.get_comparison_gt(right),
+    'get_comparison_lte': lambda left, right: left.get_comparison_lte(right),
+    'get_comparison_gte': lambda left, right: left.get_comparison_gte(right),
+    'anded_by': lambda left, right: left.anded_by(right),
+    'ored_by': lambda left, right: left.ored_by(right),
+}
+
+
+# 运算方法名 -> 对两个 python 数值的运算，结果与 Number 上同名方法的结果的 value 相同
+# 除数为 0 时抛出 ZeroDivisionError，调用者应改为调用 Number 的方法，由其报出 RTError
+NUMBER_OPERATIONS = {
+    'added_to': operator.add,
+    'subbed_by': operator.sub,
+    'multed_by': operator.mul,
+    'dived_by': operator.truediv,
+    'powed_by': operator.pow,
+    'get_comparison_eq': lambda left, right: int(left == right),
+    'get_comparison_ne': lambda left, right: int(left != right),
+    'get_comparison_lt': lambda left, right: int(left < right),
+    'get_comparison_gt': lambda left, right: int(left > right),
+    'get_comparison_lte': lambda left, right: int(left <= right),
+    'get_comparison_gte': lambda left, right: int(left >= right),
+    'anded_by': lambda left, right: int(left and right),
+    'ored_by': lambda left, right: int(left or right),
+}
+
+# Number 中可能存放的 python 数值类型
+NUMBER_TYPES = (int, float)
+
+
+# 依据运算符选定 Value 上对应的运算方法名
+def binary_method_name(op_tok):
+    method_name = BINARY_METHOD_NAMES.get((op_tok.type, op_tok.value))
+    if method_name is None:
+        raise Exception(f'No binary operation for {op_tok}')
+    return method_name
+
+
+def binary_operation(op_tok):
+    return BINARY_OPERATIONS[binary_method_name(op_tok)]
+
+
+# 一元运算，与 Interpreter.visit_UnaryOpNode 的分支一一对应
+def unary_operation(op_tok):
+    if op_tok.type == TT_MINUS:
+        return lambda number: number.multed_by(Number(-1))
+    elif op_tok.matches(TT_KEYWORD, 'NOT'):
+        return lambda number: number.notted()
+    # 一元 + 不做任何运算
+    return lambda number: (number, None)
+
+
+# 对 python 数值的运算，供 unboxed 模式使用
+def number_operation(op_tok):
+    return NUMBER_OPERATIONS[binary_method_name(op_tok)]
+
+
+def unary_number_operation(op_tok):
+    if op_tok.type == TT_MINUS:
+        return lambda number: number * -1
+    elif op_tok.matches(TT_KEYWORD, 'NOT'):
+        return lambda number: 1 if number == 0 else 0
+    return lambda number: number
+
+
+# unboxed 模式下，栈上的数字可能是 python 数值：交给 Value 的运算方法或离开执行引擎之前包装为 Number
+def boxed(value):
+    return Number(value) if type(value) in NUMBER_TYPES else value
+
+
+# 值在各处共享，读取时不再复制、也不再记录被读取处的位置（见 util/values.py 中的 Value）
+# 运算出错时，才以操作数所在结点的位置与当前上下文复制操作数、重新运算一次，得到与以往同样精确的错误
+# 运算方法出错时没有副作用，重新运算是安全的
+def binary_error(operation, left, right, left_node, right_node, context):
+    return operation(located(left, left_node, context), located(right, right_node, context))[1]
+
+
+def unary_error(operation, number, node, context):
+    return operation(located(number, node, context))[1]
+
+
+# 复制 value，并设置为结点 node 的位置与上下文 context
+def located(value, node, context):
+    return value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.values import Number
+from data.tokens import *
+
+
+# (运算符的 token 类型, token 值) -> Value 上对应的运算方法名；只有关键字运算符的 token 带有值
+# 以查表取代逐个比较 op_tok 的 if/elif，解释器每次执行二元操作时都要选定运算方法；键用到 token 类型，故置于 IMPORTS 之后
+BINARY_METHOD_NAMES = {
+    (TT_PLUS, None): 'added_to',
+    (TT_MINUS, None): 'subbed_by',
+    (TT_MUL, None): 'multed_by',
+    (TT_DIV, None): 'dived_by',
+    (TT_POW, None): 'powed_by',
+    (TT_EE, None): 'get_comparison_eq',
+    (TT_NE, None): 'get_comparison_ne',
+    (TT_LT, None): 'get_comparison_lt',
+    (TT_GT, None): 'get_comparison_gt',
+    (TT_LTE, None): 'get_comparison_lte',
+    (TT_GTE, None): 'get_comparison_gte',
+    (TT_KEYWORD, 'AND'): 'anded_by',
+    (TT_KEYWORD, 'OR'): 'ored_by',
+}
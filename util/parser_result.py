@@ -11,6 +11,11 @@ class ParseResult:
         self.last_registered_advance_count = 1  # 含义 ？
         self.advance_count += 1  # 当前正在读取的位置 +1
 
+    # 一次记录多个 token 的读取，用于不经由 ParseResult 逐层分析的部分（见 Parser.expr）
+    def register_advancements(self, count):
+        self.last_registered_advance_count = count
+        self.advance_count += count
+
     # 存储解析的结果
     def register(self, res):
         self.last_registered_advance_count = res.advance_count
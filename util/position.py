@@ -1,23 +1,169 @@
+import sys
+from bisect import bisect_right
+
+# 换算表中没有上限的段的上限
+NO_CAP = sys.maxsize
+
+
+# 一份源码：文件名、文本，以及各行起始下标的索引
+# 行号、列号只在报错时才需要，索引在首次需要时才建立，之后以二分查找确定下标所在的行
+class Source:
+    __slots__ = ('fn', 'text', 'line_starts', 'edit')
+
+    def __init__(self, fn, text):
+        self.fn = fn  # 文件名称
+        self.text = text
+        self.line_starts = None  # 各行起始处的下标，升序
+        self.edit = None  # 被编辑之后为 (到之后某个源码的换算表 OffsetMap, 该源码)，见 edited
+
+    # 下标 idx 所在的行号与列号（均从 0 开始）；源码被编辑过时，为 idx 在最新的源码中所在的行号与列号
+    def line_col(self, idx):
+        if self.edit is not None:
+            source, idx = self.locate(idx)
+            return source.line_col(idx)
+        if self.line_starts is None:
+            self.line_starts = line_starts(self.text)
+        ln = bisect_right(self.line_starts, idx) - 1
+        return ln, idx - self.line_starts[ln]
+
+    # 把从 offset 开始、长为 removed 的部分替换为 inserted，返回编辑后的源码（见 basic/incremental.py）
+    # 此后此处的位置都换算到编辑后的源码中：编辑之前的不变，之后的随长度的变化移动
+    # 位置与 token 因此不必随编辑而重新创建，复用的 token 与结点中的位置仍然正确
+    # 编辑之前的文本不再保留，只留下换算表；行号、列号与文本都从最新的源码中得到
+    def edited(self, offset, removed, inserted):
+        source = Source(self.fn, self.text[:offset] + inserted + self.text[offset + removed:])
+        self.edit = (OffsetMap.of_edit(offset, offset + removed, len(inserted) - removed), source)
+        self.text = None
+        self.line_starts = None
+        return source
+
+    # 下标 idx 在最新的源码中的位置：(源码, 下标)；位于被删除的部分之中的位置换算为编辑开始处
+    def locate(self, idx):
+        if self.edit is None:
+            return self, idx
+        self.collapse()
+        offsets, source = self.edit
+        return source, offsets.locate(idx)
+
+    # 把此后各次编辑的换算表合并为一个、直接换算到最新的源码（沿途的源码一并合并），此后换算只需一次二分查找
+    def collapse(self):
+        chain = []
+        source = self
+        while source.edit is not None:
+            chain.append(source)
+            source = source.edit[1]
+        if len(chain) == 1:
+            return
+
+        offsets = None
+        for stale in reversed(chain):
+            offsets = stale.edit[0] if offsets is None else stale.edit[0].then(offsets)
+            stale.edit = (offsets, source)
+
+
+# 编辑之前的下标到编辑之后的下标的换算表：单调不减的分段函数
+# 第 i 段为 [bounds[i], bounds[i + 1])，段中的下标 idx 换算为 min(idx + shifts[i], caps[i])：
+# 段中位于被删除的部分之中的下标都换算为删除处，其余的随此前长度的变化移动
+class OffsetMap:
+    __slots__ = ('bounds', 'shifts', 'caps')
+
+    def __init__(self, bounds, shifts, caps):
+        self.bounds = bounds  # 各段的开始处，升序，第一段从 0 开始
+        self.shifts = shifts
+        self.caps = caps
+
+    # 一次编辑：start 之前（含）的下标不变，start 与 end 之间的为 start，end 及之后的移动 delta
+    @staticmethod
+    def of_edit(start, end, delta):
+        return OffsetMap([0, end], [0, delta], [start, NO_CAP])
+
+    def locate(self, idx):
+        i = bisect_right(self.bounds, idx) - 1
+        return min(idx + self.shifts[i], self.caps[i])
+
+    # 先按本表、再按 other 换算的换算表：本表的各段按换算后所在的 other 中的段再分段
+    def then(self, other):
+        bounds, shifts, caps = [], [], []
+        ends = self.bounds[1:] + [None]
+        for lo, hi, shift, cap in zip(self.bounds, ends, self.shifts, self.caps):
+            j = bisect_right(other.bounds, min(lo + shift, cap)) - 1
+            while True:
+                bounds.append(lo)
+                shifts.append(shift + other.shifts[j])
+                caps.append(min(cap + other.shifts[j], other.caps[j]))
+                j += 1
+                # 段中换算后的下标达不到 other 的下一段
+                if j == len(other.bounds) or other.bounds[j] > cap:
+                    break
+                lo = other.bounds[j] - shift
+                if hi is not None and lo >= hi:
+                    break
+        return OffsetMap(bounds, shifts, caps)
+
+
+# text 中各行起始处的下标：第 0 行从 0 开始，其余各行从换行符之后开始
+def line_starts(text):
+    starts = [0]
+    idx = text.find('\n')
+    while idx >= 0:
+        starts.append(idx + 1)
+        idx = text.find('\n', idx + 1)
+    return starts
+
+
+# 源码中的位置：只存放下标与所在的源码，行号、列号在用到时才计算
+# 位置创建后只会被换算到编辑后的源码中（relocate），所指的仍是同一处，可直接共享
 class Position:
-    def __init__(self, idx, ln, col, fn, ftxt):
+    __slots__ = ('idx', 'source')
+
+    def __init__(self, idx, source):
         self.idx = idx  # 索引
-        self.ln = ln  # 行
-        self.col = col  # 列
-        self.fn = fn  # 文件名称
-        self.ftxt = ftxt
+        self.source = source
 
-    # 往前读取
-    def advance(self, current_char=None):
-        self.idx += 1  # 增加索引
-        self.col += 1  # 增加列号
+    def line_col(self):
+        return self.source.line_col(self.idx)
 
-        # 若遇到换行符
-        if current_char == '\n':
-            self.ln += 1  # 增加行号
-            self.col = 0  # 列号归零
+    # 行
+    @property
+    def ln(self):
+        return self.line_col()[0]
 
-        return self  # 返回对象自身
+    # 列
+    @property
+    def col(self):
+        return self.line_col()[1]
 
-    # 避免 python 引用性调用带来的问题（位置等）
+    # 文件名称
+    @property
+    def fn(self):
+        return self.source.fn
+
+    @property
+    def ftxt(self):
+        return self.source.text
+
+    # 位置不可变，无需复制
     def copy(self):
-        return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
+        return self
+
+    # 在最新的源码中的同一位置（源码被编辑过时，见 Source.edited）
+    def locate(self):
+        if self.source.edit is None:
+            return self
+        source, idx = self.source.locate(self.idx)
+        return type(self)(idx, source)
+
+    # 与 Token.relocate 相同，把下标换算到最新的源码中，此后不必再逐次换算
+    def relocate(self):
+        if self.source.edit is not None:
+            self.source, self.idx = self.source.locate(self.idx)
+        return self
+
+
+# 紧接在换行符之后、但仍算作换行符所在行末尾的位置（列号为换行符的列号加 1），用作换行 token 的结束位置
+class LineEndPosition(Position):
+    __slots__ = ()
+
+    def line_col(self):
+        ln, col = self.source.line_col(self.idx - 1)
+        return ln, col + 1
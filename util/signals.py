@@ -0,0 +1,67 @@
+#######################################
+# SIGNALS
+# 以 python 异常传递运行期错误与 RETURN / BREAK / CONTINUE 等非局部跳转
+# 正常求值直接返回值，只有出错或跳转时才需要付出抛出异常的代价
+#######################################
+
+
+# 运行期错误，error 为 RTError
+class RTErrorSignal(Exception):
+    def __init__(self, error):
+        super().__init__(error.details)
+        self.error = error
+
+
+# RETURN 关键字，由所在函数的调用处捕获
+class ReturnSignal(Exception):
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+
+# 没有被所在函数内的循环捕获的 BREAK，作用于调用者所在的循环
+class BreakSignal(Exception):
+    pass
+
+
+# 没有被所在函数内的循环捕获的 CONTINUE，作用于调用者所在的循环
+class ContinueSignal(Exception):
+    pass
+
+
+SIGNALS = (RTErrorSignal, ReturnSignal, BreakSignal, ContinueSignal)
+
+
+# 把 RTResult 转换为返回值，错误与跳转转换为异常；用于调用以 RTResult 传递控制流的代码（例如内建函数）
+def result_value(res):
+    if res.error:
+        raise RTErrorSignal(res.error)
+    if res.func_return_value:
+        raise ReturnSignal(res.func_return_value)
+    if res.loop_should_continue:
+        raise ContinueSignal()
+    if res.loop_should_break:
+        raise BreakSignal()
+    return res.value
+
+
+# 调用 fn(*args)，把返回值与异常转换回 RTResult
+def signal_result(fn, *args):
+    res = RTResult()
+    try:
+        return res.success(fn(*args))
+    except RTErrorSignal as signal:
+        return res.failure(signal.error)
+    except ReturnSignal as signal:
+        return res.success_return(signal.value)
+    except BreakSignal:
+        return res.success_break()
+    except ContinueSignal:
+        return res.success_continue()
+
+
+#######################################
+# IMPORTS
+#######################################
+
+from util.rt_result import RTResult
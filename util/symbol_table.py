@@ -1,19 +1,126 @@
 # 用于维持变量的值并在合适的时机将其回收；全局变量和局部变量（方法）具有各自的符号表；字典: key-value
+# 没有父级的符号表即全局符号表（见 basic/run.py）
 class SymbolTable:
+    # 曾在全局符号表以外的符号表中绑定过的名称；不在其中的名称沿符号表链查找必然落到全局符号表（见 LookupCache）
+    local_names = set()
+    # 绑定的版本：local_names 增加新名称或有名称被 remove 时加 1，使所有 LookupCache 失效
+    version = 0
+
     def __init__(self, parent=None):
         self.symbols = {}  # 字典是另一种可变容器模型，且可存储任意类型对象
         self.parent = parent  # 父亲符号表，可用于判断作用域
 
     def get(self, name):
-        value = self.symbols.get(name, None)  # 字典.get(key) --> value
         # 若该符号表查找失败，则尝试往父级符号表中去查找
         # 比如，于某个函数体内找不到变量 V，则可以在全局中查找到该变量 V
-        if value == None and self.parent:
-            return self.parent.get(name)
-        return value
+        # 以循环代替递归，深层递归调用（符号表链很长）时不会耗尽 python 调用栈
+        table = self
+        while table:
+            value = table.lookup(name)
+            if value is not None:
+                return value
+            table = table.parent
+        return None
+
+    # 只在当前符号表中查找，不存在时返回 None
+    def lookup(self, name):
+        return self.symbols.get(name)  # 字典.get(key) --> value
 
     def set(self, name, value):
+        if self.parent is not None and name not in SymbolTable.local_names:
+            bind_local_name(name)
         self.symbols[name] = value  # key-value 设置 vlaue
 
     def remove(self, name):
+        SymbolTable.version += 1
         del self.symbols[name]
+
+    # 当前符号表中已绑定的变量名
+    def names(self):
+        return list(self.symbols)
+
+
+# 以数组槽位存放局部变量的符号表；name -> slot 的映射在编译期确定（见 basic/resolver.py）
+# 槽位为 None 表示该局部变量尚未赋值，此时与 SymbolTable 一样继续向父级符号表查找
+class SlotSymbolTable(SymbolTable):
+    def __init__(self, slot_map, slots, parent=None):
+        super().__init__(parent)
+        self.slot_map = slot_map  # 字典：变量名 -> 槽位下标
+        self.slots = slots  # 列表：槽位下标 -> 值
+
+    def lookup(self, name):
+        slot = self.slot_map.get(name)
+        if slot is not None:
+            return self.slots[slot]
+        return self.symbols.get(name)
+
+    def set(self, name, value):
+        slot = self.slot_map.get(name)
+        if slot is not None:
+            self.slots[slot] = value
+        else:
+            if name not in SymbolTable.local_names:
+                bind_local_name(name)
+            self.symbols[name] = value
+
+    def remove(self, name):
+        SymbolTable.version += 1
+        slot = self.slot_map.get(name)
+        if slot is not None:
+            self.slots[slot] = None
+        else:
+            del self.symbols[name]
+
+    def names(self):
+        return [name for name, slot in self.slot_map.items()
+                if self.slots[slot] is not None] + list(self.symbols)
+
+
+# 记录名称 name 在全局符号表以外被绑定；槽位中的局部变量不经过 set 写入，由 basic/resolver.py 在分配槽位时记录
+def bind_local_name(name):
+    if name not in SymbolTable.local_names:
+        SymbolTable.local_names.add(name)
+        SymbolTable.version += 1
+
+
+# 按名称查找变量的内联缓存：每个变量访问结点（VarAccessNode.cache）一个
+# 名称上次在全局符号表中找到、且从未在其他符号表中绑定过时，记住全局符号表的字典，
+# 此后只要 SymbolTable.version 未变，就直接从该字典读取，不再沿（动态作用域下可能很长的）符号表链逐层查找
+class LookupCache:
+    __slots__ = ('name', 'version', 'symbols')
+
+    # 所有缓存的命中与未命中次数
+    hits = 0
+    misses = 0
+
+    def __init__(self, name):
+        self.name = name
+        self.version = -1  # 缓存有效时为 SymbolTable.version
+        self.symbols = None  # 全局符号表的字典
+
+    # 从 symbol_table 开始按名称查找，未找到时返回 None
+    def get(self, symbol_table):
+        if self.version == SymbolTable.version:
+            value = self.symbols.get(self.name)
+            if value is not None:
+                LookupCache.hits += 1
+                return value
+        LookupCache.misses += 1
+
+        name = self.name
+        table = symbol_table
+        while table:
+            value = table.lookup(name)
+            if value is not None:
+                if table.parent is None and name not in SymbolTable.local_names:
+                    self.version = SymbolTable.version
+                    self.symbols = table.symbols
+                return value
+            table = table.parent
+        return None
+
+    # 命中率；尚未查找过时为 0
+    @staticmethod
+    def hit_rate():
+        total = LookupCache.hits + LookupCache.misses
+        return LookupCache.hits / total if total else 0
@@ -6,9 +6,18 @@
 
 import math
 import os
+from array import array
+from collections import OrderedDict
+from itertools import repeat
 
 
 class Value:
+    # 值创建后不再被修改，在变量、参数、列表元素之间直接共享，读取时不必复制
+    # pos_start / pos_end / context 记录的是值被创建之处；运算出错时由 util/operations.py 的 binary_error 重新定位
+    # 属性存放于 __slots__ 而不是每个对象各自的 __dict__ 中：运算结果、列表元素等值的数量巨大，以此减少内存占用
+    # 子类也都要声明 __slots__（没有新属性时为空），否则又会带上 __dict__
+    __slots__ = ('pos_start', 'pos_end', 'context')
+
     def __init__(self):
         self.set_pos()  # 报错位置
         self.set_context()  # 报错位置的上下文
@@ -81,6 +90,10 @@ class Value:
     def execute(self, args):
         return RTResult().failure(self.illegal_operation())
 
+    # 以异常传递控制流的执行方式调用该值：直接返回结果，错误与跳转以 util/signals.py 中的异常抛出
+    def call(self, args):
+        return result_value(self.execute(args))
+
     def copy(self):
         raise Exception('No copy method defined')
 
@@ -99,6 +112,8 @@ class Value:
 
 # 继承自 Value 类，对于父类的方法，通过 self.xxx 即可使用
 class Number(Value):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         super().__init__()  # 调用父类的 __init__ 方法
         self.value = value
@@ -230,6 +245,8 @@ Number.math_PI = Number(math.pi)
 
 
 class String(Value):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         super().__init__()
         self.value = value
@@ -265,71 +282,202 @@ class String(Value):
         return f'"{self.value}"'
 
 
+# 由 python 数值组成的 array：全为整数时为 array('q')，全为浮点数时为 array('d')，每个元素只占 8 字节
+# 整数与浮点数混合（array('d') 会把整数变为浮点数）或整数超出 64 位时返回 None
+def number_array(numbers):
+    try:
+        return array('q', numbers)
+    except (TypeError, OverflowError):
+        pass
+    if all(type(number) is float for number in numbers):
+        return array('d', numbers)
+    return None
+
+
+# 缓冲区（python 列表或 array）转换为存放 Value 的 python 列表
+def value_list(values):
+    return values if type(values) is list else [Number(value) for value in values]
+
+
+# 列表的值同样不可变：+、*、- 得到新的列表，原列表不受影响
+# 为了不在每次运算时复制全部元素，多个 List 可以共享同一个缓冲区 elements，各自只看到其中前 length 个元素
+# 至多一个 List 是缓冲区的所有者（owner），只有它可以原地修改缓冲区：
+#   + 与 * 直接在缓冲区末尾追加，并把所有权转交给得到的新列表，原列表仍只看到前 length 个元素，因此在循环中累加列表是 O(1) 的
+#   缓冲区的前 shared_length 个元素可能被其他 List 看到，所有者不能原地修改它们
+# 不是所有者的列表需要追加或修改时，先复制出一份只属于自己的缓冲区
+# 缓冲区是存放 Value 的 python 列表；只含数字的列表则改用存放 python 数值的 array（见 number_array），
+# 元素只在被 / 读取等需要 Value 时才包装为 Number；追加了无法存入 array 的值时，再换回 python 列表
 class List(Value):
-    def __init__(self, elements):
+    __slots__ = ('elements', 'length', 'owner', 'shared_length')
+
+    # 只传入 elements 时，新列表独占 elements，调用者此后不应再修改它；传入 length 时与其他 List 共享 elements
+    def __init__(self, elements, length=None):
         super().__init__()
-        self.elements = elements  # 列表
+        if length is None and type(elements) is list and all(type(element) is Number for element in elements):
+            numbers = number_array([element.value for element in elements])
+            if numbers is not None:
+                elements = numbers
+        self.elements = elements  # 缓冲区
+        self.length = len(elements) if length is None else length  # 元素个数
+        self.owner = length is None
+        self.shared_length = 0
+
+    # 缓冲区中属于本列表的部分（python 列表或 array），不可修改
+    def get_buffer(self):
+        if self.length == len(self.elements):
+            return self.elements
+        return self.elements[:self.length]
+
+    # 列表的全部元素（Value），返回的 python 列表不可修改
+    def get_elements(self):
+        return value_list(self.get_buffer())
+
+    # 列表的全部元素对应的 python 数值；含有数字以外的元素时返回 None
+    def get_numbers(self):
+        if type(self.elements) is not list:
+            return self.get_buffer()
+        elements = self.get_buffer()
+        if not all(type(element) is Number for element in elements):
+            return None
+        return [element.value for element in elements]
+
+    # mendax 中的下标（负数从末尾计数）转换为缓冲区中的下标；不是整数或越界时返回 None
+    def get_index(self, index):
+        if not isinstance(index, int):
+            return None
+        if index < 0:
+            index += self.length
+        return index if 0 <= index < self.length else None
+
+    # 缓冲区中下标为 index 的元素（Value）
+    def get_element(self, index):
+        element = self.elements[index]
+        return element if type(self.elements) is list else Number(element)
+
+    # values（python 列表或 array）转换为可以追加到本列表缓冲区中的形式；无法存入 array 时返回 None
+    def convert(self, values):
+        elements = self.elements
+        if type(elements) is list:
+            return value_list(values)
+        if type(values) is array:
+            return values if values.typecode == elements.typecode else None
+        if not all(type(value) is Number for value in values):
+            return None
+        numbers = number_array([value.value for value in values])
+        return numbers if numbers is not None and numbers.typecode == elements.typecode else None
+
+    # 末尾追加 values（python 列表或 array）得到的新列表
+    def extended(self, values):
+        converted = self.convert(values)
+        if converted is None:
+            # 追加的值无法存入 array，新列表重新选择缓冲区
+            return List(self.get_elements() + value_list(values))
+        if not self.owner:
+            return List(self.elements[:self.length] + converted)
+
+        self.elements.extend(converted)
+        new_list = List(self.elements, len(self.elements))
+        new_list.owner = True
+        new_list.shared_length = self.length  # 前 length 个元素仍被本列表看到
+        self.owner = False
+        return new_list
+
+    # 以下为 APPEND、POP、EXTEND 等内建函数对列表的原地修改
+
+    # 取得一份只属于本列表的缓冲区，其中的元素都可以原地修改
+    def own_elements(self):
+        self.elements = self.elements[:self.length]
+        self.owner = True
+        self.shared_length = 0
+
+    def append(self, values):  # values 为 python 列表或 array
+        converted = self.convert(values)
+        if converted is None:
+            self.elements = self.get_elements()[:]
+            self.owner = True
+            self.shared_length = 0
+            converted = value_list(values)
+        elif not self.owner:
+            self.own_elements()
+        self.elements.extend(converted)
+        self.length = len(self.elements)
+
+    def pop(self, index):  # index 为缓冲区中的下标
+        if not self.owner or index < self.shared_length:
+            self.own_elements()
+        element = self.get_element(index)
+        del self.elements[index]
+        self.length -= 1
+        return element
 
     # 往列表中添加元素 （重载） 
     def added_to(self, other):
-        new_list = self.copy()
-        new_list.elements.append(other)
-        return new_list, None
+        return self.extended([other]), None
 
     # 从列表中删除元素 （重载） 
     def subbed_by(self, other):
         if isinstance(other, Number):
-            new_list = self.copy()
-            try:
-                new_list.elements.pop(other.value)
-                return new_list, None
-            except:
+            index = self.get_index(other.value)
+            if index is None:
                 return None, RTError(
                     other.pos_start, other.pos_end,
                     'Element at this index could not be removed from list because index is out of bounds',
                     self.context
                 )
+
+            # 删除末尾元素时，新列表只是少看到一个元素，与本列表共享缓冲区
+            if index == self.length - 1:
+                if self.owner:
+                    self.shared_length = max(self.shared_length, index)
+                return List(self.elements, index), None
+
+            elements = self.elements[:self.length]
+            del elements[index]
+            return List(elements), None
         else:
             return None, Value.illegal_operation(self, other)
 
     # 列表间的合并 （重载） 
     def multed_by(self, other):
         if isinstance(other, List):
-            new_list = self.copy()
-            new_list.elements.extend(other.elements)  # extend 拼接
-            return new_list, None
+            return self.extended(other.get_buffer()), None  # extend 拼接
         else:
             return None, Value.illegal_operation(self, other)
 
     # 根据索引从列表中取具体元素的值 （重载） 
     def dived_by(self, other):
         if isinstance(other, Number):
-            try:
-                return self.elements[other.value], None
-            except:
+            index = self.get_index(other.value)
+            if index is None:
                 return None, RTError(
                     other.pos_start, other.pos_end,
                     'Element at this index could not be retrieved from list because index is out of bounds',
                     self.context
                 )
+            return self.get_element(index), None
         else:
             return None, Value.illegal_operation(self, other)
 
+    # 副本与本列表共享缓冲区，此后本列表不能再原地修改已有的元素
     def copy(self):
-        copy = List(self.elements)
+        copy = List(self.elements, self.length)
+        if self.owner:
+            self.shared_length = self.length
         copy.set_pos(self.pos_start, self.pos_end)
         copy.set_context(self.context)
         return copy
 
     def __str__(self):
-        return ", ".join([str(x) for x in self.elements])
+        return ", ".join([str(x) for x in self.get_elements()])
 
     def __repr__(self):
-        return f'[{", ".join([repr(x) for x in self.elements])}]'
+        return f'[{", ".join([repr(x) for x in self.get_elements()])}]'
 
 
 # 内建函数
 class BaseFunction(Value):
+    __slots__ = ('name',)
+
     def __init__(self, name):
         super().__init__()
         self.name = name or "<anonymous>"
@@ -342,6 +490,13 @@ class BaseFunction(Value):
             new_context.parent.symbol_table)  # 保证于函数体内可以使用体外上一层的变量
         return new_context
 
+    # 生成新的上下文，函数的局部变量存放于 slots 的槽位中（slot_map : 变量名 -> 槽位下标）
+    def generate_new_slot_context(self, slot_map, slots):
+        new_context = Context(self.name, self.context, self.pos_start)
+        new_context.symbol_table = SlotSymbolTable(
+            slot_map, slots, new_context.parent.symbol_table)
+        return new_context
+
     # 检查传入被调用函数的参数个数是否符合规范
     def check_args(self, arg_names, args):
         res = RTResult()
@@ -368,7 +523,6 @@ class BaseFunction(Value):
         for i in range(len(args)):
             arg_name = arg_names[i]  # 参数名称
             arg_value = args[i]  # 参数值
-            arg_value.set_context(exec_ctx)  # 更新当前结点的上下文，便于报错时的定位处理
             exec_ctx.symbol_table.set(arg_name, arg_value)  # 将形参的值传入被调用函数的符号表中
 
     def check_and_populate_args(self, arg_names, args, exec_ctx):
@@ -379,8 +533,36 @@ class BaseFunction(Value):
         self.populate_args(arg_names, args, exec_ctx)
         return res.success(None)
 
+    # 返回形如 call(args) -> RTResult 的函数，供 MAP 等内建函数对列表的每个元素反复调用本函数
+    def caller(self):
+        return self.execute
+
+    # 执行尾调用（见 TailCall）之前调用，caller_ctx 为已经执行完毕的调用者的上下文
+    # 调用者的局部变量若全部被本函数的形参遮蔽，之后按名称查找时不会再访问到调用者的符号表，
+    # 此时本函数直接接在调用者的上层执行，如同在调用者被调用处调用，上下文链不随尾递归的深度增长
+    def skip_caller_context(self, caller_ctx, arg_names, args):
+        if self.context is not caller_ctx or len(args) != len(arg_names):
+            return
+        for name in caller_ctx.symbol_table.names():
+            if name not in arg_names:
+                return
+        self.context = caller_ctx.parent
+        self.pos_start = caller_ctx.parent_entry_pos
+
+
+# 尾调用：处于尾部位置的函数调用不立即执行，而是作为返回值交还给所在函数的 execute，在同一个循环中继续执行
+# 只在尾部位置（见 basic/tail_calls.py）出现，不会作为普通的值被其他结点使用
+class TailCall:
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, args):
+        self.func = func  # 被调用的函数（已设置调用处的位置）
+        self.args = args
+
 
 class Function(BaseFunction):
+    __slots__ = ('body_node', 'arg_names', 'should_auto_return')
+
     def __init__(self, name, body_node, arg_names, should_auto_return):
         super().__init__(name)
         self.body_node = body_node
@@ -392,23 +574,30 @@ class Function(BaseFunction):
         res = RTResult()
         interpreter = Interpreter()  # 因函数体内部分变量拥有独立作用域，故另设一个单独的解释器执行体内逻辑
         new_context = Context(self.name, self.context)  # 此处原代码
-        # 故设置独立的上下文，self.generate_new_context 函数体内会做相关符号表的处理
-        exec_ctx = self.generate_new_context()
-
-        res.register(self.check_and_populate_args(
-            self.arg_names, args, exec_ctx))
-        if res.should_return():
-            return res
-
-        # RETURN 关键字的处理 含义 ？
-        value = res.register(interpreter.visit(
-            self.body_node, exec_ctx))  # 解释器的执行结果
-        if res.should_return() and res.func_return_value == None:
-            return res
+        func = self
 
-        ret_value = (
-            value if self.should_auto_return else None) or res.func_return_value or Number.null
-        return res.success(ret_value)
+        # 返回值为尾调用时，在此循环中接着执行被调用的函数，而不是递归地嵌套执行
+        while True:
+            # 故设置独立的上下文，self.generate_new_context 函数体内会做相关符号表的处理
+            exec_ctx = func.generate_new_context()
+
+            res.register(func.check_and_populate_args(
+                func.arg_names, args, exec_ctx))
+            if res.should_return():
+                return res
+
+            # RETURN 关键字的处理 含义 ？
+            value = res.register(interpreter.visit(
+                func.body_node, exec_ctx))  # 解释器的执行结果
+            if res.should_return() and res.func_return_value == None:
+                return res
+
+            ret_value = (
+                value if func.should_auto_return else None) or res.func_return_value or Number.null
+            if type(ret_value) is not TailCall:
+                return res.success(ret_value)
+            func, args = ret_value.func, ret_value.args
+            func.skip_caller_context(exec_ctx, func.arg_names, args)
 
     def copy(self):
         copy = Function(self.name, self.body_node,
@@ -421,7 +610,275 @@ class Function(BaseFunction):
         return f"<function {self.name}>"
 
 
+# 由闭包编译器生成的函数，函数体已被编译为闭包 body(context) -> RTResult
+class CompiledFunction(Function):
+    __slots__ = ('body', 'scope')
+
+    def __init__(self, name, body_node, arg_names, should_auto_return, body, scope):
+        super().__init__(name, body_node, arg_names, should_auto_return)
+        self.body = body
+        self.scope = scope  # 局部变量布局（basic/resolver.py 中的 FunctionScope）
+
+    def execute(self, args):
+        res = RTResult()
+        func = self
+
+        # 返回值为尾调用时，在此循环中接着执行被调用的函数
+        while True:
+            scope = func.scope
+            slots = [None] * len(scope.slot_names)
+            exec_ctx = func.generate_new_slot_context(scope.slot_map, slots)
+
+            res.register(func.check_args(func.arg_names, args))
+            if res.should_return():
+                return res
+
+            for i in range(len(args)):
+                slots[scope.arg_slots[i]] = args[i]
+
+            value = res.register(func.body(exec_ctx))
+            if res.should_return() and res.func_return_value == None:
+                return res
+
+            ret_value = (
+                value if func.should_auto_return else None) or res.func_return_value or Number.null
+            if type(ret_value) is not TailCall:
+                return res.success(ret_value)
+            func, args = ret_value.func, ret_value.args
+            func.skip_caller_context(exec_ctx, func.arg_names, args)
+
+    def copy(self):
+        copy = CompiledFunction(self.name, self.body_node, self.arg_names,
+                                self.should_auto_return, self.body, self.scope)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+
+# 由字节码编译器生成的函数，函数体为 basic/bytecode.py 中的 Code，由 basic/vm.py 中的 VM 执行
+# vm 为创建函数的 VM，经由内建函数（MAP、MEMO 等）的调用仍由它执行，共用调用深度与 recursion_limit
+class VMFunction(BaseFunction):
+    __slots__ = ('code', 'vm')
+
+    def __init__(self, name, code, vm=None):
+        super().__init__(name)
+        self.code = code
+        self.vm = vm
+
+    def execute(self, args):
+        return (self.vm or VM()).call(self, args)
+
+    def copy(self):
+        copy = VMFunction(self.name, self.code, self.vm)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+    def __repr__(self):
+        return f"<function {self.name}>"
+
+
+# 由 SignalInterpreter 执行的函数：正常求值直接返回值，错误与跳转以 util/signals.py 中的异常传递
+class SignalFunction(Function):
+    __slots__ = ()
+
+    def call(self, args):
+        func = self
+
+        # 返回值为尾调用时，在此循环中接着执行被调用的函数
+        while True:
+            exec_ctx = func.generate_new_context()
+
+            res = func.check_args(func.arg_names, args)
+            if res.error:
+                raise RTErrorSignal(res.error)
+            func.populate_args(func.arg_names, args, exec_ctx)
+
+            try:
+                value = SignalInterpreter().visit(func.body_node, exec_ctx)
+                if not func.should_auto_return:
+                    value = Number.null
+            except ReturnSignal as signal:
+                value = signal.value
+
+            if type(value) is not TailCall:
+                return value
+            func, args = value.func, value.args
+            func.skip_caller_context(exec_ctx, func.arg_names, args)
+
+    def execute(self, args):
+        return signal_result(self.call, args)
+
+    def copy(self):
+        copy = SignalFunction(self.name, self.body_node,
+                              self.arg_names, self.should_auto_return)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+
+# 由 StackInterpreter 执行的函数：函数体的求值过程存放于解释器的显式栈中，不占用 python 调用栈
+# interpreter 为定义函数的解释器，经由内建函数（MAP、MEMO 等）的调用仍由它执行，共用调用深度与 recursion_limit
+class StackFunction(Function):
+    __slots__ = ('interpreter',)
+
+    def __init__(self, name, body_node, arg_names, should_auto_return, interpreter=None):
+        super().__init__(name, body_node, arg_names, should_auto_return)
+        self.interpreter = interpreter
+
+    def call(self, args):
+        return (self.interpreter or StackInterpreter()).call(self, args)
+
+    def execute(self, args):
+        return signal_result(self.call, args)
+
+    def copy(self):
+        copy = StackFunction(self.name, self.body_node,
+                             self.arg_names, self.should_auto_return, self.interpreter)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+
+# 由转译器生成的函数，函数体为 python 函数 body(context, slots) -> Value，见 basic/transpiler.py
+# 运行期错误与函数体外的 BREAK / CONTINUE 以 util/signals.py 中的异常传递
+class PythonFunction(BaseFunction):
+    __slots__ = ('info', 'body')
+
+    def __init__(self, info, body):
+        super().__init__(info.name)
+        self.info = info  # FunctionInfo：形参、槽位等编译期信息
+        self.body = body
+
+    # 在转译生成的代码中直接调用，返回函数的返回值
+    def call(self, args):
+        func = self
+
+        # 返回值为尾调用时，在此循环中接着执行被调用的函数
+        while True:
+            info = func.info
+            slots = [None] * info.slot_count
+            exec_ctx = func.generate_new_slot_context(info.slot_map, slots)
+
+            res = func.check_args(info.arg_names, args)
+            if res.error:
+                raise RTErrorSignal(res.error)
+
+            for i in range(len(args)):
+                slots[info.arg_slots[i]] = args[i]
+
+            value = func.body(exec_ctx, slots)
+            if type(value) is not TailCall:
+                return value
+            func, args = value.func, value.args
+            func.skip_caller_context(exec_ctx, func.info.arg_names, args)
+
+    # 供其他执行引擎（例如内建函数）调用，把异常转换回 RTResult
+    def execute(self, args):
+        return signal_result(self.call, args)
+
+    def copy(self):
+        copy = PythonFunction(self.info, self.body)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+    def __repr__(self):
+        return f"<function {self.name}>"
+
+
+MEMO_CACHE_SIZE = 1024  # 每个记忆化函数最多缓存的结果个数
+
+
+# 值作为缓存键的形式：相等的键对应的值在 mendax 中不可区分；函数等无法作为键的值返回 None
+# 数字与字符串带上 python 类型，1 与 1.0 是不同的键；只含数字的列表直接取 array 的字节
+def value_key(value):
+    if type(value) is Number or type(value) is String:
+        return type(value.value), value.value
+    if type(value) is List:
+        buffer = value.get_buffer()
+        if type(buffer) is not list:
+            return buffer.typecode, buffer.tobytes()
+        keys = tuple(value_key(element) for element in buffer)
+        return None if None in keys else (list, keys)
+    return None
+
+
+# 参数列表作为缓存键的形式；有参数无法作为键时返回 None
+def memo_key(args):
+    keys = tuple(value_key(arg) for arg in args)
+    return None if None in keys else keys
+
+
+# 记忆化函数的缓存：按最近使用的顺序排列，超出 max_size 时淘汰最久未使用的结果
+# 缓存中的列表不交给调用者，调用者得到的是其副本（共享缓冲区，见 List），APPEND 等不会改动缓存
+class MemoCache:
+    def __init__(self, max_size):
+        self.entries = OrderedDict()  # 参数的键 -> 返回值
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    # 命中时返回缓存的返回值，否则返回 None
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value.copy() if type(value) is List else value
+
+    # 存入返回值，返回交给调用者的值
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return value.copy() if type(value) is List else value
+
+
+# 记忆化函数（MEMO 内建函数，或由 basic/purity.py 推断出的纯函数）：以参数的值为键缓存被包装函数 func 的返回值
+# 函数值在调用时会被复制，各个副本共享同一个 MemoCache；出错、BREAK / CONTINUE 的调用不缓存
+class MemoFunction(BaseFunction):
+    __slots__ = ('func', 'cache')
+
+    def __init__(self, func, cache=None):
+        super().__init__(func.name)
+        self.func = func
+        self.cache = cache or MemoCache(MEMO_CACHE_SIZE)
+        self.set_context(func.context)
+        self.set_pos(func.pos_start, func.pos_end)
+
+    # 被包装的函数，与本函数一样位于调用处
+    def wrapped(self):
+        return self.func.copy().set_pos(self.pos_start, self.pos_end).set_context(self.context)
+
+    def execute(self, args):
+        key = memo_key(args)
+        if key is None:
+            return self.wrapped().execute(args)
+
+        value = self.cache.get(key)
+        if value is None:
+            res = self.wrapped().execute(args)
+            if res.should_return():
+                return res
+            value = self.cache.put(key, res.value)
+        return RTResult().success(value)
+
+    def copy(self):
+        copy = MemoFunction(self.func, self.cache)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+    def __repr__(self):
+        return repr(self.func)
+
+
 class BuiltInFunction(BaseFunction):
+    __slots__ = ()
+
     def __init__(self, name):
         super().__init__(name)
 
@@ -442,6 +899,18 @@ class BuiltInFunction(BaseFunction):
             return res
         return res.success(return_value)
 
+    # 各次调用共用同一个上下文，且只查找一次 execute_<name>；内建函数不会保留上下文，重新填入参数即可
+    def caller(self):
+        method = getattr(self, f'execute_{self.name}', self.no_visit_method)
+        exec_ctx = self.generate_new_context()
+
+        def call(args):
+            res = self.check_and_populate_args(method.arg_names, args, exec_ctx)
+            if res.error:
+                return res
+            return method(exec_ctx)
+        return call
+
     def no_visit_method(self, node, context):
         raise Exception(f'No execute_{self.name} method defined')
 
@@ -527,7 +996,7 @@ class BuiltInFunction(BaseFunction):
                 exec_ctx
             ))
 
-        list_.elements.append(value)
+        list_.append([value])
         return RTResult().success(Number.null)
 
     execute_append.arg_names = ["list", "value"]
@@ -550,15 +1019,14 @@ class BuiltInFunction(BaseFunction):
                 exec_ctx
             ))
 
-        try:
-            element = list_.elements.pop(index.value)
-        except:
+        index = list_.get_index(index.value)
+        if index is None:
             return RTResult().failure(RTError(
                 self.pos_start, self.pos_end,
                 'Element at this index could not be removed from list because index is out of bounds',
                 exec_ctx
             ))
-        return RTResult().success(element)
+        return RTResult().success(list_.pop(index))
 
     execute_pop.arg_names = ["list", "index"]
 
@@ -580,7 +1048,7 @@ class BuiltInFunction(BaseFunction):
                 exec_ctx
             ))
 
-        listA.elements.extend(listB.elements)
+        listA.append(listB.get_buffer())
         return RTResult().success(Number.null)
 
     execute_extend.arg_names = ["listA", "listB"]
@@ -596,10 +1064,263 @@ class BuiltInFunction(BaseFunction):
                 exec_ctx
             ))
 
-        return RTResult().success(Number(len(list_.elements)))
+        return RTResult().success(Number(list_.length))
 
     execute_len.arg_names = ["list"]
 
+    # 逐元素运算（VEC_ADD、VEC_SUB、VEC_MUL、VEC_DIV、VEC_POW）：a、b 为数字或只含数字的列表，至少一个为列表，
+    # 两个都是列表时长度须相同；对整个 array 一次运算，结果为新的列表
+    def execute_vector(self, exec_ctx, method_name):
+        a = exec_ctx.symbol_table.get("a")
+        b = exec_ctx.symbol_table.get("b")
+        numbers_a = a.get_numbers() if isinstance(a, List) else None
+        numbers_b = b.get_numbers() if isinstance(b, List) else None
+
+        if (
+            (numbers_a is None and numbers_b is None) or
+            (numbers_a is None and not isinstance(a, Number)) or
+            (numbers_b is None and not isinstance(b, Number))
+        ):
+            return RTResult().failure(RTError(
+                self.pos_start, self.pos_end,
+                "Arguments must be numbers or lists of numbers, at least one a list",
+                exec_ctx
+            ))
+
+        if numbers_a is not None and numbers_b is not None and len(numbers_a) != len(numbers_b):
+            return RTResult().failure(RTError(
+                self.pos_start, self.pos_end,
+                "Lists must have the same length",
+                exec_ctx
+            ))
+
+        operation = NUMBER_OPERATIONS[method_name]
+        try:
+            if numbers_b is None:
+                numbers = list(map(operation, numbers_a, repeat(b.value, len(numbers_a))))
+            elif numbers_a is None:
+                numbers = list(map(operation, repeat(a.value, len(numbers_b)), numbers_b))
+            else:
+                numbers = list(map(operation, numbers_a, numbers_b))
+        except ZeroDivisionError:
+            return RTResult().failure(RTError(
+                self.pos_start, self.pos_end,
+                "Division by zero",
+                exec_ctx
+            ))
+
+        elements = number_array(numbers)
+        return RTResult().success(List(elements if elements is not None else value_list(numbers)))
+
+    def execute_vec_add(self, exec_ctx):
+        return self.execute_vector(exec_ctx, 'added_to')
+
+    execute_vec_add.arg_names = ["a", "b"]
+
+    def execute_vec_sub(self, exec_ctx):
+        return self.execute_vector(exec_ctx, 'subbed_by')
+
+    execute_vec_sub.arg_names = ["a", "b"]
+
+    def execute_vec_mul(self, exec_ctx):
+        return self.execute_vector(exec_ctx, 'multed_by')
+
+    execute_vec_mul.arg_names = ["a", "b"]
+
+    def execute_vec_div(self, exec_ctx):
+        return self.execute_vector(exec_ctx, 'dived_by')
+
+    execute_vec_div.arg_names = ["a", "b"]
+
+    def execute_vec_pow(self, exec_ctx):
+        return self.execute_vector(exec_ctx, 'powed_by')
+
+    execute_vec_pow.arg_names = ["a", "b"]
+
+    # MAP、FILTER、REDUCE 的参数检查：list 须为列表，func 须为函数；通过时返回 None
+    def check_list_and_function(self, list_, func, exec_ctx):
+        if not isinstance(list_, List):
+            return RTError(
+                self.pos_start, self.pos_end,
+                "First argument must be list",
+                exec_ctx
+            )
+
+        if not isinstance(func, BaseFunction):
+            return RTError(
+                self.pos_start, self.pos_end,
+                "Second argument must be function",
+                exec_ctx
+            )
+
+        return None
+
+    # 在 python 中遍历列表并反复调用的 func：如同在本内建函数被调用处调用，
+    # 上下文为调用者的上下文，函数体内看不到内建函数的形参 list、func
+    def function_caller(self, func):
+        return func.copy().set_pos(self.pos_start, self.pos_end).set_context(self.context).caller()
+
+    # 对列表的每个元素调用 func，返回由结果组成的新列表
+    def execute_map(self, exec_ctx):
+        res = RTResult()
+        list_ = exec_ctx.symbol_table.get("list")
+        func = exec_ctx.symbol_table.get("func")
+
+        error = self.check_list_and_function(list_, func, exec_ctx)
+        if error:
+            return res.failure(error)
+
+        call = self.function_caller(func)
+        elements = []
+        for element in list_.get_elements():
+            elements.append(res.register(call([element])))
+            if res.should_return():
+                return res
+
+        return res.success(List(elements))
+
+    execute_map.arg_names = ["list", "func"]
+
+    # 保留列表中 func 的结果为真的元素
+    def execute_filter(self, exec_ctx):
+        res = RTResult()
+        list_ = exec_ctx.symbol_table.get("list")
+        func = exec_ctx.symbol_table.get("func")
+
+        error = self.check_list_and_function(list_, func, exec_ctx)
+        if error:
+            return res.failure(error)
+
+        call = self.function_caller(func)
+        elements = []
+        for element in list_.get_elements():
+            value = res.register(call([element]))
+            if res.should_return():
+                return res
+            if value.is_true():
+                elements.append(element)
+
+        return res.success(List(elements))
+
+    execute_filter.arg_names = ["list", "func"]
+
+    # 从 initial 开始，依次以 func(累积值, 元素) 的结果作为新的累积值
+    def execute_reduce(self, exec_ctx):
+        res = RTResult()
+        list_ = exec_ctx.symbol_table.get("list")
+        func = exec_ctx.symbol_table.get("func")
+        value = exec_ctx.symbol_table.get("initial")
+
+        error = self.check_list_and_function(list_, func, exec_ctx)
+        if error:
+            return res.failure(error)
+
+        call = self.function_caller(func)
+        for element in list_.get_elements():
+            value = res.register(call([value, element]))
+            if res.should_return():
+                return res
+
+        return res.success(value)
+
+    execute_reduce.arg_names = ["list", "func", "initial"]
+
+    # SUM、MIN、MAX：list 须为只含数字的列表，直接对缓冲区中的 python 数值运算，不调用解释器
+    def execute_aggregate(self, exec_ctx, aggregate, allow_empty):
+        list_ = exec_ctx.symbol_table.get("list")
+        numbers = list_.get_numbers() if isinstance(list_, List) else None
+
+        if numbers is None:
+            return RTResult().failure(RTError(
+                self.pos_start, self.pos_end,
+                "Argument must be list of numbers",
+                exec_ctx
+            ))
+
+        if not allow_empty and len(numbers) == 0:
+            return RTResult().failure(RTError(
+                self.pos_start, self.pos_end,
+                "List must not be empty",
+                exec_ctx
+            ))
+
+        return RTResult().success(Number(aggregate(numbers)))
+
+    def execute_sum(self, exec_ctx):
+        return self.execute_aggregate(exec_ctx, sum, True)
+
+    execute_sum.arg_names = ["list"]
+
+    def execute_min(self, exec_ctx):
+        return self.execute_aggregate(exec_ctx, min, False)
+
+    execute_min.arg_names = ["list"]
+
+    def execute_max(self, exec_ctx):
+        return self.execute_aggregate(exec_ctx, max, False)
+
+    execute_max.arg_names = ["list"]
+
+    # 由 start 起、每次加 1、小于 end 的数字组成的列表，与 FOR i = start TO end 中 i 的取值相同
+    def execute_range(self, exec_ctx):
+        start = exec_ctx.symbol_table.get("start")
+        end = exec_ctx.symbol_table.get("end")
+
+        if not isinstance(start, Number) or not isinstance(end, Number):
+            return RTResult().failure(RTError(
+                self.pos_start, self.pos_end,
+                "Arguments must be numbers",
+                exec_ctx
+            ))
+
+        if type(start.value) is int and type(end.value) is int:
+            numbers = range(start.value, end.value)
+        else:
+            numbers = []
+            i = start.value
+            while i < end.value:
+                numbers.append(i)
+                i += 1
+
+        elements = number_array(numbers)
+        return RTResult().success(List(elements if elements is not None else value_list(numbers)))
+
+    execute_range.arg_names = ["start", "end"]
+
+    # 返回 func 的记忆化版本：相同参数的调用直接返回缓存的结果
+    # 递归函数需以同一名称重新绑定（VAR fib = MEMO(fib)），函数体内按名称查找到的才是记忆化版本
+    def execute_memo(self, exec_ctx):
+        func = exec_ctx.symbol_table.get("func")
+
+        if not isinstance(func, BaseFunction):
+            return RTResult().failure(RTError(
+                self.pos_start, self.pos_end,
+                "Argument must be function",
+                exec_ctx
+            ))
+
+        if isinstance(func, MemoFunction):
+            return RTResult().success(func)
+        return RTResult().success(MemoFunction(func))
+
+    execute_memo.arg_names = ["func"]
+
+    # 记忆化函数的缓存统计：[命中次数, 未命中次数, 缓存的结果个数]
+    def execute_memo_stats(self, exec_ctx):
+        func = exec_ctx.symbol_table.get("func")
+
+        if not isinstance(func, MemoFunction):
+            return RTResult().failure(RTError(
+                self.pos_start, self.pos_end,
+                "Argument must be memoized function",
+                exec_ctx
+            ))
+
+        cache = func.cache
+        return RTResult().success(List([Number(cache.hits), Number(cache.misses), Number(len(cache.entries))]))
+
+    execute_memo_stats.arg_names = ["func"]
+
     # （内置）运行函数
     def execute_run(self, exec_ctx):
         fn = exec_ctx.symbol_table.get("fn")
@@ -651,6 +1372,20 @@ BuiltInFunction.append = BuiltInFunction("append")
 BuiltInFunction.pop = BuiltInFunction("pop")
 BuiltInFunction.extend = BuiltInFunction("extend")
 BuiltInFunction.len = BuiltInFunction("len")
+BuiltInFunction.vec_add = BuiltInFunction("vec_add")
+BuiltInFunction.vec_sub = BuiltInFunction("vec_sub")
+BuiltInFunction.vec_mul = BuiltInFunction("vec_mul")
+BuiltInFunction.vec_div = BuiltInFunction("vec_div")
+BuiltInFunction.vec_pow = BuiltInFunction("vec_pow")
+BuiltInFunction.map = BuiltInFunction("map")
+BuiltInFunction.filter = BuiltInFunction("filter")
+BuiltInFunction.reduce = BuiltInFunction("reduce")
+BuiltInFunction.sum = BuiltInFunction("sum")
+BuiltInFunction.min = BuiltInFunction("min")
+BuiltInFunction.max = BuiltInFunction("max")
+BuiltInFunction.range = BuiltInFunction("range")
+BuiltInFunction.memo = BuiltInFunction("memo")
+BuiltInFunction.memo_stats = BuiltInFunction("memo_stats")
 BuiltInFunction.run = BuiltInFunction("run")
 
 
@@ -659,8 +1394,13 @@ BuiltInFunction.run = BuiltInFunction("run")
 #######################################
 
 from basic.interpreter import Interpreter
+from basic.vm import VM
+from basic.signal_interpreter import SignalInterpreter
+from basic.stack_interpreter import StackInterpreter
 from basic.run import run
 from util.error import RTError
+from util.operations import NUMBER_OPERATIONS
 from util.context import Context
 from util.rt_result import RTResult
-from util.symbol_table import SymbolTable
\ No newline at end of file
+from util.symbol_table import SymbolTable, SlotSymbolTable
+from util.signals import RTErrorSignal, ReturnSignal, result_value, signal_result
\ No newline at end of file